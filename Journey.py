@@ -1,57 +1,86 @@
 """
-Journey Map Demo - Full UI with Performance
-------------------------------------------
-Complete interface showing all intended features, optimized for speed.
-
-New in this version
--------------------
-• Hand‑offs tab – Sankey diagram + KPIs + drill‑down table
+Journey Map - Supply Wisdom TPRM
+--------------------------------
+Journey studies from uploads, the study store or a live drop directory,
+explored across swim-lane, themes, hand-off, summary and compare tabs.
+
+• Data – streamed JSON / JSON Lines uploads, memory-mapped saved studies
+  shared by all sessions, live drop directories, optional LLM enrichment
+• Sidebar filters – bitmap-indexed; filtered views derive from the study's
+  memoized views
+• Tabs – swim-lane journey, evidence search, theme heatmap, weighted
+  summary with date-range trends, hand-off Sankey, study comparison, and
+  chunked export to CSV / JSON / JSON Lines / Parquet, chart PNGs
+• Metrics – per-tab render timings and a Prometheus / JSON span export
 """
 
+import dataclasses
+import functools
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from journey_aggregate import WEIGHT_MODES
+from journey_compare import UNDATED, compare_handoffs, compare_kpis, compare_rollup, compare_themes
+from journey_demo import DEMO_DATA, DEMO_EVIDENCE, build_model
+from journey_enrich import EnrichmentCache, OpenAIEnrichmentClient, StubEnrichmentClient, enrich_frame
+from journey_export import EXPORT_FORMATS, png_supported, render_png, write_export
+from journey_figures import (PLOTLY_CONFIG, FigureCache, compare_bars, handoff_sankey, opportunity_quadrant,
+                             persona_engagement_bar, sentiment_over_time, stage_health_bar, swimlane_figure,
+                             theme_heatmap)
+from journey_filters import FilterSpec
+from journey_handoffs import HANDOFF_ORDERS, OTHER
+from journey_ingest import EMOJI_SCALE, frame_from_records, load_journey
+from journey_layout import CLUSTER_LEVELS, PERSONA_ORDERINGS
+from journey_live import LiveStudy
+from journey_metrics import Metrics, payload_bytes
+from journey_model import executive_brief
+from journey_paging import TABLE_PAGE_SIZE, OrderCache
+from journey_pool import StudyPool, approx_nbytes
+from journey_search import PAGE_SIZE, browse, category_mask, tokenize
+from journey_store import STORE_SCHEMA_VERSION, StudyStore
+from journey_timeline import GRANULARITIES, to_day
 
 # ------------------------------
 # Page setup
 # ------------------------------
-st.set_page_config(page_title="Journey Map Demo", layout="wide")
-st.title("🗺️ Journey Map Demo — Supply Wisdom TPRM")
-st.caption("Complete interface demo with hardcoded data for optimal performance.")
-st.info("🚀 DEMO MODE: All filters and controls visible, core functionality working")
+st.set_page_config(page_title="Journey Map", layout="wide")
+st.title("🗺️ Journey Map — Supply Wisdom TPRM")
+st.caption("Upload a journey export, open a saved study or follow a live drop directory. "
+           "The bundled demo study opens until you pick another.")
+_run_start = time.perf_counter()
+st.session_state["in_full_run"] = True
 
 # ------------------------------
-# Hardcoded demo data
+# Settings
 # ------------------------------
-DEMO_DATA = [
-    {"stage": "Discover Need", "persona": "CRO / ERM", "label": "Board pressure to modernize TPRM", "sentiment": 0.18, "frequency": 24, "confidence": 0.80, "emoji": "🙂"},
-    {"stage": "Evaluation & RFx", "persona": "TPRM Lead", "label": "Compare questionnaires vs real-time intelligence", "sentiment": -0.10, "frequency": 31, "confidence": 0.78, "emoji": "😐"},
-    {"stage": "Approval & Onboarding", "persona": "Procurement Lead", "label": "Accelerate vendor onboarding (Telecom)", "sentiment": 0.62, "frequency": 57, "confidence": 0.86, "emoji": "😄"},
-    {"stage": "Continuous Monitoring", "persona": "ERM Director", "label": "Lifecycle monitoring & governance", "sentiment": 0.55, "frequency": 66, "confidence": 0.84, "emoji": "😄"},
-    {"stage": "Use — Alerts & Triage", "persona": "Vendor Risk Analyst", "label": "Real-time alerts replace manual checks", "sentiment": 0.48, "frequency": 75, "confidence": 0.82, "emoji": "😄"},
-    {"stage": "Reporting & Audit", "persona": "Compliance Officer", "label": "QPRs & risk insight packs", "sentiment": 0.45, "frequency": 29, "confidence": 0.80, "emoji": "😄"},
-    {"stage": "Remediation & Supplier Mgmt", "persona": "Procurement Lead", "label": "Scorecards drive consolidation", "sentiment": 0.38, "frequency": 40, "confidence": 0.78, "emoji": "🙂"},
-    {"stage": "Onboarding (Healthcare)", "persona": "Procurement Lead", "label": "Eliminate questionnaires for faster onboarding", "sentiment": 0.42, "frequency": 36, "confidence": 0.77, "emoji": "😄"},
-    {"stage": "Compliance & Oversight", "persona": "Compliance Officer", "label": "Maintain SOC2 & impress regulators", "sentiment": 0.44, "frequency": 22, "confidence": 0.79, "emoji": "😄"},
-    {"stage": "Renewal & Expansion", "persona": "CFO", "label": "Business case: do more with less", "sentiment": 0.50, "frequency": 18, "confidence": 0.75, "emoji": "😄"},
-]
-
-# Pre-laid coordinates for instant layout
-COORDINATES = [
-    {"x": 0, "y": 0}, {"x": 1, "y": 1}, {"x": 2, "y": 2}, {"x": 3, "y": 3}, {"x": 4, "y": 4},
-    {"x": 5, "y": 5}, {"x": 6, "y": 2}, {"x": 7, "y": 2}, {"x": 8, "y": 5}, {"x": 9, "y": 6}
-]
-
-STAGES = [
-    "Discover Need", "Evaluation & RFx", "Approval & Onboarding", "Continuous Monitoring",
-    "Use — Alerts & Triage", "Reporting & Audit", "Remediation & Supplier Mgmt",
-    "Onboarding (Healthcare)", "Compliance & Oversight", "Renewal & Expansion"
-]
-PERSONAS = [
-    "CRO / ERM", "TPRM Lead", "Procurement Lead", "ERM Director",
-    "Vendor Risk Analyst", "Compliance Officer", "CFO"
-]
+WEBGL_POINT_THRESHOLD = 5_000   # default point count above which the swim-lane uses Scattergl
+FIGURE_CACHE_BYTES = int(os.environ.get("JOURNEY_FIGURE_CACHE_MB", "64")) * 2**20
+FIGURE_MAX_BYTES = int(os.environ.get("JOURNEY_FIGURE_MAX_KB", "2048")) * 1024   # larger charts wait for a click
+SANKEY_TOP_K = int(os.environ.get("JOURNEY_SANKEY_TOP_K", "25"))                 # default Sankey links shown
+ENRICH_CACHE_PATH = os.environ.get("JOURNEY_ENRICH_CACHE", ".journey_cache/enrichment.sqlite")
+ENRICH_PROVIDERS = ["Off", "Local stub", "OpenAI"]
+STORE_DIR = os.environ.get("JOURNEY_STORE_DIR", ".journey_cache/studies")
+DEMO_STUDY_ID = "demo"
+MAX_STUDIES = int(os.environ.get("JOURNEY_MAX_STUDIES", "4"))                     # resident studies per process
+STUDY_POOL_BYTES = int(os.environ.get("JOURNEY_STUDY_POOL_MB", "4096")) * 2**20
+STUDY_IDLE_SECONDS = int(os.environ.get("JOURNEY_STUDY_IDLE_MINUTES", "30")) * 60
+EXPORT_DIR = os.environ.get("JOURNEY_EXPORT_DIR", ".journey_cache/exports")
+EXPORT_MAX_BYTES = int(os.environ.get("JOURNEY_EXPORT_MAX_MB", "2048")) * 2**20   # LRU cap of the export spool
+EXPORT_DOWNLOAD_MAX_BYTES = int(os.environ.get("JOURNEY_EXPORT_DOWNLOAD_MB", "256")) * 2**20   # larger files stay on disk
+EXPORT_TABLES = {"Touchpoints": "touchpoints", "Hand-offs": "handoffs"}
+PNG_WORKERS = 1
+PNG_POLL_SECONDS = 1.0
+LIVE_DIR = os.environ.get("JOURNEY_LIVE_DIR")   # drop directory of .jsonl files for live ingest
+LIVE_POLL_SECONDS = float(os.environ.get("JOURNEY_LIVE_POLL_SECONDS", "5"))
+METRICS_PROM_PATH = os.environ.get("JOURNEY_METRICS_PROM")   # Prometheus textfile, rewritten every full rerun
+METRICS_LOG_PATH = os.environ.get("JOURNEY_METRICS_LOG")     # JSON Lines span log, appended every full rerun
 
 # ---- (Legacy) green matrix constants (not used in blue heatmap but kept for reference)
 THEMES_ORDER = [
@@ -71,44 +100,202 @@ THEME_MAP = {
     "Business case: do more with less": ["ROI & Efficiency", "Process Automation"],
 }
 
-# ---- Blue heatmap look constants (match screenshot)
-HEATMAP_STAGES = [
-    "Approval & Onboarding",
-    "Compliance & Oversight (Insurance)",
-    "Continuous Monitoring",
-    "Discover Need",
-    "Evaluation & RFx",
-    "Onboarding (Healthcare)",
-    "Remediation & Supplier Mgmt",
-    "Renewal & Expansion",
-    "Reporting & Audit",
-    "Use — Alerts & Triage",
-]
-HEATMAP_THEMES = [
-    "roi narrative",
-    "soc2 evidence",
-    "audit artifacts",
-    "cost savings",
-    "external intel",
-    "headcount savings",
-    "move from questionnaires",
-    "operational",
-    "questionnaire alternative",
-    "scorecards",
-    "vendor comparison",
-]
-THEME_MAP_BLUE = {
-    "Business case: do more with less": ["roi narrative", "headcount savings"],
-    "Maintain SOC2 & impress regulators": ["soc2 evidence", "cost savings"],
-    "QPRs & risk insight packs": ["audit artifacts", "cost savings"],
-    "Real-time alerts replace manual checks": ["move from questionnaires", "operational"],
-    "Lifecycle monitoring & governance": ["external intel"],
-    "Eliminate questionnaires for faster onboarding": ["questionnaire alternative"],
-    "Scorecards drive consolidation": ["scorecards", "vendor comparison"],
-    "Accelerate vendor onboarding (Telecom)": ["operational"],
-    "Compare questionnaires vs real-time intelligence": ["move from questionnaires"],
-    "Board pressure to modernize TPRM": ["external intel"],
-}
+# ------------------------------
+# Data loading — streamed upload or memory-mapped study store, shared by all sessions
+# ------------------------------
+@st.cache_resource(show_spinner=False)
+def study_store():
+    """Seed the demo study on first use; after that it is memory-mapped like any saved study."""
+    store = StudyStore(STORE_DIR)
+    entry = store.catalog().get(DEMO_STUDY_ID)
+    if entry is None or entry["schema_version"] != STORE_SCHEMA_VERSION:
+        frame = frame_from_records({**row, **DEMO_EVIDENCE.get(row["label"], {})} for row in DEMO_DATA)
+        store.save("Demo", frame, build_model(frame).key, study_id=DEMO_STUDY_ID, replace=True)
+    return store
+
+
+@st.cache_resource(show_spinner=False)
+def study_pool():
+    """Loaded studies, held once per process and shared read-only by every session."""
+    return StudyPool(max_studies=MAX_STUDIES, max_bytes=STUDY_POOL_BYTES, idle_seconds=STUDY_IDLE_SECONDS)
+
+
+def pooled(key, load, name, kind, spinner):
+    pool = study_pool()
+    if key in pool:
+        return pool.get(key, load, name, kind)
+    with st.spinner(spinner):
+        return pool.get(key, load, name, kind)
+
+
+def stored_model(study_id, saved):
+    """Open a saved study once per save (*saved* is its catalog timestamp); returns ``(pool key, model)``."""
+    store = study_store()
+
+    def load():
+        model = build_model(store.open(study_id), key=store.catalog()[study_id]["key"])
+        return model, model
+
+    key = ("study", study_id, saved)
+    return key, pooled(key, load, store.catalog()[study_id]["name"], "study", "Opening study…")
+
+
+def uploaded_model(upload):
+    """Parse an upload once per file_id; returns ``(pool key, (ingest, model))``."""
+    def load():
+        upload.seek(0)
+        ingest = load_journey(upload)
+        model = build_model(ingest.frame) if not ingest.frame.empty else None
+        return (ingest, model), model
+
+    key = ("upload", upload.file_id)
+    return key, pooled(key, load, upload.name, "upload", "Parsing journey upload…")
+
+
+@st.cache_resource(show_spinner="Summarizing saved study…", max_entries=8)
+def saved_cube(study_id, saved):
+    """Summary cube of a saved study; its touchpoints stay resident only if the study is open anyway."""
+    model = study_pool().peek(("study", study_id, saved))
+    if model is None:
+        store = study_store()
+        model = build_model(store.open(study_id), key=store.catalog()[study_id]["key"])
+    return model.cube()
+
+
+@st.cache_resource(show_spinner="Summarizing comparison study…", max_entries=8)
+def comparison_cube(file_id, _upload):
+    """Reduce a comparison upload to its summary cube; its touchpoints are not kept."""
+    _upload.seek(0)
+    ingest = load_journey(_upload)
+    cube = build_model(ingest.frame).cube() if not ingest.frame.empty else None
+    return ingest, cube
+
+
+def enriched_model(model, provider, name):
+    """Re-label sentiment / emoji / themes; unchanged texts come from the on-disk cache."""
+    def load():
+        client = OpenAIEnrichmentClient() if provider == "OpenAI" else StubEnrichmentClient()
+        frame, stats = enrich_frame(model.frame, client, EnrichmentCache(ENRICH_CACHE_PATH))
+        enriched = build_model(frame)
+        return (enriched, stats), enriched
+
+    key = ("enriched", model.key, provider)
+    return key, pooled(key, load, f"{name} · {provider}", "enrichment", "Enriching touchpoints…")
+
+
+@st.cache_resource(show_spinner=False)
+def live_study(path):
+    """The watched drop directory, polled at most once per interval across all sessions."""
+    return LiveStudy(path, build_model, min_interval=LIVE_POLL_SECONDS / 2)
+
+
+@st.fragment(run_every=LIVE_POLL_SECONDS)
+def live_status(live):
+    """Poll the drop directory; a new snapshot reruns the app, where only charts of changed views rebuild."""
+    live.poll()
+    if live.version != st.session_state.get("live_version"):
+        st.rerun()
+    if live.history:
+        at, rows, files, seconds = live.history[-1]
+        st.caption(f"📡 {live.n_rows:,} live touchpoints · +{rows:,} from {', '.join(files)} at "
+                   f"{time.strftime('%H:%M:%S', time.localtime(at))} ({seconds * 1000:,.0f} ms)")
+    else:
+        st.caption(f"📡 Watching {LIVE_DIR} for .jsonl files…")
+    if live.n_rejected:
+        st.caption(f"⚠️ {live.n_rejected:,} invalid live rows skipped")
+
+
+@st.cache_resource(show_spinner=False)
+def figure_cache():
+    """Process-wide LRU of built figures + JSON, shared by all sessions."""
+    return FigureCache(max_bytes=FIGURE_CACHE_BYTES)
+
+
+@st.cache_resource(show_spinner=False)
+def order_cache():
+    """Process-wide sort orders of paged drill-down tables, shared by all sessions."""
+    return OrderCache()
+
+
+@st.cache_resource(show_spinner=False)
+def png_executor():
+    """Worker process for PNG rendering, shared by all sessions."""
+    return ProcessPoolExecutor(max_workers=PNG_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+
+
+@st.cache_resource(show_spinner=False)
+def metrics():
+    """Process-wide timing spans, shared by all sessions (see the footer panel)."""
+    return Metrics()
+
+
+def span(name, **labels):
+    return metrics().span(name, **labels)
+
+
+def show_figure(model, name, build, view=None, **params):
+    """
+    Render a cached figure, building it only for a new (dataset, name, params)
+    key; charts drawn from one model *view* are keyed by that view, so live
+    updates that leave it unchanged reuse the figure.
+    """
+    key = FigureCache.key(model.key if view is None else model.view_key(view), name, **params)
+
+    built_at = []
+
+    def timed_build():
+        built_at.append(time.perf_counter())
+        return build()
+
+    entry = figure_cache().get(key, timed_build)
+    if built_at:   # cache miss: construction + JSON encoding, payload = figure JSON
+        metrics().observe("figure_build", time.perf_counter() - built_at[0], entry.nbytes, figure=name)
+    st.session_state.setdefault("shown_figures", {})[name] = key   # for PNG export
+    size = format_bytes(entry.nbytes)
+    if entry.nbytes > FIGURE_MAX_BYTES and st.session_state.get(f"uncap_{name}") != key:
+        st.warning(f"This chart is {size} of JSON, over the {format_bytes(FIGURE_MAX_BYTES)} payload cap "
+                   "(JOURNEY_FIGURE_MAX_KB). Narrow the filters or aggregate to send less.")
+        if not st.button(f"Render anyway ({size})", key=f"uncap_button_{name}"):
+            return entry
+        st.session_state[f"uncap_{name}"] = key
+    with span("plotly_chart", figure=name) as s:
+        st.plotly_chart(entry.figure, use_container_width=True, config=PLOTLY_CONFIG)
+        s.payload = entry.nbytes
+    if st.session_state.get("show_payload"):
+        st.caption(f"📦 {name}: {size} figure JSON")
+    return entry
+
+
+def format_bytes(nbytes):
+    return f"{nbytes / 2**20:,.1f} MB" if nbytes >= 2**20 else f"{nbytes / 1024:,.0f} KB"
+
+
+def paged_table(name, table_key, frame, sort_columns, default_sort, ascending=True, column_config=None):
+    """
+    One server-side sorted page of *frame*; only that page is sent to the
+    browser.  Sort orders are cached process-wide per (*table_key*, column,
+    direction), so paging is a slice.
+    """
+    n_pages = max(1, -(-len(frame) // TABLE_PAGE_SIZE))
+    if st.session_state.get(f"{name}_page", 1) > n_pages:   # the table shrank (filters, another pair)
+        st.session_state[f"{name}_page"] = 1
+    c1, c2, c3 = st.columns([2, 1, 1])
+    with c1: sort_by = st.selectbox("Sort by", sort_columns, index=sort_columns.index(default_sort),
+                                    key=f"{name}_sort")
+    with c2: descending = st.toggle("Descending", value=not ascending, key=f"{name}_desc")
+    with c3: page = st.number_input("Page", min_value=1, max_value=n_pages, step=1, key=f"{name}_page")
+    with span("dataframe", table=name) as sp:
+        rows, page, n_pages = order_cache().page(table_key, frame, sort_by, not descending, page)
+        # categoricals as plain values: Arrow would otherwise ship every category of the column
+        rows = rows.astype({c: object for c in rows.columns if isinstance(rows[c].dtype, pd.CategoricalDtype)})
+        st.dataframe(rows, use_container_width=True, hide_index=True, column_config=column_config)
+        sp.payload = payload_bytes(rows)
+    start = (page - 1) * TABLE_PAGE_SIZE
+    caption = f"Rows {start + 1:,}–{start + len(rows):,} of {len(frame):,} · page {page:,} of {n_pages:,}"
+    if st.session_state.get("show_payload"):
+        caption += f" · 📦 {format_bytes(sp.payload)} sent"
+    st.caption(caption)
+
 
 # ------------------------------
 # Sidebar — working + demo controls
@@ -116,29 +303,150 @@ THEME_MAP_BLUE = {
 with st.sidebar:
     st.header("🔧 Controls")
     st.subheader("✅ Working Controls")
+    upload = st.file_uploader("Upload journey JSON", type=["json", "jsonl"])
     show_colorbar = st.checkbox("Show sentiment legend", value=False)
     cluster_mode = st.checkbox("Aggregate touchpoints", value=True)
+    cluster_level = st.selectbox("Cluster by", CLUSTER_LEVELS, index=0, disabled=not cluster_mode)
+    webgl_threshold = st.number_input("WebGL above (points)", min_value=0, value=WEBGL_POINT_THRESHOLD, step=1000,
+                                      help="Switch the swim-lane chart to a Scattergl trace above this many points")
+    persona_ordering = st.radio("Order personas by", PERSONA_ORDERINGS, horizontal=True)
+    st.toggle("Show payload sizes", key="show_payload",
+              help="Caption every chart and drill-down table with the bytes it sends to the browser")
+
+    live_mode = st.toggle("📡 Live drop directory", key="live_mode", disabled=LIVE_DIR is None or upload is not None,
+                          help=f"Append new touchpoints from .jsonl files in {LIVE_DIR}" if LIVE_DIR
+                          else "Set JOURNEY_LIVE_DIR to a folder of .jsonl files to enable")
+    catalog = study_store().catalog()
+    study_id = st.selectbox("Study", list(catalog), disabled=upload is not None or live_mode,
+                            format_func=lambda sid: f"{catalog[sid]['name']} · {catalog[sid]['rows']:,} rows",
+                            help="Saved studies open memory-mapped from the study store")
+    model, study_name = None, None
+    if upload is not None:
+        with span("data_build", source="upload") as sp:
+            study_key, (ingest, model) = uploaded_model(upload)
+            sp.payload = payload_bytes(ingest.frame)
+        st.caption(f"Loaded {ingest.n_rows:,} touchpoints from {upload.name}")
+        if ingest.n_rejected:
+            st.warning(f"Skipped {ingest.n_rejected:,} invalid rows")
+            with st.expander("Validation errors"):
+                st.code("\n".join(ingest.errors))
+        if model is None:
+            st.error("No valid touchpoints in upload — showing the selected study.")
+        else:
+            study_name = upload.name
+            if st.button("💾 Save to study store"):
+                saved_id, _ = study_store().save(upload.name, ingest.frame, model.key)
+                st.success(f"Saved as '{saved_id}'")
+    if model is None and live_mode and LIVE_DIR:
+        live = live_study(LIVE_DIR)
+        with span("data_build", source="live") as sp:
+            live.poll()
+            st.session_state["live_version"] = live.version
+            if live.model is not None:
+                study_key, model, study_name = ("live", LIVE_DIR), live.model, "Live"
+                sp.payload = payload_bytes(model.frame)
+        live_status(live)
+        if live.model is None:
+            st.info("No live touchpoints yet — showing the selected study.")
+    if model is None:
+        with span("data_build", source="store") as sp:
+            study_key, model = stored_model(study_id, catalog[study_id]["saved"])
+            sp.payload = payload_bytes(model.frame)
+        study_name = catalog[study_id]["name"]
+    with st.expander("Study catalog"):
+        st.dataframe(pd.DataFrame.from_dict(catalog, orient="index",
+                                            columns=["name", "rows", "schema_version", "nbytes", "saved"]),
+                     use_container_width=True)
+
+    enrichment = st.selectbox("LLM enrichment", ENRICH_PROVIDERS, index=0,
+                              help="Re-label sentiment, emoji and themes from touchpoint text")
+    if enrichment == "OpenAI" and not os.environ.get("OPENAI_API_KEY"):
+        st.warning("Set OPENAI_API_KEY to use OpenAI enrichment.")
+    elif enrichment != "Off":
+        with span("data_build", source="enrichment") as sp:
+            study_key, (model, enrich_stats) = enriched_model(model, enrichment, study_name)
+            sp.payload = payload_bytes(model.frame)
+        st.caption(f"Enriched {enrich_stats.unique_texts:,} texts · {enrich_stats.cache_hits:,} cached · "
+                   f"{enrich_stats.requests:,} requests · {enrich_stats.seconds:.1f}s")
+        if enrich_stats.failed_items:
+            st.warning(f"{enrich_stats.failed_items:,} texts could not be enriched; kept original values")
 
     st.divider()
-    st.subheader("🚧 Demo Filters")
-    st.caption("Non-functional — illustrates intended interface for engineers")
-    st.file_uploader("Upload journey JSON", type=["json"], disabled=True)
-    st.multiselect("Personas", options=PERSONAS, default=PERSONAS, disabled=True)
-    st.selectbox("Focus Stage", ["All"] + STAGES, index=0, disabled=True)
-    st.slider("Min confidence", 0.0, 1.0, 0.6, 0.05, disabled=True)
-    st.select_slider("Sentiment range", options=["😡", "😕", "😐", "🙂", "😄"], value=("😡", "😄"), disabled=True)
+    st.subheader("🔎 Filters")
+    filter_index = model.filter_index()
+    sel_personas = st.multiselect("Personas", options=model.personas, default=model.personas)
+    focus_stage = st.selectbox("Focus Stage", ["All"] + model.stages, index=0)
+    min_conf = st.slider("Min confidence", 0.0, 1.0, 0.0, 0.05)
+    band_lo, band_hi = st.select_slider("Sentiment range", options=EMOJI_SCALE, value=(EMOJI_SCALE[0], EMOJI_SCALE[-1]))
+    industry_options = filter_index.categories.get("industry", [])
+    sel_industries = st.multiselect("Industries", industry_options, disabled=not industry_options,
+                                    help=None if industry_options else "This dataset has no industry field")
+    time_span = filter_index.time_span
+    date_range = None
+    if time_span is None:
+        st.date_input("Date range", value=None, disabled=True, help="No touchpoint timestamps in this study")
+    else:
+        first_date, last_date = (pd.Timestamp(t).date() for t in time_span)
+        picked = st.date_input("Date range", value=(first_date, last_date),
+                               min_value=first_date, max_value=last_date)
+        if len(picked) == 2 and tuple(picked) != (first_date, last_date):
+            date_range = tuple(picked)
+
+    st.subheader("🚧 Planned Controls")
+    st.caption("Not wired up yet")
     st.slider("Bubble size range", 12, 80, (18, 58), disabled=True)
-    st.radio("Order personas by", ["Original", "Total frequency", "Avg sentiment"], horizontal=True, disabled=True)
     st.selectbox("Rendering mode", ["Interactive (clicks)", "Safe (no clicks)"], index=0, disabled=True)
-    st.date_input("Date range", disabled=True)
-    st.multiselect("Industries", ["Telecom", "Banking", "Healthcare", "Insurance", "Financial Services"], disabled=True)
+
+    spec = FilterSpec(
+        personas=None if set(sel_personas) == set(model.personas) else tuple(sel_personas),
+        stages=None if focus_stage == "All" else (focus_stage,),
+        industries=tuple(sel_industries) or None,
+        min_confidence=min_conf or None,
+        bands=None if (band_lo, band_hi) == (EMOJI_SCALE[0], EMOJI_SCALE[-1])
+        else (EMOJI_SCALE.index(band_lo), EMOJI_SCALE.index(band_hi)),
+        dates=None if date_range is None
+        else (np.datetime64(date_range[0], "ns"), np.datetime64(date_range[1], "ns") + np.timedelta64(1, "D") - 1),
+    )
+    with span("data_filter") as filter_span:
+        view = model.filtered(spec)
+        # trends come from the rollups of the view without its date range, so moving the range is a lookup
+        trend_model = model.filtered(dataclasses.replace(spec, dates=None))
+        filter_span.payload = payload_bytes(view.row_mask)   # a filtered view holds its mask; rows are taken on use
 
     st.divider()
-    st.caption("📊 Showing 10 of 10 touchpoints")
+    if len(view):
+        model = view
+        st.caption(f"📊 Showing {len(model):,} of {len(model.root):,} touchpoints · filtered in {filter_span.ms:.1f} ms")
+    else:
+        st.warning("No touchpoints match these filters — showing all.")
+        trend_model, date_range = model, None
+        st.caption(f"📊 Showing {len(model):,} of {len(model):,} touchpoints")
 
 # ------------------------------
-# Tabs
+# Tabs — each body is an isolated fragment; its own widgets rerun only that tab
 # ------------------------------
+def record_render(name, seconds):
+    """Keep the last full-run and partial-run wall time per render unit."""
+    kind = "full" if st.session_state.get("in_full_run") else "partial"
+    log = st.session_state.setdefault("render_log", {})
+    log.setdefault(name, {})[kind] = seconds * 1000
+    metrics().observe("render", seconds, unit=name, run=kind)
+
+
+def tab_fragment(name):
+    """Run a tab body as ``st.fragment`` and time every execution."""
+    def decorate(render):
+        @functools.wraps(render)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return render(*args, **kwargs)
+            finally:
+                record_render(name, time.perf_counter() - start)
+        return st.fragment(timed)
+    return decorate
+
+
 tab_journey, tab_evidence, tab_themes, tab_summary, tab_hand_offs, tab_compare, tab_export = st.tabs(
     ["Journey", "Evidence", "Themes", "Summary", "Hand‑offs", "Compare", "Export"]
 )
@@ -146,201 +454,156 @@ tab_journey, tab_evidence, tab_themes, tab_summary, tab_hand_offs, tab_compare,
 # ------------------------------
 # Journey — pretty Plotly with polished hover
 # ------------------------------
-with tab_journey:
+@tab_fragment("Journey")
+def render_journey(model, persona_ordering, cluster_mode, cluster_level, webgl_threshold, show_colorbar):
     st.subheader("Journey Swim-lanes")
 
-    df = pd.DataFrame(DEMO_DATA).copy()
-    coords = pd.DataFrame(COORDINATES)
-    df["x"] = coords["x"]
-    df["y"] = coords["y"]
-
-    size_max = 45 if cluster_mode else 55
-
-    fig = px.scatter(
-        df,
-        x="x", y="y",
-        size="frequency",
-        color="sentiment",
-        hover_data={"stage": False, "persona": False, "sentiment": False, "frequency": False, "x": False, "y": False},
-        color_continuous_scale="RdYlGn",
-        color_continuous_midpoint=0,
-        range_color=[-1, 1],
-        size_max=size_max,
-        opacity=0.88 if cluster_mode else 0.95,
-    )
+    with span("aggregate", tab="Journey") as sp:
+        stages, lanes = model.stages, model.lanes(persona_ordering)
+        df = model.clusters(persona_ordering, cluster_level) if cluster_mode else model.positioned(persona_ordering)
+        sp.payload = payload_bytes(df)
+    if cluster_mode:
+        st.caption(f"{len(df):,} clusters from {len(model):,} touchpoints")
+    use_webgl = len(df) > webgl_threshold
 
-    # Centered emoji + clean hover
-    fig.update_traces(
-        mode="markers+text",
-        text=df["emoji"],
-        textposition="middle center",
-        marker=dict(line=dict(width=1, color="rgba(0,0,0,0.35)"))
-    )
-    custom = pd.DataFrame({
-        "label": df["label"],
-        "stage": df["stage"],
-        "persona": df["persona"],
-        "sentiment_fmt": df["sentiment"].map(lambda v: f"{v:.2f}"),
-        "frequency": df["frequency"],
-        "emoji": df["emoji"],
-    })
-    fig.update_traces(
-        customdata=custom[["label","stage","persona","sentiment_fmt","frequency","emoji"]],
-        hovertemplate=(
-            "<b>%{customdata[0]}</b><br>"
-            "Stage: %{customdata[1]}<br>"
-            "Persona: %{customdata[2]}<br>"
-            "Sentiment: %{customdata[3]} %{customdata[5]}<br>"
-            "Frequency: %{customdata[4]} mentions"
-            "<extra></extra>"
-        )
-    )
+    show_figure(model, "swimlane",
+                lambda: swimlane_figure(df, stages, lanes, cluster_mode, use_webgl, show_colorbar),
+                ordering=persona_ordering, cluster_mode=cluster_mode,
+                cluster_level=cluster_level if cluster_mode else None,
+                use_webgl=use_webgl, show_colorbar=show_colorbar)
 
-    # Swim-lane backgrounds + dotted stage separators
-    shapes = []
-    for i in range(len(PERSONAS)):
-        shapes.append(dict(
-            type="rect", xref="x", yref="y",
-            x0=-0.5, x1=len(STAGES)-0.5,
-            y0=i-0.45, y1=i+0.45,
-            fillcolor="rgba(0,0,0,0.03)" if i % 2 == 0 else "rgba(0,0,0,0.06)",
-            line=dict(width=0), layer="below"
-        ))
-    for i in range(len(STAGES)):
-        shapes.append(dict(
-            type="line", x0=i, x1=i, y0=-0.5, y1=len(PERSONAS)-0.5, xref="x", yref="y",
-            line=dict(color="rgba(0,0,0,0.18)", width=1, dash="dot"), layer="below"
-        ))
-
-    fig.update_layout(
-        shapes=shapes,
-        xaxis=dict(tickmode="array", tickvals=list(range(len(STAGES))), ticktext=STAGES,
-                   range=[-0.5, len(STAGES)-0.5], title=None, tickangle=-45, zeroline=False, showgrid=False),
-        yaxis=dict(tickmode="array", tickvals=list(range(len(PERSONAS))), ticktext=PERSONAS,
-                   range=[-0.5, len(PERSONAS)-0.5], title=None, zeroline=False, showgrid=False),
-        height=520, showlegend=False, margin=dict(l=160, r=30, t=20, b=120),
-        plot_bgcolor="white", paper_bgcolor="white", hoverlabel=dict(bgcolor="white")
-    )
-    if not show_colorbar:
-        fig.update_coloraxes(showscale=False)
 
-    st.plotly_chart(fig, use_container_width=True, config={"displayModeBar": False})
+with tab_journey:
+    render_journey(model, persona_ordering, cluster_mode, cluster_level, webgl_threshold, show_colorbar)
 
 # ------------------------------
-# Evidence — prebuilt details
+# Evidence — indexed search over quotes / themes / actions
 # ------------------------------
-with tab_evidence:
+@tab_fragment("Evidence")
+def render_evidence(model):
     st.subheader("Evidence")
 
-    evidence_options = [
-        "Board pressure to modernize TPRM — CRO / ERM",
-        "Compare questionnaires vs real-time intelligence — TPRM Lead",
-        "Accelerate vendor onboarding (Telecom) — Procurement Lead",
-        "Lifecycle monitoring & governance — ERM Director",
-        "Real-time alerts replace manual checks — Vendor Risk Analyst",
-        "QPRs & risk insight packs — Compliance Officer",
-        "Scorecards drive consolidation — Procurement Lead",
-        "Eliminate questionnaires for faster onboarding — Procurement Lead",
-        "Maintain SOC2 & impress regulators — Compliance Officer",
-        "Business case: do more with less — CFO",
-    ]
-    selected = st.selectbox("Select a touchpoint", evidence_options)
-
-    evidence_details = {
-        "Board pressure to modernize TPRM — CRO / ERM": {"sentiment": "0.18 🙂", "frequency": "24 mentions", "quote": "We need external risk intelligence beyond point-in-time assessments.", "themes": "Move from questionnaires, Real-time risk", "actions": "Assess continuous monitoring vendors"},
-        "Compare questionnaires vs real-time intelligence — TPRM Lead": {"sentiment": "-0.10 😐", "frequency": "31 mentions", "quote": "Legacy questionnaires go stale and miss dynamic risks.", "themes": "Legacy process pain, Evidence-based alerts", "actions": "Pilot Supply Wisdom against top vendors"},
-        "Accelerate vendor onboarding (Telecom) — Procurement Lead": {"sentiment": "0.62 😄", "frequency": "57 mentions", "quote": "Shifted from point-in-time questionnaires to real-time alerting.", "themes": "SLA compliance, Automation", "actions": "Embed risk intel into RFx & approvals"},
-        "Lifecycle monitoring & governance — ERM Director": {"sentiment": "0.55 😄", "frequency": "66 mentions", "quote": "We can manage third-party risk throughout the lifecycle.", "themes": "External intel, Geopolitical, Operational", "actions": "Expand scope to Nth-party & location risk"},
-        "Real-time alerts replace manual checks — Vendor Risk Analyst": {"sentiment": "0.48 😄", "frequency": "75 mentions", "quote": "Actionable data on small private companies, not just the big public ones.", "themes": "Private vendor coverage, Negative news", "actions": "Automate analyst queue from alerts"},
-        "QPRs & risk insight packs — Compliance Officer": {"sentiment": "0.45 😄", "frequency": "29 mentions", "quote": "Reports double as audit artifacts and regulator-ready evidence.", "themes": "Audit artifacts, SOC2 support", "actions": "Standardize quarterly risk reviews"},
-        "Scorecards drive consolidation — Procurement Lead": {"sentiment": "0.38 🙂", "frequency": "40 mentions", "quote": "Because of Supply Wisdom, we have our fingertips on the true pulse of our third parties.", "themes": "Scorecards, Vendor comparison", "actions": "Use scorecards for renewals & discounts"},
-        "Eliminate questionnaires for faster onboarding — Procurement Lead": {"sentiment": "0.42 😄", "frequency": "36 mentions", "quote": "Procurement can expedite onboarding without sacrificing risk quality.", "themes": "Questionnaire alternative, Time-to-value", "actions": "Integrate comprehensive risk intelligence pre-onboarding"},
-        "Maintain SOC2 & impress regulators — Compliance Officer": {"sentiment": "0.44 😄", "frequency": "22 mentions", "quote": "Proactive insights helped us avoid potential issues with regulators.", "themes": "SOC2 evidence, Cost savings", "actions": "Centralize compliance packs"},
-        "Business case: do more with less — CFO": {"sentiment": "0.50 😄", "frequency": "18 mentions", "quote": "We'd have to triple the team to match this impact with old methods.", "themes": "ROI narrative, Headcount savings", "actions": "Expand monitoring to non-critical vendors"},
-    }
-
-    details = evidence_details[selected]
-    st.markdown(f"### {selected.split(' — ')[0]}")
+    query = st.text_input("Search quotes, themes and actions", placeholder="e.g. questionnaires, soc2, alerts")
+    f1, f2 = st.columns(2)
+    with f1:
+        ev_personas = st.multiselect("Persona", model.personas, key="evidence_personas")
+    with f2:
+        ev_stages = st.multiselect("Stage", model.stages, key="evidence_stages")
+
+    # search the dataset-wide index; sidebar filters arrive as a row mask
+    frame = model.root.frame
+    mask = model.row_mask
+    if ev_personas:
+        persona_mask = category_mask(frame["persona"], ev_personas)
+        mask = persona_mask if mask is None else mask & persona_mask
+    if ev_stages:
+        stage_mask = category_mask(frame["stage"], ev_stages)
+        mask = stage_mask if mask is None else mask & stage_mask
+
+    with span("aggregate", tab="Evidence") as sp:
+        # the index is built on the first query; an empty one just ranks by mentions
+        if tokenize(query):
+            with st.spinner("Indexing evidence…"):
+                search = functools.partial(model.root.search_index().search, query)
+        else:
+            search = functools.partial(browse, len(frame))
+        page = st.session_state.get("evidence_page", 1) - 1
+        positions, scores, n_matches = search(mask=mask, order_by=frame["frequency"].to_numpy(), page=page)
+        n_pages = max(1, -(-n_matches // PAGE_SIZE))
+        if page >= n_pages:
+            page = 0
+            st.session_state["evidence_page"] = 1
+            positions, scores, n_matches = search(mask=mask, order_by=frame["frequency"].to_numpy())
+        sp.payload = payload_bytes(positions, scores)
+
+    st.caption(f"{n_matches:,} matching touchpoints · page {page + 1} of {n_pages} · {sp.ms:.1f} ms")
+    if not n_matches:
+        st.info("No touchpoints match this search.")
+        return
+
+    hits = frame.iloc[positions]
+    st.dataframe(
+        pd.DataFrame({
+            "Touchpoint": hits["label"].to_numpy(),
+            "Persona": hits["persona"].to_numpy(),
+            "Stage": hits["stage"].to_numpy(),
+            "Sentiment": hits["sentiment"].to_numpy(),
+            "Mentions": hits["frequency"].to_numpy(),
+        }),
+        use_container_width=True, hide_index=True,
+        column_config={"Sentiment": st.column_config.NumberColumn(format="%.2f")},
+    )
+    st.number_input("Page", min_value=1, max_value=n_pages, step=1, key="evidence_page")
+
+    choice = st.selectbox("Select a touchpoint", range(len(hits)),
+                          format_func=lambda i: f"{hits.iloc[i]['label']} — {hits.iloc[i]['persona']}")
+    details = hits.iloc[choice]
+    st.markdown(f"### {details['label']}")
     c1, c2 = st.columns(2)
     with c1:
-        st.write(f"**Sentiment:** {details['sentiment']}")
-        st.write(f"**Frequency:** {details['frequency']}")
+        st.write(f"**Sentiment:** {details['sentiment']:.2f} {details['emoji']}")
+        st.write(f"**Frequency:** {details['frequency']} mentions")
     with c2:
-        st.write(f"**Themes:** {details['themes']}")
-    st.write("**Quote:**")
-    st.write(f"_{details['quote']}_")
+        st.write(f"**Themes:** {', '.join(details['themes']) or '—'}")
+    st.write("**Quote:**" if len(details["quotes"]) <= 1 else f"**Quotes** _({len(details['quotes']):,})_:")
+    for quote in details["quotes"][:5] or ["—"]:
+        st.write(f"_{quote}_")
     st.write("**Suggested Actions:**")
-    st.write(f"• {details['actions']}")
+    for action in details["actions"] or ["—"]:
+        st.write(f"• {action}")
+
+with tab_evidence:
+    render_evidence(model)
 
 # ------------------------------
 # Themes — blue, stage-ordered heatmap
 # ------------------------------
-with tab_themes:
+@tab_fragment("Themes")
+def render_themes(model):
     st.subheader("Themes × Stages")
-    st.caption("Heatmap of theme mentions by journey stage (demo)")
+    st.caption("Heatmap of theme mentions by journey stage, most-mentioned themes first")
 
-    df_themes = pd.DataFrame(DEMO_DATA).copy()
-    df_themes["themes"] = df_themes["label"].map(lambda s: THEME_MAP_BLUE.get(s, []))
-    df_themes["themes"] = df_themes["themes"].apply(lambda v: v if isinstance(v, list) else [])
+    with span("aggregate", tab="Themes", section="counts"):
+        counts = model.theme_counts()
+    if not len(counts):
+        st.info("No themes found in the current selection.")
+        return
 
-    df_exp = df_themes.explode("themes").dropna(subset=["themes"])
+    top_n = st.slider("Top themes", 5, 50, 12, 1, key="themes_top_n")
+    with span("aggregate", tab="Themes", section="top") as sp:
+        mat = counts.top(top_n)
+        sp.payload = payload_bytes(mat)
+    st.caption(f"Showing {len(mat)} of {len(counts.themes):,} themes")
+    show_figure(model, "theme_heatmap", lambda: theme_heatmap(mat), view="theme_counts", top_n=top_n)
 
-    if df_exp.empty:
-        st.info("No themes found in the current demo selection.")
-    else:
-        mat = df_exp.groupby(["themes", "stage"])["frequency"].sum().unstack(fill_value=0)
-
-        # rename for parity with screenshot
-        if "Compliance & Oversight" in mat.columns:
-            mat = mat.rename(columns={"Compliance & Oversight": "Compliance & Oversight (Insurance)"})
-
-        mat = mat.reindex(index=HEATMAP_THEMES, columns=HEATMAP_STAGES, fill_value=0)
-
-        z = mat.values
-        vmax = float(z.max()) if z.size else 1.0
-
-        heat = go.Figure(data=go.Heatmap(
-            z=z, x=mat.columns, y=mat.index,
-            zmin=0, zmax=vmax, colorscale="Blues",
-            colorbar=dict(title="Mentions"),
-            hovertemplate="<b>%{y}</b><br>Stage: %{x}<br>Mentions: %{z}<extra></extra>",
-        ))
-        heat.update_layout(
-            xaxis=dict(title=None, tickangle=-35, tickfont=dict(color="#6B7280"), showgrid=False, zeroline=False),
-            yaxis=dict(title=None, tickfont=dict(color="#6B7280"), showgrid=False, zeroline=False, autorange="reversed"),
-            margin=dict(l=170, r=40, t=10, b=110),
-            height=460, paper_bgcolor="white", plot_bgcolor="rgba(218, 238, 255, 0.35)",
-        )
-        st.plotly_chart(heat, use_container_width=True, config={"displayModeBar": False})
+with tab_themes:
+    render_themes(model)
 
 # ------------------------------
 # Summary — KPI cards + stage bars + persona bar + opportunity quadrant + brief
 # ------------------------------
-with tab_summary:
+@tab_fragment("Summary")
+def render_summary(model, trend_model, date_range):
     st.subheader("Summary")
 
-    df_sum = pd.DataFrame(DEMO_DATA)
-
     # Controls
     colc1, colc2, _ = st.columns([1,1,2])
     with colc1:
-        weight_mode = st.selectbox("Weighting", ["Confidence", "Frequency", "Equal"], index=0)
+        weight_mode = st.selectbox("Weighting", WEIGHT_MODES, index=0, key="summary_weighting")
     with colc2:
         low_conf_thresh = st.slider("Low-confidence threshold", 0.5, 0.95, 0.75, 0.01)
 
-    # Weights
-    if weight_mode == "Confidence":
-        weights = df_sum["confidence"].clip(lower=0.001)
-    elif weight_mode == "Frequency":
-        weights = df_sum["frequency"].clip(lower=0.001)
-    else:
-        weights = pd.Series(1.0, index=df_sum.index)
-
-    # KPIs
-    avg_sentiment = float((df_sum["sentiment"] * weights).sum() / weights.sum())
-    total_mentions = int(df_sum["frequency"].sum())
-    coverage = len(set(zip(df_sum["stage"], df_sum["persona"]))) / (len(STAGES) * len(PERSONAS))
-    low_conf_share = float((df_sum["confidence"] < low_conf_thresh).mean())
+    # KPIs + per-stage / per-persona aggregates
+    with span("aggregate", tab="Summary") as sp:
+        summary = model.summary()
+        avg_sentiment = summary.avg_sentiment(weight_mode)
+        total_mentions = summary.total_mentions
+        coverage = summary.coverage
+        low_conf_share = summary.low_conf_share(low_conf_thresh)
+        stage_stats = summary.stage_stats(weight_mode)
+        persona_agg = summary.persona_agg(weight_mode)
+        wins, risks = model.wins_and_risks()
+        sp.payload = payload_bytes(stage_stats, persona_agg, wins, risks)
 
     k1, k2, k4 = st.columns(3)
     with k1: st.metric("Avg Sentiment", f"{avg_sentiment:.2f}")
@@ -353,42 +616,14 @@ with tab_summary:
     left, right = st.columns(2)
     with left:
         st.markdown("**Stage Health**")
-        stage_stats = (
-            df_sum.assign(w=weights)
-                  .groupby("stage")
-                  .apply(lambda g: (g["sentiment"] * g["w"]).sum() / g["w"].sum())
-                  .rename("avg_sentiment")
-                  .reset_index()
-                  .sort_values("avg_sentiment", ascending=True)
-        )
-        fig_stage = px.bar(stage_stats, x="avg_sentiment", y="stage",
-                           orientation="h", range_x=[-0.2, 1.0],
-                           color="avg_sentiment", color_continuous_scale="RdYlGn",
-                           labels={"avg_sentiment": "Avg Sentiment", "stage": ""})
-        fig_stage.update_layout(height=360, margin=dict(l=10, r=10, t=10, b=10),
-                                coloraxis_showscale=False)
-        fig_stage.add_vline(x=0.40, line_dash="dash", line_color="gray", opacity=0.7)
-        st.plotly_chart(fig_stage, use_container_width=True, config={"displayModeBar": False})
-
-    # Persona engagement (FIXED: use temp frame with weights column)
+        show_figure(model, "stage_health", lambda: stage_health_bar(stage_stats), view="summary",
+                    weight_mode=weight_mode)
+
+    # Persona engagement
     with right:
         st.markdown("**Persona Engagement**")
-        tmp = df_sum.assign(w=weights)
-        persona_agg = (
-            tmp.groupby("persona")
-               .apply(lambda g: pd.Series({
-                   "total_mentions": g["frequency"].sum(),
-                   "avg_sentiment": (g["sentiment"] * g["w"]).sum() / g["w"].sum()
-               }))
-               .reset_index()
-               .sort_values("total_mentions", ascending=True)
-        )
-        fig_pers = px.bar(persona_agg, x="total_mentions", y="persona",
-                          color="avg_sentiment", color_continuous_scale="RdYlGn",
-                          orientation="h", labels={"total_mentions": "Mentions", "persona": ""})
-        fig_pers.update_layout(height=360, margin=dict(l=10, r=10, t=10, b=10),
-                               coloraxis_showscale=False)
-        st.plotly_chart(fig_pers, use_container_width=True, config={"displayModeBar": False})
+        show_figure(model, "persona_engagement", lambda: persona_engagement_bar(persona_agg), view="summary",
+                    weight_mode=weight_mode)
 
     st.divider()
 
@@ -396,172 +631,387 @@ with tab_summary:
     ql, qr = st.columns([2,1])
     with ql:
         st.markdown("**Opportunities Quadrant**  \n_mentions vs sentiment (each point = touchpoint)_")
-        med_freq = df_sum["frequency"].median()
-        sent_threshold = 0.30
-        fig_sc = px.scatter(
-            df_sum, x="frequency", y="sentiment",
-            size="frequency", color="sentiment", color_continuous_scale="RdYlGn",
-            hover_name="label", text=df_sum["persona"],
-            size_max=38, range_y=[-0.2, 1.0]
-        )
-        fig_sc.update_traces(textposition="top center",
-                             hovertemplate="<b>%{hovertext}</b><br>Mentions: %{x}<br>Sentiment: %{y:.2f}<extra></extra>")
-        fig_sc.add_hline(y=sent_threshold, line_dash="dash", line_color="gray", opacity=0.6)
-        fig_sc.add_vline(x=med_freq, line_dash="dash", line_color="gray", opacity=0.6)
-        fig_sc.add_annotation(x=med_freq*0.5, y=sent_threshold+0.5, text="Leverage", showarrow=False, opacity=0.7)
-        fig_sc.add_annotation(x=med_freq*0.5, y=sent_threshold-0.15, text="Fix first", showarrow=False, opacity=0.7)
-        fig_sc.add_annotation(x=med_freq*1.5, y=sent_threshold+0.5, text="Activate", showarrow=False, opacity=0.7)
-        fig_sc.add_annotation(x=med_freq*1.5, y=sent_threshold-0.15, text="Low impact", showarrow=False, opacity=0.7)
-        fig_sc.update_layout(height=420, margin=dict(l=10, r=10, t=10, b=10), coloraxis_showscale=False)
-        st.plotly_chart(fig_sc, use_container_width=True, config={"displayModeBar": False})
+        show_figure(model, "opportunity_quadrant", lambda: opportunity_quadrant(model.narrow_frame()))
 
     with qr:
         st.markdown("**Executive Brief**")
-        df_sum["impact_pos"] = df_sum["sentiment"] * df_sum["frequency"]
-        wins = df_sum.sort_values("impact_pos", ascending=False).head(2)
-        risks = df_sum.sort_values(["sentiment", "frequency"], ascending=[True, False]).head(3)
-        brief = (
-            f"Overall sentiment is **{avg_sentiment:.2f}** across **{total_mentions}** mentions "
-            f"with **{coverage:.0%}** coverage. "
-            f"**Wins:** {wins.iloc[0]['label']} ({wins.iloc[0]['sentiment']:.2f}), "
-            f"{wins.iloc[1]['label']} ({wins.iloc[1]['sentiment']:.2f}). "
-            f"**Risks:** {risks.iloc[0]['label']} ({risks.iloc[0]['sentiment']:.2f}), "
-            f"{risks.iloc[1]['label']} ({risks.iloc[1]['sentiment']:.2f}), "
-            f"{risks.iloc[2]['label']} ({risks.iloc[2]['sentiment']:.2f}). "
-            f"**Next moves:** Investigate '{risks.iloc[0]['label']}' in {risks.iloc[0]['stage']}; "
-            f"accelerate adoption with {wins.iloc[0]['persona']}; "
-            f"standardize reporting in {wins.iloc[1]['stage']}."
-        )
+        brief = executive_brief(avg_sentiment, total_mentions, coverage, wins, risks)
         st.write(brief)
         st.text_area("Copy-ready text", brief, height=180)
 
+    # Sentiment over time — answered from day / week / month rollups
+    st.divider()
+    st.markdown("**Sentiment over Time**")
+    timeline = trend_model.timeline()
+    if not timeline.n_rows:
+        st.caption("Add a `timestamp` to touchpoints to see sentiment over time.")
+        return
+    tc1, tc2, _ = st.columns([1, 1, 2])
+    with tc1:
+        granularity = st.radio("Granularity", GRANULARITIES, index=2, horizontal=True, key="trend_granularity")
+    with tc2:
+        split = st.selectbox("Split by", ["None", "Stage", "Persona"], key="trend_split")
+    split_col = None if split == "None" else split.lower()
+    first_day, last_day = (to_day(d) for d in date_range) if date_range else (timeline.first_day, timeline.last_day)
+
+    with span("aggregate", tab="Summary", section="trend") as query:
+        series = timeline.series(granularity, first_day, last_day, weight_mode, split_col)
+        totals = timeline.totals(first_day, last_day)
+        query.payload = payload_bytes(series, totals)
+    show_figure(trend_model, "sentiment_over_time", lambda: sentiment_over_time(series, split_col), view="timeline",
+                granularity=granularity, split=split_col, weight_mode=weight_mode, days=(first_day, last_day))
+    range_sentiment = totals[f"sw_{weight_mode}"] / totals[f"w_{weight_mode}"] if totals[f"w_{weight_mode}"] else 0.0
+    st.caption(f"{int(totals['n']):,} dated touchpoints · {int(totals['mentions']):,} mentions · "
+               f"avg sentiment {range_sentiment:.2f} · rollup query {query.ms:.1f} ms")
+
+
+with tab_summary:
+    render_summary(model, trend_model, date_range)
+
 # ------------------------------
 # NEW TAB — Hand‑offs analysis
 # ------------------------------
-with tab_hand_offs:
+@tab_fragment("Hand-offs")
+def render_hand_offs(model):
     st.subheader("Hand‑offs")
 
-    # Build ordered dataframe
-    df_ho = pd.DataFrame(DEMO_DATA).copy()
-    stage_order_map = {s: i for i, s in enumerate(STAGES)}
-    df_ho["stage_order"] = df_ho["stage"].map(stage_order_map)
-    df_ho = df_ho.sort_values("stage_order").reset_index(drop=True)
-
-    # Compute hand‑offs
-    handoffs = []
-    for i in range(len(df_ho) - 1):
-        a, b = df_ho.iloc[i], df_ho.iloc[i + 1]
-        handoffs.append({
-            "from_persona": a["persona"],
-            "to_persona":   b["persona"],
-            "mentions":     min(a["frequency"], b["frequency"]),   # simple heuristic
-            "sentiment_delta": b["sentiment"] - a["sentiment"],
-            "confidence_avg":  (a["confidence"] + b["confidence"]) / 2,
-        })
-    df_h = pd.DataFrame(handoffs)
+    edges = model.handoff_edges()
+    order_label = st.radio("Order each account's journey by", list(HANDOFF_ORDERS), horizontal=True,
+                           key="handoff_order", disabled=not edges.n_dated,
+                           help=None if edges.n_dated else "This dataset has no timestamps")
+    order = HANDOFF_ORDERS[order_label] if edges.n_dated else "stage"
+    with span("aggregate", tab="Hand-offs") as sp:
+        matrix = model.transitions(order)
+        df_t = matrix.frame()
+        sp.payload = payload_bytes(df_t)
+    if not len(matrix):
+        st.info("Hand-offs need at least two touchpoints of one account in the current filter.")
+        return
 
     # Metrics ----------------------------------
     col1, col2, col3, col4 = st.columns(4)
-    with col1: st.metric("Total Hand‑offs", len(df_h))
-    with col2: st.metric("Avg Δ Sentiment", f"{df_h['sentiment_delta'].mean():+.2f}")
-    worst = df_h.loc[df_h["sentiment_delta"].idxmin()]
-    best  = df_h.loc[df_h["sentiment_delta"].idxmax()]
+    with col1: st.metric("Total Hand‑offs", f"{matrix.total:,}")
+    with col2: st.metric("Avg Δ Sentiment", f"{matrix.avg_delta:+.2f}")
+    worst = df_t.loc[df_t["sentiment_delta"].idxmin()]
+    best  = df_t.loc[df_t["sentiment_delta"].idxmax()]
     with col3: st.metric("Biggest Drop", f"{worst['from_persona']} ➜ {worst['to_persona']} ({worst['sentiment_delta']:+.2f})")
     with col4: st.metric("Biggest Lift", f"{best['from_persona']} ➜ {best['to_persona']} ({best['sentiment_delta']:+.2f})")
+    journeys = f"{matrix.n_accounts:,} account journeys" if edges.accounts else "one journey (no account field)"
+    st.caption(f"{journeys} · {len(matrix):,} persona pairs · ordered by "
+               f"{order}{' (dated touchpoints only)' if order == 'timestamp' else ''} · {sp.ms:.1f} ms")
 
     st.divider()
 
     # Sankey diagram ---------------------------
-    personas_nodes = list(pd.unique(df_h[["from_persona", "to_persona"]].values.ravel()))
-    node_id = {p: i for i, p in enumerate(personas_nodes)}
-
-    def delta_color(d):
-        if d < -0.05:
-            return "rgba(198,45,40,0.60)"   # red
-        if d >  0.05:
-            return "rgba(68,170,68,0.60)"   # green
-        return "rgba(140,140,140,0.45)"     # grey
-
-    sankey = go.Figure(go.Sankey(
-        arrangement="snap",
-        node=dict(label=personas_nodes, pad=18, thickness=15, color="rgba(0,0,0,0.35)"),
-        link=dict(
-            source=df_h["from_persona"].map(node_id),
-            target=df_h["to_persona"].map(node_id),
-            value=df_h["mentions"],
-            color=df_h["sentiment_delta"].apply(delta_color),
-            customdata=df_h[["mentions", "sentiment_delta"]],
-            hovertemplate=(
-                "%{source.label} ➜ %{target.label}<br>"
-                "Mentions: %{customdata[0]}<br>"
-                "Δ sentiment: %{customdata[1]:+.2f}<extra></extra>"
-            )
-        )
-    ))
-    sankey.update_layout(
-        height=420, margin=dict(l=10, r=10, t=10, b=10),
-        plot_bgcolor="white", paper_bgcolor="white"
-    )
-    st.plotly_chart(sankey, use_container_width=True, config={"displayModeBar": False})
+    top_k = st.number_input("Sankey links", min_value=1, value=SANKEY_TOP_K, step=5, key="sankey_top_k",
+                            help="Busiest persona pairs drawn; the rest of each sender's hand-offs go to “Other”")
+    show_figure(model, "handoff_sankey", lambda: handoff_sankey(matrix.top(top_k)), view="handoffs", order=order,
+                top_k=top_k)
+    if len(matrix) > top_k:
+        st.caption(f"Top {top_k:,} of {len(matrix):,} persona pairs; the rest are folded into “{OTHER}”.")
 
     st.divider()
 
-    # Drill‑down table -------------------------
-    st.markdown("**Hand‑off Details** _(sorted by Δ sentiment)_")
-    st.dataframe(
-        df_h.sort_values("sentiment_delta").reset_index(drop=True),
-        use_container_width=True,
-        hide_index=True
-    )
+    # Drill‑down tables (one sorted page each) -
+    st.markdown("**Hand‑off Details** _(persona pairs)_")
+    paged_table("handoff_pairs", (model.key, "transitions", order), df_t, list(df_t.columns), "sentiment_delta",
+                column_config={"share": st.column_config.NumberColumn(format="percent"),
+                               "sentiment_delta": st.column_config.NumberColumn(format="%+.2f"),
+                               "confidence": st.column_config.NumberColumn(format="%.2f")})
+
+    busiest = df_t.sort_values("handoffs", ascending=False, kind="stable")
+    pairs = {f"{a} ➜ {b}": (a, b) for a, b in zip(busiest["from_persona"], busiest["to_persona"])}
+    pair = pairs[st.selectbox("Hand‑offs of one pair", list(pairs), key="handoff_pair")]
+    with span("aggregate", tab="Hand-offs", section="pair") as sp:
+        edges_table = model.handoffs(order)
+        in_pair = ((edges_table["from_persona"] == pair[0]) & (edges_table["to_persona"] == pair[1])).to_numpy()
+        pair_rows = edges_table[in_pair].reset_index(drop=True)
+        sp.payload = payload_bytes(pair_rows)
+    paged_table("handoff_rows", (model.key, "handoffs", order, pair), pair_rows, list(pair_rows.columns),
+                "sentiment_delta", column_config={"sentiment_delta": st.column_config.NumberColumn(format="%+.2f"),
+                                                  "confidence_avg": st.column_config.NumberColumn(format="%.2f")})
+
+
+with tab_hand_offs:
+    render_hand_offs(model)
 
 # ------------------------------
-# Compare (placeholder) & Export (placeholder)
+# Compare — studies side by side, from pre-aggregated cubes
 # ------------------------------
-with tab_compare:
+@tab_fragment("Compare")
+def render_compare(model, study_name, catalog):
     st.subheader("Compare Studies")
-    st.info("🚧 Demo: Would allow comparison between different journey datasets")
-    st.file_uploader("Upload comparison JSON", type=["json"], disabled=True)
-    st.write("**Sample Comparison:**")
-    st.write("• Current study: 0.39 avg sentiment")
-    st.write("• Previous quarter: 0.31 avg sentiment")
-    st.write("• **Improvement:** +0.08 sentiment increase")
+    saved = st.multiselect("Saved studies", [sid for sid, e in catalog.items() if e["key"] != model.root.key],
+                           format_func=lambda sid: catalog[sid]["name"], key="compare_saved")
+    uploads = st.file_uploader("Upload comparison studies", type=["json", "jsonl"], accept_multiple_files=True,
+                               help="Each study is reduced to a small summary cube when loaded")
+    cubes = {study_name: model.root.cube()}
+    for sid in saved:
+        name = catalog[sid]["name"]
+        cubes[name if name not in cubes else f"{name} ({sid})"] = saved_cube(sid, catalog[sid]["saved"])
+    for up in uploads or []:
+        ingest, cube = comparison_cube(up.file_id, up)
+        if cube is None:
+            st.warning(f"{up.name}: no valid touchpoints")
+            continue
+        name = up.name if up.name not in cubes else f"{up.name} ({len(cubes) + 1})"
+        cubes[name] = cube
+    if len(cubes) < 2:
+        st.info("Pick saved studies or upload new ones to compare them with the current dataset "
+                f"(**{study_name}**, the baseline). Sidebar filters don't apply here.")
+        return
+
+    cc1, cc2, _ = st.columns([1, 1, 2])
+    with cc1:
+        weight_mode = st.selectbox("Weighting", WEIGHT_MODES, index=0, key="compare_weighting")
+    with cc2:
+        # months of any study; undated touchpoints last
+        periods = sorted({p for cube in cubes.values() for p in cube.periods}, key=lambda p: (p == UNDATED, p))
+        period = st.selectbox("Period", [None] + periods, key="compare_period",
+                              format_func=lambda p: "All periods" if p is None else p,
+                              help="Calendar month of the touchpoint timestamps")
+    with span("aggregate", tab="Compare") as compare_span:
+        kpis = compare_kpis(cubes, weight_mode, period)
+        stages = compare_rollup(cubes, "stage", weight_mode, period)
+        personas = compare_rollup(cubes, "persona", weight_mode, period)
+        handoffs = compare_handoffs(cubes)
+        themes = compare_themes(cubes, period=period)
+        compare_span.payload = payload_bytes(kpis, stages, personas, handoffs, themes)
+
+    for col, (name, row) in zip(st.columns(len(kpis)), kpis.iterrows()):
+        with col:
+            is_baseline = name == study_name
+            empty = not row["touchpoints"]   # nothing in this period
+            st.metric(f"{name} · avg sentiment", "—" if empty else f"{row['avg_sentiment']:.2f}",
+                      None if is_baseline or empty or np.isnan(row["Δ sentiment"]) else f"{row['Δ sentiment']:+.2f}")
+            st.metric("Mentions", f"{int(row['mentions']):,}",
+                      None if is_baseline else f"{int(row['Δ mentions']):+,}")
+    st.dataframe(kpis.style.format({"avg_sentiment": "{:.2f}", "coverage": "{:.0%}", "Δ sentiment": "{:+.2f}",
+                                    "Δ mentions": "{:+,}", "mentions": "{:,}", "touchpoints": "{:,}"}),
+                 use_container_width=True)
 
-with tab_export:
+    st.divider()
+    study_keys = tuple(c.key for c in cubes.values())
+    left, right = st.columns(2)
+    with left:
+        st.markdown("**Stage Health**")
+        show_figure(model.root, "compare_stages", lambda: compare_bars(stages, "stage", "avg_sentiment", "Avg Sentiment"),
+                    studies=study_keys, weight_mode=weight_mode, period=period)
+    with right:
+        st.markdown("**Persona Engagement**")
+        show_figure(model.root, "compare_personas", lambda: compare_bars(personas, "persona", "mentions", "Mentions"),
+                    studies=study_keys, period=period)
+
+    st.divider()
+    left, right = st.columns([3, 2])
+    with left:
+        st.markdown("**Hand‑off Deltas** _(avg Δ sentiment per hand-off; shift = last − baseline; all periods)_")
+        st.dataframe(handoffs.style.format("{:+.2f}", subset=[c for c in handoffs.columns if c.endswith("Δ") or c == "shift"])
+                     .format("{:,.0f}", subset=[c for c in handoffs.columns if c.endswith("hand-offs")]),
+                     use_container_width=True)
+    with right:
+        st.markdown("**Theme Share** _(share of theme mentions)_")
+        st.dataframe(themes.style.format("{:.0%}"), use_container_width=True)
+
+    cube_kb = sum(c.nbytes for c in cubes.values()) / 1024
+    st.caption(f"Compared {len(cubes)} studies ({kpis['touchpoints'].sum():,} touchpoints) in {compare_span.ms:.1f} ms "
+               f"from {cube_kb:,.0f} KB of summary cubes.")
+
+
+with tab_compare:
+    render_compare(model, study_name, catalog)
+
+
+@st.fragment(run_every=PNG_POLL_SECONDS)
+def png_status():
+    """Poll the background PNG job; a full rerun picks up the result."""
+    name, future = st.session_state["png_job"]
+    if not future.done():
+        st.caption(f"⏳ Rendering {name} in a worker process…")
+        return
+    del st.session_state["png_job"]
+    try:
+        st.session_state["png_ready"] = (name, future.result())
+    except Exception as exc:
+        st.session_state["png_error"] = f"PNG export of {name} failed: {exc}"
+    st.rerun()
+
+
+@tab_fragment("Export")
+def render_export(model):
     st.subheader("Export")
-    st.info("🚧 Demo: Would provide data export functionality")
-    c1, c2, c3 = st.columns(3)
-    with c1: st.button("⬇️ Download CSV", disabled=True)
-    with c2: st.button("⬇️ Download JSON", disabled=True)
-    with c3: st.button("⬇️ Download PNG", disabled=True)
-    st.write("**Export Options:** CSV (raw), JSON (structured), PNG (chart image)")
+    c1, c2 = st.columns(2)
+    with c1: table = st.radio("Table", list(EXPORT_TABLES), horizontal=True, key="export_table")
+    with c2: fmt = st.radio("Format", list(EXPORT_FORMATS), horizontal=True, key="export_format")
+    n_rows = len(model) if table == "Touchpoints" else len(model.handoffs())
+    ext, mime = EXPORT_FORMATS[fmt]
+    path = os.path.join(EXPORT_DIR, f"{model.key.replace(':', '-')}-{EXPORT_TABLES[table]}.{ext}")
+    st.caption(f"{n_rows:,} rows" + (" · current sidebar filters" if model.parent is not None else ""))
+
+    # files are encoded in chunks to disk once (and reused); the button reads the finished file into
+    # memory, so it is only offered on the rerun right after "Prepare export" and below a size cap
+    prepared = st.button("Prepare export", key="export_prepare")
+    if prepared:
+        frame = model.frame if table == "Touchpoints" else model.handoffs()
+        with st.spinner(f"Writing {fmt}…"), span("export", format=fmt) as sp:
+            sp.payload = write_export(frame, fmt, path, max_bytes=EXPORT_MAX_BYTES)
+        st.session_state["export_ready"] = path
+    # another session's export may have pruned this one from the spool since
+    if st.session_state.get("export_ready") == path and os.path.exists(path):
+        nbytes = os.path.getsize(path)
+        size = f"{nbytes / 2**20:.1f} MB" if nbytes >= 2**20 else f"{nbytes / 1024:.0f} KB"
+        if nbytes > EXPORT_DOWNLOAD_MAX_BYTES:
+            st.caption(f"The {fmt} file ({size}) is too large to serve through the browser; "
+                       f"it is at `{os.path.abspath(path)}`.")
+        elif prepared:
+            with open(path, "rb") as fh:
+                st.download_button(f"⬇️ Download {fmt} ({size})", fh,
+                                   file_name=f"journey-{EXPORT_TABLES[table]}.{ext}", mime=mime,
+                                   on_click=lambda: st.session_state.pop("export_ready", None))
+        else:
+            st.caption(f"{fmt} file ready ({size}) — click **Prepare export** again to download it.")
+
+    st.divider()
+    st.markdown("**Chart image (PNG)**")
+    shown = st.session_state.get("shown_figures", {})
+    if not png_supported():
+        st.caption("PNG export needs the optional `kaleido` package (and Chrome).")
+        return
+    chart = st.selectbox("Chart", list(shown), key="png_chart", format_func=lambda n: n.replace("_", " ").title())
+    busy = "png_job" in st.session_state
+    if st.button("Render PNG", key="png_render", disabled=busy or not chart):
+        entry = figure_cache().peek(shown[chart])
+        if entry is None:
+            st.warning("That chart is no longer cached — open its tab again, then export.")
+        else:
+            st.session_state.pop("png_ready", None)
+            st.session_state["png_job"] = (chart, png_executor().submit(render_png, entry.json))
+            busy = True
+    if busy:
+        png_status()
+    if "png_error" in st.session_state:
+        st.error(st.session_state.pop("png_error"))
+    if "png_ready" in st.session_state:
+        name, png = st.session_state["png_ready"]
+        st.download_button(f"⬇️ Download {name}.png", png, file_name=f"{name}.png", mime="image/png")
+
+
+with tab_export:
+    render_export(model)
 
 # ------------------------------
-# Debug Footer / Notes
+# Rerun timing + metrics export — full script vs fragment-only reruns
 # ------------------------------
+record_render("Full rerun", time.perf_counter() - _run_start)
+st.session_state["in_full_run"] = False
+
+cache = figure_cache()
+view_hits, view_misses = model.root.cache_stats()
+for gauge, value in {"figure_cache_hits": cache.hits, "figure_cache_misses": cache.misses,
+                     "figure_cache_bytes": cache.nbytes, "figure_cache_entries": len(cache)}.items():
+    metrics().gauge(gauge, value)
+metrics().gauge("model_view_hits", view_hits, dataset=model.root.key)
+metrics().gauge("model_view_misses", view_misses, dataset=model.root.key)
+pool = study_pool()
+metrics().gauge("study_pool_studies", len(pool))
+metrics().gauge("study_pool_bytes", pool.nbytes)
+metrics().gauge("study_pool_evictions", pool.evictions)
+run_ctx = get_script_run_ctx()
+if run_ctx is not None:   # sessions hold widget state + a pointer to their (shared) view
+    pool.touch_session(run_ctx.session_id, study_key, study_name, model, approx_nbytes(dict(st.session_state)))
+if METRICS_PROM_PATH:
+    metrics().write_prometheus(METRICS_PROM_PATH)
+if METRICS_LOG_PATH:
+    metrics().append_log(METRICS_LOG_PATH)
+
+# ------------------------------
+# Debug Footer — live hot-path metrics
+# ------------------------------
+def hit_ratio(hits, misses):
+    return f"{hits / (hits + misses):.0%}" if hits + misses else "—"
+
+
 st.divider()
-with st.expander("🔍 Demo Technical Details"):
-    st.markdown("""
-**Working Features**
-- ✅ Journey swim-lane visualization (Plotly)
-- ✅ Evidence touchpoint details
-- ✅ Themes heatmap
-- ✅ Summary dashboards
-- ✅ **NEW** Hand‑offs Sankey analysis
-- ✅ Sentiment legend toggle
-- ✅ Aggregation (cluster) style toggle
-- ✅ Interactive hover tooltips
-
-**Demo (non-functional)**
-- 🚧 File upload
-- 🚧 Persona/stage filtering
-- 🚧 Confidence thresholds
-- 🚧 Visual customization
-- 🚧 Data export
-- 🚧 Comparison tools
-
-**Performance Optimizations**
-- Pre-laid coordinates for instant layout
-- Hardcoded evidence database
-- Minimal per-frame computation
-- Static tables with fixed heights
-    """)
+with st.expander("🔍 Technical Details"):
+    st.caption("Spans are process-wide (every session of this server); p50 / p95 over the last runs of each. "
+               "Headless benchmarks: `python journey_bench.py`.")
+    rerun = metrics().latency("render", unit="Full rerun", run="full")
+    m1, m2, m3, m4, m5 = st.columns(5)
+    with m1: st.metric("Last full rerun", f"{rerun[0] * 1000:,.0f} ms")
+    with m2: st.metric("p50 rerun", f"{rerun[1] * 1000:,.0f} ms")
+    with m3: st.metric("p95 rerun", f"{rerun[2] * 1000:,.0f} ms")
+    with m4: st.metric("Figure cache hits", hit_ratio(cache.hits, cache.misses),
+                       help=f"{len(cache):,} figures · {cache.nbytes / 2**20:.1f} MB cached")
+    with m5: st.metric("Model view hits", hit_ratio(view_hits, view_misses),
+                       help="Memoized views + filtered sub-models of the current dataset")
+
+    spans = metrics().series()
+    timing_cols = ["count", "last_ms", "p50_ms", "p95_ms"]
+    renders = spans[spans["span"] == "render"]
+    st.markdown("**Rerun latency** _(ms; partial = fragment-only rerun of one tab)_")
+    st.dataframe(renders.set_index(["unit", "run"])[timing_cols].sort_index().round(1), use_container_width=True)
+
+    st.markdown("**Sections** _(data build, per-tab aggregation, figure build, `st.plotly_chart`)_")
+    sections = spans[spans["span"] != "render"]
+    label_cols = [c for c in sections.columns if c not in timing_cols + ["span", "unit", "run", "payload_bytes"]
+                  and sections[c].notna().any()]
+    sections = sections.assign(payload_kb=sections["payload_bytes"].astype(float) / 1024)
+    st.dataframe(sections[["span"] + label_cols + timing_cols + ["payload_kb"]]
+                 .sort_values("p95_ms", ascending=False).round(1),
+                 use_container_width=True, hide_index=True)
+
+    st.markdown(f"**Figure JSON sizes** _(charts shown in this session; cap {format_bytes(FIGURE_MAX_BYTES)})_")
+    shown = st.session_state.get("shown_figures", {})
+    entries = {name: cache.peek(key) for name, key in shown.items()}
+    st.dataframe(pd.DataFrame({"figure": list(entries),
+                               "json_kb": [e.nbytes / 1024 if e else None for e in entries.values()],
+                               "over_cap": [e is not None and e.nbytes > FIGURE_MAX_BYTES for e in entries.values()],
+                               "cached": [e is not None for e in entries.values()]}).round(1),
+                 use_container_width=True, hide_index=True)
+
+    render_log = st.session_state.get("render_log", {})
+    full_ms = render_log.get("Full rerun", {}).get("full")
+    partial_ms = render_log.get("Summary", {}).get("partial")
+    if full_ms and partial_ms:
+        st.caption(f"Summary widget change: {partial_ms:.0f} ms as a fragment vs {full_ms:.0f} ms for a full rerun "
+                   f"({full_ms / partial_ms:.1f}× faster)")
+
+    d1, d2 = st.columns(2)
+    with d1:
+        st.download_button("⬇️ Prometheus metrics", metrics().prometheus(), file_name="journey_metrics.prom",
+                           mime="text/plain", help="Also written every full rerun to $JOURNEY_METRICS_PROM if set")
+    with d2:
+        st.download_button("⬇️ JSON log", metrics().to_json(), file_name="journey_metrics.json",
+                           mime="application/json", help="Recent span events are appended to $JOURNEY_METRICS_LOG if set")
+
+with st.expander("🖥️ Server memory (admin)"):
+    st.caption(f"{len(pool)} of {pool.max_studies} studies resident · ~{pool.nbytes / 2**20:,.0f} MB of "
+               f"{STUDY_POOL_BYTES / 2**20:,.0f} MB budget · idle studies evicted after "
+               f"{STUDY_IDLE_SECONDS // 60} min · {pool.evictions:,} evicted so far")
+    if st.toggle("Measure memory", key="admin_measure", help="Estimates every resident study and session"):
+        studies, sessions = pool.studies(), pool.sessions()
+        shared_mb = studies[["frame_mb", "views_mb", "filtered_mb"]].to_numpy().sum()
+        a1, a2, a3, a4 = st.columns(4)
+        with a1: st.metric("Shared studies", f"{shared_mb:,.1f} MB", help="Frames + derived + filtered views")
+        with a2: st.metric("Memory-mapped", f"{studies['mapped_mb'].sum():,.1f} MB",
+                           help="Read-only study columns in the OS page cache, shared across processes")
+        with a3: st.metric("Sessions", f"{len(sessions):,}")
+        with a4: st.metric("Session state", f"{sessions['state_kb'].sum() / 1024:,.2f} MB")
+        st.markdown("**Resident studies** _(least recently used first)_")
+        st.dataframe(studies.drop(columns="key").round(2), use_container_width=True, hide_index=True)
+        st.markdown("**Sessions** _(filtered views are shared by sessions with the same filters)_")
+        st.dataframe(sessions.round(2), use_container_width=True, hide_index=True)
+
+        keys = list(studies["key"])
+        names = dict(zip(keys, studies["name"]))
+        e1, e2 = st.columns(2)
+        with e1:
+            victim = st.selectbox("Study", keys, format_func=lambda k: f"{names[k]} ({k[0]})", key="admin_victim")
+            if st.button("Evict study", key="admin_evict", disabled=victim is None):
+                pool.evict(victim)
+                st.rerun()
+        with e2:
+            idle_minutes = st.number_input("Idle for (minutes)", min_value=0, value=STUDY_IDLE_SECONDS // 60,
+                                           key="admin_idle")
+            if st.button("Evict idle studies", key="admin_evict_idle"):
+                st.toast(f"Evicted {pool.evict_idle(idle_minutes * 60)} idle studies")
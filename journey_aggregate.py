@@ -0,0 +1,126 @@
+"""
+Journey Aggregate - vectorized weighted sentiment
+-------------------------------------------------
+One grouped pass over the touchpoints produces per-cell sums for every
+weighting mode at once; stage / persona / overall figures are rolled up from
+that small cell table, so switching the Weighting selectbox is a lookup.
+Appended touchpoints are folded into the cells with ``add``.
+
+For each mode ``m`` the cell table carries ``w_m`` (sum of weights) and
+``sw_m`` (sum of sentiment × weight); the weighted mean is ``sw_m / w_m``.
+"""
+
+import numpy as np
+import pandas as pd
+
+WEIGHT_MODES = ("Confidence", "Frequency", "Equal")
+MIN_WEIGHT = 0.001
+
+
+def weight_columns(frame):
+    """Float64 weight and sentiment×weight columns for every mode, plus mentions."""
+    sent = frame["sentiment"].to_numpy(np.float64)
+    weights = {
+        "Confidence": np.clip(frame["confidence"].to_numpy(np.float64), MIN_WEIGHT, None),
+        "Frequency": np.clip(frame["frequency"].to_numpy(np.float64), MIN_WEIGHT, None),
+        "Equal": np.ones(len(frame)),
+    }
+    cols = {"mentions": frame["frequency"].to_numpy(np.int64), "n": np.ones(len(frame), dtype=np.int64)}
+    for mode, w in weights.items():
+        cols[f"w_{mode}"] = w
+        cols[f"sw_{mode}"] = sent * w
+    return cols
+
+
+def grouped_sums(frame, by):
+    """Single grouped pass: sums of all weight columns per *by* group (observed only)."""
+    data = {key: frame[key].array for key in by}
+    data.update(weight_columns(frame))
+    return pd.DataFrame(data).groupby(list(by), observed=True, sort=False).sum()
+
+
+def weighted_means(sums, mode):
+    """Weighted mean sentiment per row of a sums table, for one mode."""
+    return sums[f"sw_{mode}"] / sums[f"w_{mode}"]
+
+
+class WeightedSummary:
+    """Stage × persona cell sums plus the KPI inputs, computed once per dataset."""
+
+    def __init__(self, frame, n_stages, n_personas):
+        self.cells = grouped_sums(frame, ("stage", "persona"))
+        self.totals = self.cells.sum()
+        self.n_rows = len(frame)
+        self.coverage = len(self.cells) / max(n_stages * n_personas, 1)
+        self._sorted_confidence = np.sort(frame["confidence"].to_numpy())
+        self._rollups = {}
+
+    @classmethod
+    def from_cells(cls, cells, confidence, n_stages, n_personas):
+        """
+        Summary from already summed stage × persona *cells* (e.g. a date range
+        of ``TimeRollups.cells``); *confidence* holds the same touchpoints'
+        confidences, for ``low_conf_share``.
+        """
+        summary = cls.__new__(cls)
+        summary.cells = cells
+        summary.totals = cells.sum()
+        summary.n_rows = len(confidence)
+        summary.coverage = len(cells) / max(n_stages * n_personas, 1)
+        summary._sorted_confidence = np.sort(confidence)
+        summary._rollups = {}
+        return summary
+
+    def copy(self):
+        dup = WeightedSummary.__new__(WeightedSummary)
+        dup.__dict__.update(self.__dict__, _rollups={})
+        return dup
+
+    def add(self, frame, n_stages, n_personas):
+        """Fold appended touchpoints into the cell sums (their categories must extend this frame's)."""
+        self.cells = self.cells.add(grouped_sums(frame, ("stage", "persona")), fill_value=0) \
+                               .astype(self.cells.dtypes.to_dict())
+        self.totals = self.cells.sum()
+        self.n_rows += len(frame)
+        self.coverage = len(self.cells) / max(n_stages * n_personas, 1)
+        added = np.sort(frame["confidence"].to_numpy())
+        self._sorted_confidence = np.insert(self._sorted_confidence,
+                                            np.searchsorted(self._sorted_confidence, added), added)
+        self._rollups = {}
+        return self
+
+    def rollup(self, level):
+        """Cell sums collapsed onto ``"stage"`` or ``"persona"``."""
+        if level not in self._rollups:
+            self._rollups[level] = self.cells.groupby(level=level, observed=True, sort=False).sum()
+        return self._rollups[level]
+
+    def avg_sentiment(self, mode):
+        return float(self.totals[f"sw_{mode}"] / self.totals[f"w_{mode}"])
+
+    @property
+    def total_mentions(self):
+        return int(self.totals["mentions"])
+
+    def low_conf_share(self, threshold):
+        """Share of touchpoints with confidence strictly below *threshold*."""
+        if not self.n_rows:
+            return 0.0
+        dtype = self._sorted_confidence.dtype
+        below = np.searchsorted(self._sorted_confidence, np.asarray(threshold, dtype=dtype), side="left")
+        return float(below / self.n_rows)
+
+    def stage_stats(self, mode):
+        """``stage, avg_sentiment`` ascending by sentiment (Stage Health bars)."""
+        sums = self.rollup("stage")
+        return (pd.DataFrame({"stage": sums.index.astype(str),
+                              "avg_sentiment": weighted_means(sums, mode).to_numpy()})
+                  .sort_values("avg_sentiment", ascending=True, kind="stable"))
+
+    def persona_agg(self, mode):
+        """``persona, total_mentions, avg_sentiment`` ascending by mentions."""
+        sums = self.rollup("persona")
+        return (pd.DataFrame({"persona": sums.index.astype(str),
+                              "total_mentions": sums["mentions"].to_numpy(),
+                              "avg_sentiment": weighted_means(sums, mode).to_numpy()})
+                  .sort_values("total_mentions", ascending=True, kind="stable"))
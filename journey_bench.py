@@ -0,0 +1,233 @@
+"""
+Journey Bench - headless render benchmarks
+------------------------------------------
+Drives Journey.py with Streamlit's ``AppTest`` against deterministic
+synthetic studies and writes the timings to JSON:
+
+    python journey_bench.py                          # 1k / 10k / 100k / 1M rows
+    python journey_bench.py --rows 1000 10000 --out before.json
+    python journey_bench.py --compare before.json after.json
+
+Each size runs in its own process (so peak RSS is per size).  The synthetic
+study is saved to a temporary study store and opened from the sidebar, the
+same path a saved study takes.  Per size it records:
+
+• ``cold_ms`` — first run on the study (open + every view + every tab)
+• ``warm_ms`` — the same full rerun again (everything cached)
+• ``tabs`` — per-tab wall time of the warm run (Journey.py's render log)
+• ``fragment_ms`` — Summary tab time after its Weighting changes
+• ``filter_ms`` — full rerun after a persona is deselected
+• ``peak_rss_mb`` — peak resident memory of the process
+
+``--compare`` prints old → new per metric and exits non-zero when any timing
+regressed by more than ``--tolerance``.
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from journey_ingest import EMOJI_SCALE, sentiment_band
+
+DEFAULT_ROWS = (1_000, 10_000, 100_000, 1_000_000)
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Journey.py")
+RUN_TIMEOUT = 3600   # seconds per AppTest run
+
+SYNTH_STAGES = [f"Stage {i:02d}" for i in range(1, 11)]
+SYNTH_PERSONAS = [f"Persona {c}" for c in "ABCDEFGH"]
+SYNTH_INDUSTRIES = ["Telecom", "Banking", "Healthcare", "Insurance", "Financial Services"]
+SYNTH_ACCOUNT_ROWS = 12   # average touchpoints per synthetic account
+_WORDS = ("vendor risk alert onboarding questionnaire monitoring audit evidence report scorecard renewal "
+          "contract budget regulator board analyst triage remediation supplier coverage signal").split()
+
+
+# ------------------------------
+# Synthetic studies
+# ------------------------------
+def _phrases(rng, count, words):
+    picks = rng.integers(0, len(_WORDS), size=(count, words))
+    return [" ".join(_WORDS[i] for i in row) for row in picks]
+
+
+def synthetic_frame(n_rows, seed=0):
+    """Deterministic touchpoint frame with the same columns / dtypes as ``journey_ingest``."""
+    rng = np.random.default_rng(seed)
+    labels = _phrases(rng, max(n_rows // 20, 50), 5)
+    quotes = _phrases(rng, 500, 10)
+    themes = _phrases(rng, 60, 2)
+    actions = _phrases(rng, 100, 4)
+    n_accounts = max(n_rows // SYNTH_ACCOUNT_ROWS, 1)
+
+    stage = rng.integers(0, len(SYNTH_STAGES), n_rows)
+    sentiment = np.clip(rng.normal(0.15 + 0.04 * stage - 0.2, 0.35), -1, 1).astype(np.float32)
+    n_themes = rng.integers(1, 4, n_rows)
+    theme_ids = rng.integers(0, len(themes), size=(n_rows, 3))
+    quote_ids = rng.integers(0, len(quotes), size=(n_rows, 2))
+    start = np.datetime64("2023-01-01", "s").astype(np.int64)
+    stamps = (start + rng.integers(0, 2 * 365 * 86400, n_rows)) * 1_000_000_000
+    return pd.DataFrame({
+        "stage": pd.Categorical.from_codes(stage, categories=SYNTH_STAGES),
+        "persona": pd.Categorical.from_codes(rng.integers(0, len(SYNTH_PERSONAS), n_rows), categories=SYNTH_PERSONAS),
+        "label": pd.Series([labels[i] for i in rng.integers(0, len(labels), n_rows)], dtype=object),
+        "sentiment": sentiment,
+        "frequency": rng.integers(1, 80, n_rows).astype(np.int32),
+        "confidence": rng.uniform(0.4, 1.0, n_rows).astype(np.float32),
+        "emoji": pd.Categorical.from_codes(sentiment_band(sentiment), categories=EMOJI_SCALE),
+        "industry": pd.Categorical.from_codes(rng.integers(0, len(SYNTH_INDUSTRIES), n_rows),
+                                              categories=SYNTH_INDUSTRIES),
+        "account": pd.Categorical.from_codes(rng.integers(0, n_accounts, n_rows),
+                                             categories=[f"Account {i:06d}" for i in range(n_accounts)]),
+        "timestamp": stamps.view("datetime64[ns]"),
+        "quotes": pd.Series([tuple(quotes[q] for q in row[:1 + (i % 2)]) for i, row in enumerate(quote_ids)],
+                            dtype=object),
+        "themes": pd.Series([tuple(themes[t] for t in row[:k]) for row, k in zip(theme_ids, n_themes)], dtype=object),
+        "actions": pd.Series([(actions[i % len(actions)],) if i % 3 == 0 else () for i in range(n_rows)], dtype=object),
+    })
+
+
+# ------------------------------
+# One size (runs in a child process)
+# ------------------------------
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 1024   # bytes on macOS, KiB elsewhere
+
+
+def _timed_run(at):
+    start = time.perf_counter()
+    at.run(timeout=RUN_TIMEOUT)
+    if at.exception:
+        raise RuntimeError(f"app raised: {at.exception[0].value}")
+    return (time.perf_counter() - start) * 1000
+
+
+def bench_size(n_rows, seed=0):
+    """Benchmark one study size in this process; returns a result dict."""
+    from streamlit.testing.v1 import AppTest
+
+    from journey_model import frame_hash
+    from journey_store import StudyStore
+
+    # the generated study (memory-mapped, up to GBs at 1M rows) goes away with the run
+    with tempfile.TemporaryDirectory(prefix="journey-bench-", ignore_cleanup_errors=True) as work:
+        os.environ.update(JOURNEY_STORE_DIR=os.path.join(work, "studies"),
+                          JOURNEY_EXPORT_DIR=os.path.join(work, "exports"),
+                          JOURNEY_ENRICH_CACHE=os.path.join(work, "enrichment.sqlite"))
+        at = AppTest.from_file(APP, default_timeout=RUN_TIMEOUT)
+        _timed_run(at)                                  # demo study: imports, caches, store seeding
+
+        frame = synthetic_frame(n_rows, seed)
+        store = StudyStore(os.environ["JOURNEY_STORE_DIR"])
+        study_id, _ = store.save(f"Bench {n_rows:,}", frame, frame_hash(frame))
+        del frame
+        _timed_run(at)                                  # picks up the new catalog entry
+        next(w for w in at.selectbox if w.label == "Study").set_value(study_id)
+        result = {"rows": n_rows, "cold_ms": _timed_run(at), "warm_ms": _timed_run(at)}
+        log = at.session_state["render_log"]
+        result["tabs"] = {name: round(times["full"], 2) for name, times in log.items() if "full" in times}
+
+        # AppTest always reruns the whole script, so this is the Summary tab's own time
+        # after the change, i.e. what its fragment-only rerun costs in the browser
+        next(w for w in at.selectbox if w.key == "summary_weighting").set_value("Frequency")
+        _timed_run(at)
+        result["fragment_ms"] = at.session_state["render_log"]["Summary"]["full"]
+
+        personas = next(w for w in at.multiselect if w.label == "Personas")
+        personas.unselect(SYNTH_PERSONAS[0])
+        result["filter_ms"] = _timed_run(at)
+        result["peak_rss_mb"] = _peak_rss_mb()
+    return {k: round(v, 2) if isinstance(v, float) else v for k, v in result.items()}
+
+
+# ------------------------------
+# Runner + comparison
+# ------------------------------
+def _environment():
+    import streamlit
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(APP), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {"commit": commit, "python": platform.python_version(), "platform": platform.platform(),
+            "streamlit": streamlit.__version__, "pandas": pd.__version__, "numpy": np.__version__,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S")}
+
+
+def run(sizes, out, seed=0):
+    report = {"environment": _environment(), "seed": seed, "results": []}
+    for n_rows in sizes:
+        print(f"• {n_rows:,} rows …", flush=True)
+        child = subprocess.run([sys.executable, os.path.abspath(__file__), "--one", str(n_rows), "--seed", str(seed)],
+                               capture_output=True, text=True)
+        if child.returncode:
+            print(child.stderr[-2000:], file=sys.stderr)
+            report["results"].append({"rows": n_rows, "error": child.stderr.strip().splitlines()[-1:]})
+            continue
+        result = json.loads(child.stdout.strip().splitlines()[-1])
+        print(f"  cold {result['cold_ms']:,.0f} ms · warm {result['warm_ms']:,.0f} ms · "
+              f"peak {result['peak_rss_mb']:,.0f} MB", flush=True)
+        report["results"].append(result)
+    with open(out, "w", encoding="utf-8") as fh:
+        json.dump(report, fh, indent=2)
+    print(f"wrote {out}")
+    return report
+
+
+def _flatten(result):
+    flat = {k: v for k, v in result.items() if isinstance(v, (int, float)) and k != "rows"}
+    flat.update({f"tab:{k}": v for k, v in result.get("tabs", {}).items()})
+    return flat
+
+
+def compare(old_path, new_path, tolerance=0.2):
+    """Print old → new for every shared metric; return the number of timing regressions."""
+    with open(old_path, encoding="utf-8") as fh:
+        old = {r["rows"]: _flatten(r) for r in json.load(fh)["results"]}
+    with open(new_path, encoding="utf-8") as fh:
+        new = {r["rows"]: _flatten(r) for r in json.load(fh)["results"]}
+    regressions = 0
+    for rows in sorted(old.keys() & new.keys()):
+        print(f"{rows:,} rows")
+        for metric in sorted(old[rows].keys() & new[rows].keys()):
+            a, b = old[rows][metric], new[rows][metric]
+            if a is None or b is None:
+                continue
+            ratio = b / a if a else float("inf")
+            flag = ""
+            if metric != "peak_rss_mb" and ratio > 1 + tolerance and b - a > 1.0:
+                flag, regressions = "  ⚠ regression", regressions + 1
+            print(f"  {metric:<24} {a:>12,.1f} → {b:>12,.1f}  ({ratio:5.2f}×){flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=list(DEFAULT_ROWS))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="journey_bench.json")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"))
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown before flagging (0.2 = 20%%)")
+    parser.add_argument("--one", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        return 1 if compare(*args.compare, tolerance=args.tolerance) else 0
+    if args.one:
+        print(json.dumps(bench_size(args.one, args.seed)))
+        return 0
+    run(args.rows, args.out, args.seed)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+"""
+Journey Compare - pre-aggregated study cubes
+--------------------------------------------
+Each study is reduced once, at load time, to a ``SummaryCube``:
+
+• ``cells`` — stage × persona × period sums of every weight column
+  (see ``journey_aggregate.weight_columns``); periods are calendar months
+  (``YYYY-MM``) of the touchpoint timestamps
+• ``theme_cells`` — the same sums per theme × stage × persona × period,
+  one contribution per (touchpoint, theme) pair
+• ``handoffs`` — persona → persona hand-off sums (count, Δ sentiment), from
+  the study's ``TransitionMatrix``
+
+Comparisons only touch these small tables, so comparing two 1M-row studies
+costs about the same as comparing two demo studies.  Touchpoints without a
+timestamp fall in the ``UNDATED`` period; every ``period=None`` argument
+means all periods.  Hand-offs span periods, so they are not split by one.
+"""
+
+import numpy as np
+import pandas as pd
+
+from journey_aggregate import grouped_sums, weighted_means
+from journey_themes import STAGE_SLOTS
+
+UNDATED = "Undated"
+CUBE_COLUMNS = ("stage", "persona", "sentiment", "frequency", "confidence")
+
+
+def month_periods(frame):
+    """Categorical ``YYYY-MM`` month of each touchpoint's timestamp (``UNDATED`` without one), in date order."""
+    months = (frame["timestamp"].to_numpy("datetime64[ns]").astype("datetime64[M]") if "timestamp" in frame.columns
+              else np.full(len(frame), np.datetime64("NaT"), dtype="datetime64[M]"))
+    undated = np.isnat(months)
+    labels, codes = np.unique(months[~undated], return_inverse=True)
+    categories = list(np.datetime_as_string(labels, unit="M"))
+    all_codes = np.full(len(frame), len(categories), dtype=np.int64)
+    all_codes[~undated] = codes
+    return pd.Categorical.from_codes(all_codes, categories=categories + [UNDATED] * bool(undated.any()))
+
+
+class SummaryCube:
+    """Compact stage × persona × theme × month sums for one study."""
+
+    def __init__(self, frame, theme_counts, transitions, n_stages, n_personas, key=None):
+        self.key = key
+        narrow = frame[list(CUBE_COLUMNS)].copy()
+        narrow["period"] = month_periods(frame)
+        self.n_rows = len(frame)
+        self.n_cells = max(n_stages * n_personas, 1)
+        self.periods = list(narrow["period"].cat.categories)
+        self.cells = grouped_sums(narrow, ("stage", "persona", "period"))
+
+        theme_ids = theme_counts.pair_key // STAGE_SLOTS
+        pairs = narrow.take(theme_counts.pair_row)
+        pairs["theme"] = pd.Categorical.from_codes(theme_ids, categories=theme_counts.themes)
+        self.theme_cells = grouped_sums(pairs, ("theme", "stage", "persona", "period"))
+
+        names = np.asarray(transitions.personas, dtype=object)
+        self.handoffs = pd.DataFrame(
+            {"n": transitions.handoffs, "delta_sum": transitions.delta_sum},
+            index=pd.MultiIndex.from_arrays([names[transitions.source], names[transitions.target]],
+                                            names=["from_persona", "to_persona"]))
+
+    @property
+    def nbytes(self):
+        return int(sum(t.memory_usage(index=True, deep=True).sum()
+                       for t in (self.cells, self.theme_cells, self.handoffs)))
+
+    def _in_period(self, table, period):
+        if period is None:
+            return table
+        return table[table.index.get_level_values("period") == period]
+
+    def rollup(self, level, period=None):
+        """Cell sums collapsed onto ``"stage"``, ``"persona"`` or ``"period"``."""
+        return self._in_period(self.cells, period).groupby(level=level, observed=True, sort=False).sum()
+
+    def totals(self, period=None):
+        return self._in_period(self.cells, period).sum()
+
+    def avg_sentiment(self, mode, period=None):
+        totals = self.totals(period)
+        return float(totals[f"sw_{mode}"] / totals[f"w_{mode}"]) if totals[f"w_{mode}"] else float("nan")
+
+    def coverage(self, period=None):
+        cells = self._in_period(self.cells, period)
+        observed = cells.index.droplevel("period").unique()
+        return len(observed) / self.n_cells
+
+    def theme_mentions(self, period=None):
+        """Mentions per theme (descending)."""
+        sums = self._in_period(self.theme_cells, period).groupby(level="theme", observed=True).sum()
+        return sums["mentions"].sort_values(ascending=False, kind="stable")
+
+    def handoff_stats(self):
+        """``n, avg_delta`` per (from_persona, to_persona)."""
+        stats = self.handoffs[["n"]].copy()
+        stats["avg_delta"] = self.handoffs["delta_sum"] / self.handoffs["n"].clip(lower=1)
+        return stats
+
+
+# ------------------------------
+# Comparisons (cubes in, small tables out)
+# ------------------------------
+def compare_kpis(cubes, mode, period=None):
+    """One row per study; deltas are against the first (baseline) study."""
+    rows = []
+    for name, cube in cubes.items():
+        totals = cube.totals(period)
+        rows.append({"study": name, "touchpoints": int(totals["n"]), "mentions": int(totals["mentions"]),
+                     "avg_sentiment": cube.avg_sentiment(mode, period), "coverage": cube.coverage(period)})
+    kpis = pd.DataFrame(rows).set_index("study")
+    kpis["Δ sentiment"] = kpis["avg_sentiment"] - kpis["avg_sentiment"].iloc[0]
+    kpis["Δ mentions"] = kpis["mentions"] - kpis["mentions"].iloc[0]
+    return kpis
+
+
+def compare_rollup(cubes, level, mode, period=None):
+    """Long ``study, <level>, avg_sentiment, mentions`` table for grouped bars."""
+    parts = []
+    for name, cube in cubes.items():
+        sums = cube.rollup(level, period)
+        parts.append(pd.DataFrame({"study": name, level: sums.index.astype(str),
+                                   "avg_sentiment": weighted_means(sums, mode).to_numpy(),
+                                   "mentions": sums["mentions"].to_numpy()}))
+    return pd.concat(parts, ignore_index=True)
+
+
+def compare_handoffs(cubes):
+    """Hand-off pairs side by side: avg Δ sentiment and hand-off count per study, plus the shift vs baseline."""
+    names = list(cubes)
+    stats = {name: cube.handoff_stats() for name, cube in cubes.items()}
+    wide = pd.concat({name: s[["avg_delta", "n"]] for name, s in stats.items()}, axis=1)
+    wide.columns = [f"{name} {'Δ' if col == 'avg_delta' else 'hand-offs'}" for name, col in wide.columns]
+    if len(names) > 1:
+        wide["shift"] = wide[f"{names[-1]} Δ"] - wide[f"{names[0]} Δ"]
+    wide = wide.sort_values(f"{names[0]} hand-offs", ascending=False, kind="stable", na_position="last")
+    wide.index = [f"{a} ➜ {b}" for a, b in wide.index]
+    return wide
+
+
+def compare_themes(cubes, top_n=10, period=None):
+    """Share of theme mentions per study for the *top_n* themes across all studies."""
+    shares = pd.concat({name: cube.theme_mentions(period) for name, cube in cubes.items()}, axis=1).fillna(0)
+    shares = shares / shares.sum().replace(0, np.nan)
+    order = shares.sum(axis=1).sort_values(ascending=False, kind="stable").index[:top_n]
+    return shares.loc[order]
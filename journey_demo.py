@@ -0,0 +1,72 @@
+"""
+Journey Demo - the bundled demo study and the shared model factory
+------------------------------------------------------------------
+• ``DEMO_DATA`` / ``DEMO_EVIDENCE`` seed the demo study in the study store
+• ``STAGES`` / ``PERSONAS`` are the demo's journey order; studies that use
+  the same names are laid out in that order, anything else follows in
+  first-seen order
+• ``THEME_MAP_BLUE`` gives demo touchpoints without their own themes a
+  heatmap theme
+• ``build_model`` is the one ``JourneyModel`` factory: the app and the batch
+  reports (journey_report.py) build every study through it, so both show
+  the same views
+"""
+
+from journey_model import JourneyModel
+
+DEMO_DATA = [
+    {"stage": "Discover Need", "persona": "CRO / ERM", "label": "Board pressure to modernize TPRM", "sentiment": 0.18, "frequency": 24, "confidence": 0.80, "emoji": "🙂", "timestamp": "2025-01-14"},
+    {"stage": "Evaluation & RFx", "persona": "TPRM Lead", "label": "Compare questionnaires vs real-time intelligence", "sentiment": -0.10, "frequency": 31, "confidence": 0.78, "emoji": "😐", "timestamp": "2025-02-03"},
+    {"stage": "Approval & Onboarding", "persona": "Procurement Lead", "label": "Accelerate vendor onboarding (Telecom)", "sentiment": 0.62, "frequency": 57, "confidence": 0.86, "emoji": "😄", "timestamp": "2025-03-10"},
+    {"stage": "Continuous Monitoring", "persona": "ERM Director", "label": "Lifecycle monitoring & governance", "sentiment": 0.55, "frequency": 66, "confidence": 0.84, "emoji": "😄", "timestamp": "2025-05-19"},
+    {"stage": "Use — Alerts & Triage", "persona": "Vendor Risk Analyst", "label": "Real-time alerts replace manual checks", "sentiment": 0.48, "frequency": 75, "confidence": 0.82, "emoji": "😄", "timestamp": "2025-06-23"},
+    {"stage": "Reporting & Audit", "persona": "Compliance Officer", "label": "QPRs & risk insight packs", "sentiment": 0.45, "frequency": 29, "confidence": 0.80, "emoji": "😄", "timestamp": "2025-07-28"},
+    {"stage": "Remediation & Supplier Mgmt", "persona": "Procurement Lead", "label": "Scorecards drive consolidation", "sentiment": 0.38, "frequency": 40, "confidence": 0.78, "emoji": "🙂", "timestamp": "2025-09-08"},
+    {"stage": "Onboarding (Healthcare)", "persona": "Procurement Lead", "label": "Eliminate questionnaires for faster onboarding", "sentiment": 0.42, "frequency": 36, "confidence": 0.77, "emoji": "😄", "timestamp": "2025-03-24"},
+    {"stage": "Compliance & Oversight", "persona": "Compliance Officer", "label": "Maintain SOC2 & impress regulators", "sentiment": 0.44, "frequency": 22, "confidence": 0.79, "emoji": "😄", "timestamp": "2025-10-13"},
+    {"stage": "Renewal & Expansion", "persona": "CFO", "label": "Business case: do more with less", "sentiment": 0.50, "frequency": 18, "confidence": 0.75, "emoji": "😄", "timestamp": "2025-12-01"},
+]
+
+# Evidence behind each demo touchpoint (quotes / themes / actions), merged in by label
+DEMO_EVIDENCE = {
+    "Board pressure to modernize TPRM": {"quotes": ["We need external risk intelligence beyond point-in-time assessments."], "themes": ["Move from questionnaires", "Real-time risk"], "actions": ["Assess continuous monitoring vendors"]},
+    "Compare questionnaires vs real-time intelligence": {"quotes": ["Legacy questionnaires go stale and miss dynamic risks."], "themes": ["Legacy process pain", "Evidence-based alerts"], "actions": ["Pilot Supply Wisdom against top vendors"]},
+    "Accelerate vendor onboarding (Telecom)": {"quotes": ["Shifted from point-in-time questionnaires to real-time alerting."], "themes": ["SLA compliance", "Automation"], "actions": ["Embed risk intel into RFx & approvals"]},
+    "Lifecycle monitoring & governance": {"quotes": ["We can manage third-party risk throughout the lifecycle."], "themes": ["External intel", "Geopolitical", "Operational"], "actions": ["Expand scope to Nth-party & location risk"]},
+    "Real-time alerts replace manual checks": {"quotes": ["Actionable data on small private companies, not just the big public ones."], "themes": ["Private vendor coverage", "Negative news"], "actions": ["Automate analyst queue from alerts"]},
+    "QPRs & risk insight packs": {"quotes": ["Reports double as audit artifacts and regulator-ready evidence."], "themes": ["Audit artifacts", "SOC2 support"], "actions": ["Standardize quarterly risk reviews"]},
+    "Scorecards drive consolidation": {"quotes": ["Because of Supply Wisdom, we have our fingertips on the true pulse of our third parties."], "themes": ["Scorecards", "Vendor comparison"], "actions": ["Use scorecards for renewals & discounts"]},
+    "Eliminate questionnaires for faster onboarding": {"quotes": ["Procurement can expedite onboarding without sacrificing risk quality."], "themes": ["Questionnaire alternative", "Time-to-value"], "actions": ["Integrate comprehensive risk intelligence pre-onboarding"]},
+    "Maintain SOC2 & impress regulators": {"quotes": ["Proactive insights helped us avoid potential issues with regulators."], "themes": ["SOC2 evidence", "Cost savings"], "actions": ["Centralize compliance packs"]},
+    "Business case: do more with less": {"quotes": ["We'd have to triple the team to match this impact with old methods."], "themes": ["ROI narrative", "Headcount savings"], "actions": ["Expand monitoring to non-critical vendors"]},
+}
+
+STAGES = [
+    "Discover Need", "Evaluation & RFx", "Approval & Onboarding", "Continuous Monitoring",
+    "Use — Alerts & Triage", "Reporting & Audit", "Remediation & Supplier Mgmt",
+    "Onboarding (Healthcare)", "Compliance & Oversight", "Renewal & Expansion"
+]
+PERSONAS = [
+    "CRO / ERM", "TPRM Lead", "Procurement Lead", "ERM Director",
+    "Vendor Risk Analyst", "Compliance Officer", "CFO"
+]
+
+# ---- Blue heatmap: label → themes for the demo touchpoints
+THEME_MAP_BLUE = {
+    "Business case: do more with less": ["roi narrative", "headcount savings"],
+    "Maintain SOC2 & impress regulators": ["soc2 evidence", "cost savings"],
+    "QPRs & risk insight packs": ["audit artifacts", "cost savings"],
+    "Real-time alerts replace manual checks": ["move from questionnaires", "operational"],
+    "Lifecycle monitoring & governance": ["external intel"],
+    "Eliminate questionnaires for faster onboarding": ["questionnaire alternative"],
+    "Scorecards drive consolidation": ["scorecards", "vendor comparison"],
+    "Accelerate vendor onboarding (Telecom)": ["operational"],
+    "Compare questionnaires vs real-time intelligence": ["move from questionnaires"],
+    "Board pressure to modernize TPRM": ["external intel"],
+}
+
+
+def build_model(frame, key=None):
+    """``JourneyModel`` of a study, with the demo stage / persona order and theme map applied."""
+    return JourneyModel(frame, stage_order=STAGES, persona_order=PERSONAS,
+                        theme_map=THEME_MAP_BLUE, key=key)
@@ -0,0 +1,277 @@
+"""
+Journey Enrich - batched, cached LLM enrichment
+-----------------------------------------------
+Fills sentiment, emoji and themes for touchpoints from their text (label +
+quotes).  Unique texts are hashed; anything already in the on-disk cache is
+reused, the rest is sent in batches of ``batch_size`` items, several batches
+in flight at once under a requests-per-minute limit, with retries and
+exponential backoff.
+
+Clients are pluggable: ``OpenAIEnrichmentClient`` for real runs and
+``StubEnrichmentClient`` (deterministic, keyword based) for offline use.
+A client only needs ``model_id`` and ``async complete(items) -> list[dict]``.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from journey_ingest import EMOJI_SCALE, sentiment_emoji
+
+PROMPT_VERSION = 1
+MAX_THEMES = 3
+
+SYSTEM_PROMPT = (
+    "You label customer-journey touchpoints from B2B third-party-risk interviews. "
+    "For every item return its id, a sentiment score in [-1, 1], one emoji from "
+    f"{' '.join(EMOJI_SCALE)} and up to {MAX_THEMES} short lowercase themes. "
+    'Reply with JSON: {"results": [{"id": ..., "sentiment": ..., "emoji": ..., "themes": [...]}]}'
+)
+
+
+def touchpoint_text(row):
+    quotes = row.get("quotes") or ()
+    return "\n".join([row["label"], *quotes])
+
+
+def content_key(text, model_id):
+    """Cache key: prompt version + model + the exact text that was labelled."""
+    payload = json.dumps([PROMPT_VERSION, model_id, text], ensure_ascii=False)
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+
+def normalize_result(result):
+    """Clamp / coerce one model answer into the touchpoint schema; raises if it can't be."""
+    sentiment = float(result.get("sentiment", 0.0))   # None / "n/a" raise TypeError / ValueError
+    if not np.isfinite(sentiment):
+        raise ValueError(f"sentiment is not a finite number: {sentiment}")
+    sentiment = float(np.clip(sentiment, -1.0, 1.0))
+    emoji = result.get("emoji")
+    if emoji not in EMOJI_SCALE:
+        emoji = sentiment_emoji(sentiment)
+    themes = result.get("themes") or []
+    if isinstance(themes, str):
+        themes = [themes]
+    themes = tuple(str(t).strip().lower() for t in themes if str(t).strip())[:MAX_THEMES]
+    return {"sentiment": sentiment, "emoji": emoji, "themes": themes}
+
+
+# ------------------------------
+# On-disk cache
+# ------------------------------
+class EnrichmentCache:
+    """SQLite key → JSON store; safe to share between threads and processes."""
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with self._connect() as db:
+            db.execute("CREATE TABLE IF NOT EXISTS enrichment (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+
+    @contextmanager
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=30)
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def get_many(self, keys):
+        found = {}
+        keys = list(keys)
+        with self._lock, self._connect() as db:
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                marks = ",".join("?" * len(chunk))
+                for key, value in db.execute(f"SELECT key, value FROM enrichment WHERE key IN ({marks})", chunk):
+                    found[key] = json.loads(value)
+        return found
+
+    def put_many(self, items):
+        with self._lock, self._connect() as db:
+            db.executemany("INSERT OR REPLACE INTO enrichment VALUES (?, ?)",
+                           [(k, json.dumps(v, ensure_ascii=False)) for k, v in items.items()])
+
+
+# ------------------------------
+# Clients
+# ------------------------------
+class OpenAIEnrichmentClient:
+    """Chat-completions client; one request labels a whole batch."""
+
+    def __init__(self, model="gpt-4o-mini", api_key=None):
+        try:
+            from openai import AsyncOpenAI
+        except ImportError as exc:  # pragma: no cover - depends on environment
+            raise RuntimeError("LLM enrichment needs the 'openai' package") from exc
+        self.model_id = model
+        self._client = AsyncOpenAI(api_key=api_key)
+
+    async def complete(self, items):
+        response = await self._client.chat.completions.create(
+            model=self.model_id,
+            response_format={"type": "json_object"},
+            temperature=0,
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": json.dumps({"items": items}, ensure_ascii=False)},
+            ],
+        )
+        results = json.loads(response.choices[0].message.content)["results"]
+        by_id = {str(r.get("id")): r for r in results}
+        missing = [it["id"] for it in items if it["id"] not in by_id]
+        if missing:
+            raise ValueError(f"model skipped {len(missing)} of {len(items)} items")
+        return [by_id[it["id"]] for it in items]
+
+
+_WORD = re.compile(r"[a-z][a-z0-9\-]+")
+_POSITIVE = {"accelerate", "actionable", "avoid", "drive", "expedite", "faster", "helped", "impact",
+             "impress", "improve", "insight", "insights", "modernize", "proactive", "pulse", "real-time",
+             "replace", "save", "savings", "streamline", "win"}
+_NEGATIVE = {"blocked", "delay", "fail", "legacy", "manual", "miss", "pain", "pressure", "risk",
+             "slow", "stale", "struggle", "triple", "worse"}
+_STOPWORDS = {"the", "and", "for", "with", "our", "are", "not", "just", "from", "that", "this",
+              "can", "have", "has", "was", "were", "into", "than", "their", "they", "you", "your", "would"}
+
+
+class StubEnrichmentClient:
+    """Deterministic, offline stand-in: keyword sentiment, most frequent words as themes."""
+
+    model_id = "stub-v1"
+
+    def __init__(self, latency=0.0, fail_every=0):
+        self.latency = latency
+        self.fail_every = fail_every
+        self.calls = 0
+
+    async def complete(self, items):
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.fail_every and self.calls % self.fail_every == 0:
+            raise ConnectionError("stub: simulated transient failure")
+        out = []
+        for it in items:
+            words = _WORD.findall(it["text"].lower())
+            pos = sum(w in _POSITIVE for w in words)
+            neg = sum(w in _NEGATIVE for w in words)
+            sentiment = (pos - neg) / (pos + neg + 1)
+            counts = Counter(w for w in words if len(w) > 3 and w not in _STOPWORDS)
+            themes = [w for w, _ in counts.most_common(2)]
+            out.append({"id": it["id"], "sentiment": round(sentiment, 2), "themes": themes})
+        return out
+
+
+# ------------------------------
+# Pipeline
+# ------------------------------
+class RateLimiter:
+    """Spaces request starts at least ``60 / requests_per_minute`` seconds apart."""
+
+    def __init__(self, requests_per_minute):
+        self.interval = 60.0 / requests_per_minute if requests_per_minute else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+@dataclass
+class EnrichmentStats:
+    unique_texts: int = 0
+    cache_hits: int = 0
+    requests: int = 0
+    retries: int = 0
+    failed_items: int = 0
+    seconds: float = 0.0
+
+
+async def enrich_texts(texts, client, cache, batch_size=25, concurrency=4,
+                       requests_per_minute=120, max_retries=3, backoff=1.0):
+    """Return ``({text: result}, stats)`` for unique *texts*, using and filling *cache*."""
+    start = time.perf_counter()
+    stats = EnrichmentStats(unique_texts=len(texts))
+    keys = {text: content_key(text, client.model_id) for text in texts}
+    cached = cache.get_many(keys.values())
+    results = {t: cached[k] for t, k in keys.items() if k in cached}
+    stats.cache_hits = len(results)
+
+    todo = [t for t in texts if t not in results]
+    batches = [todo[i:i + batch_size] for i in range(0, len(todo), batch_size)]
+    limiter = RateLimiter(requests_per_minute)
+    gate = asyncio.Semaphore(concurrency)
+
+    async def run(batch):
+        items = [{"id": str(i), "text": text} for i, text in enumerate(batch)]
+        async with gate:
+            for attempt in range(max_retries + 1):
+                await limiter.wait()
+                stats.requests += 1
+                try:   # a malformed answer is retried like a failed request
+                    answers = await client.complete(items)
+                    if len(answers) != len(batch):
+                        raise ValueError(f"{len(answers)} answers for {len(batch)} items")
+                    fresh = {text: normalize_result(ans) for text, ans in zip(batch, answers)}
+                    break
+                except Exception:
+                    if attempt == max_retries:
+                        stats.failed_items += len(batch)
+                        return
+                    stats.retries += 1
+                    await asyncio.sleep(backoff * 2 ** attempt * (0.5 + random.random()))
+        cache.put_many({keys[t]: r for t, r in fresh.items()})
+        results.update(fresh)
+
+    await asyncio.gather(*(run(b) for b in batches))
+    stats.seconds = time.perf_counter() - start
+    return results, stats
+
+
+def enrich_frame(frame, client, cache, **options):
+    """
+    Copy of *frame* with sentiment / emoji / themes replaced by enrichment
+    results, plus ``EnrichmentStats``.  Rows whose batch failed keep their
+    original values.
+    """
+    rows = frame[["label", "quotes"]].to_dict("records") if "quotes" in frame else \
+        [{"label": label} for label in frame["label"]]
+    texts = [touchpoint_text(r) for r in rows]
+    unique = list(dict.fromkeys(texts))
+    results, stats = asyncio.run(enrich_texts(unique, client, cache, **options))
+
+    out = frame.copy()
+    found = [results.get(t) for t in texts]
+    hit = np.array([r is not None for r in found], dtype=bool)
+    if hit.any():
+        sentiment = out["sentiment"].to_numpy().copy()
+        sentiment[hit] = [r["sentiment"] for r in found if r is not None]
+        out["sentiment"] = sentiment.astype(np.float32)
+        emoji = out["emoji"].astype(object).to_numpy()
+        emoji[hit] = [r["emoji"] for r in found if r is not None]
+        out["emoji"] = pd.Categorical(emoji)
+        themes = out["themes"].tolist() if "themes" in out else [()] * len(out)
+        for i in np.flatnonzero(hit):
+            themes[i] = tuple(found[i]["themes"])   # cached answers come back from JSON as lists
+        out["themes"] = pd.Series(themes, index=out.index, dtype=object)
+    return out, stats
@@ -0,0 +1,168 @@
+"""
+Journey Export - chunked file export + background PNG rendering
+---------------------------------------------------------------
+Tables are encoded ``CHUNK_ROWS`` rows at a time, so a 1M-row study never
+exists as one giant CSV / JSON string:
+
+• ``iter_csv`` / ``iter_json`` / ``iter_jsonl`` yield encoded byte chunks
+• ``write_parquet`` writes one Parquet row group per chunk
+• ``write_export`` spools any format to a file (atomically, reused by name);
+  with ``max_bytes`` the spool directory is kept under that size by
+  deleting the least recently used exports (``prune_spool``)
+
+PNG export runs ``render_png`` in a worker process (see ``png_executor`` in
+Journey.py) so Kaleido / Chrome never block the UI thread.  It needs the
+optional ``kaleido`` package.
+"""
+
+import importlib.util
+import os
+import time
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+CHUNK_ROWS = 50_000
+LIST_SEPARATOR = " | "   # list fields (quotes / themes / actions) in CSV cells
+
+EXPORT_FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "JSON": ("json", "application/json"),
+    "JSON Lines": ("jsonl", "application/x-ndjson"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+}
+
+
+def iter_chunks(frame, chunk_rows=CHUNK_ROWS):
+    for start in range(0, max(len(frame), 1), chunk_rows):
+        yield start, frame.iloc[start:start + chunk_rows]
+
+
+def _flat(chunk):
+    """CSV-friendly copy: list fields joined into one cell."""
+    lists = [c for c in chunk.columns if chunk[c].dtype == object
+             and len(chunk) and isinstance(chunk[c].iloc[0], (list, tuple))]
+    if not lists:
+        return chunk
+    return chunk.assign(**{c: chunk[c].map(lambda v: LIST_SEPARATOR.join(v or ())) for c in lists})
+
+
+def iter_csv(frame, chunk_rows=CHUNK_ROWS):
+    for start, chunk in iter_chunks(frame, chunk_rows):
+        yield _flat(chunk).to_csv(index=False, header=start == 0).encode()
+
+
+def iter_jsonl(frame, chunk_rows=CHUNK_ROWS):
+    for _, chunk in iter_chunks(frame, chunk_rows):
+        if len(chunk):
+            yield chunk.to_json(orient="records", lines=True, force_ascii=False, date_format="iso").encode()
+
+
+def iter_json(frame, chunk_rows=CHUNK_ROWS):
+    """One JSON array, streamed as the records of each chunk."""
+    yield b"["
+    first = True
+    for _, chunk in iter_chunks(frame, chunk_rows):
+        if not len(chunk):
+            continue
+        records = chunk.to_json(orient="records", force_ascii=False, date_format="iso")[1:-1]
+        yield (records if first else "," + records).encode()
+        first = False
+    yield b"]"
+
+
+def write_parquet(frame, sink, chunk_rows=CHUNK_ROWS):
+    """One row group per chunk; categoricals are kept as dictionary columns."""
+    writer = schema = None
+    for _, chunk in iter_chunks(frame, chunk_rows):
+        if schema is None:
+            schema = _settle(pa.Schema.from_pandas(chunk, preserve_index=False))
+            writer = pq.ParquetWriter(sink, schema)
+        writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+    writer.close()
+
+
+def _settle(schema):
+    """Give all-empty / all-null columns of the first chunk a concrete (string) type."""
+    for i, field in enumerate(schema):
+        if pa.types.is_null(field.type):
+            schema = schema.set(i, field.with_type(pa.string()))
+        elif pa.types.is_list(field.type) and pa.types.is_null(field.type.value_type):
+            schema = schema.set(i, field.with_type(pa.list_(pa.string())))
+    return schema
+
+
+_ENCODERS = {"CSV": iter_csv, "JSON": iter_json, "JSON Lines": iter_jsonl}
+
+
+def write_export(frame, fmt, path, chunk_rows=CHUNK_ROWS, max_bytes=None):
+    """
+    Write *frame* as *fmt* to *path* (reused if it already exists); returns
+    its size in bytes.  With *max_bytes*, older exports in the same
+    directory are then pruned to fit (see ``prune_spool``).
+    """
+    if os.path.exists(path):
+        os.utime(path)   # mark as recently used
+    else:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.part"
+        if fmt == "Parquet":
+            write_parquet(frame, tmp, chunk_rows)
+        else:
+            with open(tmp, "wb") as fh:
+                for block in _ENCODERS[fmt](frame, chunk_rows):
+                    fh.write(block)
+        os.replace(tmp, path)
+    if max_bytes is not None:
+        prune_spool(os.path.dirname(os.path.abspath(path)), max_bytes, keep=path)
+    return os.path.getsize(path)
+
+
+def prune_spool(directory, max_bytes, keep=None, stale_part_seconds=3600):
+    """
+    Delete the least recently used files in *directory* until the rest fit
+    in *max_bytes*; *keep* (the export just served) is never deleted.
+    ``.part`` files of unfinished writes only count once they are older
+    than *stale_part_seconds*.  Returns the number of bytes freed.
+    """
+    keep = os.path.abspath(keep) if keep else None
+    now = time.time()
+    files = []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:   # removed by another session meanwhile
+                continue
+            if not entry.is_file() or os.path.abspath(entry.path) == keep:
+                continue
+            if entry.name.endswith(".part") and now - stat.st_mtime < stale_part_seconds:
+                continue
+            files.append((stat.st_mtime, stat.st_size, entry.path))
+    total = sum(size for _, size, _ in files) + (os.path.getsize(keep) if keep and os.path.exists(keep) else 0)
+    freed = 0
+    for _, size, file_path in sorted(files):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(file_path)
+        except FileNotFoundError:
+            pass
+        total -= size
+        freed += size
+    return freed
+
+
+# ------------------------------
+# PNG (worker process)
+# ------------------------------
+def png_supported():
+    return importlib.util.find_spec("kaleido") is not None
+
+
+def render_png(figure_json, width=1400, scale=2):
+    """Plotly figure JSON → PNG bytes.  Runs in a worker process."""
+    import plotly.io as pio
+
+    fig = pio.from_json(figure_json)
+    return fig.to_image(format="png", width=width, height=fig.layout.height or 600, scale=scale)
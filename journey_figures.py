@@ -0,0 +1,301 @@
+"""
+Journey Figures - Plotly builders + a byte-budgeted figure cache
+----------------------------------------------------------------
+Every chart in the app is built by a function here from a JourneyModel and
+the parameters that affect it.  ``FigureCache`` keeps built figures together
+with their serialized JSON, keyed by dataset hash + figure name + parameters,
+and evicts least-recently-used entries once the byte budget is exceeded.
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+from journey_handoffs import OTHER
+
+PLOTLY_CONFIG = {"displayModeBar": False}
+OTHER_COLOR = "rgba(190,190,190,0.35)"   # Sankey links folded into the "Other" bucket
+
+
+# ------------------------------
+# Figure cache
+# ------------------------------
+def _freeze(value):
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    return value
+
+
+class CachedFigure:
+    __slots__ = ("figure", "json", "nbytes")
+
+    def __init__(self, figure):
+        self.figure = figure
+        self.json = figure.to_json()
+        self.nbytes = len(self.json.encode())
+
+
+class FigureCache:
+    """Thread-safe LRU of ``CachedFigure`` entries bounded by total JSON bytes."""
+
+    def __init__(self, max_bytes=64 * 2**20):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def key(dataset_key, name, **params):
+        return (dataset_key, name, _freeze(params))
+
+    def get(self, key, build):
+        """Return the cached entry for *key*, building (and caching) it on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+        entry = CachedFigure(build())
+        if entry.nbytes > self.max_bytes:
+            return entry
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = entry
+                self.nbytes += entry.nbytes
+            while self.nbytes > self.max_bytes:
+                _, old = self._entries.popitem(last=False)
+                self.nbytes -= old.nbytes
+        return entry
+
+    def peek(self, key):
+        """The cached entry for *key* or ``None``; never builds, not counted as a hit."""
+        with self._lock:
+            return self._entries.get(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+
+# ------------------------------
+# Builders
+# ------------------------------
+def swimlane_figure(df, stages, lanes, cluster_mode=True, use_webgl=False, show_colorbar=False):
+    """Journey swim-lane bubble chart for positioned touchpoints or clusters."""
+    fig = px.scatter(
+        df,
+        x="x", y="y",
+        size="frequency",
+        color="sentiment",
+        hover_data={"stage": False, "persona": False, "sentiment": False, "frequency": False, "x": False, "y": False},
+        color_continuous_scale="RdYlGn",
+        color_continuous_midpoint=0,
+        range_color=[-1, 1],
+        size_max=45 if cluster_mode else 55,
+        opacity=0.88 if cluster_mode else 0.95,
+        render_mode="webgl" if use_webgl else "svg",
+    )
+
+    # Centered emoji + clean hover (emoji text is skipped in WebGL mode)
+    fig.update_traces(
+        mode="markers" if use_webgl else "markers+text",
+        text=df["emoji"],
+        textposition="middle center",
+        marker=dict(line=dict(width=1, color="rgba(0,0,0,0.35)"))
+    )
+    # hover reads per-point values the trace already carries (marker colour = sentiment,
+    # marker size = frequency, text = emoji); customdata only adds the stage / persona names
+    fig.update_traces(
+        hovertext=df["label"],
+        customdata=np.column_stack([df["stage"].to_numpy(dtype=object), df["persona"].to_numpy(dtype=object)]),
+        hovertemplate=(
+            "<b>%{hovertext}</b><br>"
+            "Stage: %{customdata[0]}<br>"
+            "Persona: %{customdata[1]}<br>"
+            "Sentiment: %{marker.color:.2f} %{text}<br>"
+            "Frequency: %{marker.size:,} mentions"
+            "<extra></extra>"
+        )
+    )
+
+    # Swim-lane backgrounds + dotted stage separators
+    shapes = []
+    for i in range(len(lanes)):
+        shapes.append(dict(
+            type="rect", xref="x", yref="y",
+            x0=-0.5, x1=len(stages)-0.5,
+            y0=i-0.45, y1=i+0.45,
+            fillcolor="rgba(0,0,0,0.03)" if i % 2 == 0 else "rgba(0,0,0,0.06)",
+            line=dict(width=0), layer="below"
+        ))
+    for i in range(len(stages)):
+        shapes.append(dict(
+            type="line", x0=i, x1=i, y0=-0.5, y1=len(lanes)-0.5, xref="x", yref="y",
+            line=dict(color="rgba(0,0,0,0.18)", width=1, dash="dot"), layer="below"
+        ))
+
+    fig.update_layout(
+        shapes=shapes,
+        xaxis=dict(tickmode="array", tickvals=list(range(len(stages))), ticktext=stages,
+                   range=[-0.5, len(stages)-0.5], title=None, tickangle=-45, zeroline=False, showgrid=False),
+        yaxis=dict(tickmode="array", tickvals=list(range(len(lanes))), ticktext=lanes,
+                   range=[-0.5, len(lanes)-0.5], title=None, zeroline=False, showgrid=False),
+        height=520, showlegend=False, margin=dict(l=160, r=30, t=20, b=120),
+        plot_bgcolor="white", paper_bgcolor="white", hoverlabel=dict(bgcolor="white")
+    )
+    if not show_colorbar:
+        fig.update_coloraxes(showscale=False)
+    return fig
+
+
+def theme_heatmap(mat):
+    """Blue theme × stage heatmap from a (themes × stages) count matrix."""
+    z = mat.values
+    vmax = float(z.max()) if z.size else 1.0
+
+    heat = go.Figure(data=go.Heatmap(
+        z=z, x=mat.columns, y=mat.index,
+        zmin=0, zmax=vmax, colorscale="Blues",
+        colorbar=dict(title="Mentions"),
+        hovertemplate="<b>%{y}</b><br>Stage: %{x}<br>Mentions: %{z}<extra></extra>",
+    ))
+    heat.update_layout(
+        xaxis=dict(title=None, tickangle=-35, tickfont=dict(color="#6B7280"), showgrid=False, zeroline=False),
+        yaxis=dict(title=None, tickfont=dict(color="#6B7280"), showgrid=False, zeroline=False, autorange="reversed"),
+        margin=dict(l=170, r=40, t=10, b=110),
+        height=460, paper_bgcolor="white", plot_bgcolor="rgba(218, 238, 255, 0.35)",
+    )
+    return heat
+
+
+def stage_health_bar(stage_stats):
+    fig_stage = px.bar(stage_stats, x="avg_sentiment", y="stage",
+                       orientation="h", range_x=[-0.2, 1.0],
+                       color="avg_sentiment", color_continuous_scale="RdYlGn",
+                       labels={"avg_sentiment": "Avg Sentiment", "stage": ""})
+    fig_stage.update_layout(height=360, margin=dict(l=10, r=10, t=10, b=10),
+                            coloraxis_showscale=False)
+    fig_stage.add_vline(x=0.40, line_dash="dash", line_color="gray", opacity=0.7)
+    return fig_stage
+
+
+def persona_engagement_bar(persona_agg):
+    fig_pers = px.bar(persona_agg, x="total_mentions", y="persona",
+                      color="avg_sentiment", color_continuous_scale="RdYlGn",
+                      orientation="h", labels={"total_mentions": "Mentions", "persona": ""})
+    fig_pers.update_layout(height=360, margin=dict(l=10, r=10, t=10, b=10),
+                           coloraxis_showscale=False)
+    return fig_pers
+
+
+def opportunity_quadrant(df, sent_threshold=0.30):
+    """Mentions vs sentiment scatter with the four labelled quadrants."""
+    med_freq = df["frequency"].median()
+    fig_sc = px.scatter(
+        df, x="frequency", y="sentiment",
+        size="frequency", color="sentiment", color_continuous_scale="RdYlGn",
+        hover_name="label", text=df["persona"],
+        size_max=38, range_y=[-0.2, 1.0]
+    )
+    fig_sc.update_traces(textposition="top center",
+                         hovertemplate="<b>%{hovertext}</b><br>Mentions: %{x}<br>Sentiment: %{y:.2f}<extra></extra>")
+    fig_sc.add_hline(y=sent_threshold, line_dash="dash", line_color="gray", opacity=0.6)
+    fig_sc.add_vline(x=med_freq, line_dash="dash", line_color="gray", opacity=0.6)
+    fig_sc.add_annotation(x=med_freq*0.5, y=sent_threshold+0.5, text="Leverage", showarrow=False, opacity=0.7)
+    fig_sc.add_annotation(x=med_freq*0.5, y=sent_threshold-0.15, text="Fix first", showarrow=False, opacity=0.7)
+    fig_sc.add_annotation(x=med_freq*1.5, y=sent_threshold+0.5, text="Activate", showarrow=False, opacity=0.7)
+    fig_sc.add_annotation(x=med_freq*1.5, y=sent_threshold-0.15, text="Low impact", showarrow=False, opacity=0.7)
+    fig_sc.update_layout(height=420, margin=dict(l=10, r=10, t=10, b=10), coloraxis_showscale=False)
+    return fig_sc
+
+
+def delta_color(d):
+    if d < -0.05:
+        return "rgba(198,45,40,0.60)"   # red
+    if d >  0.05:
+        return "rgba(68,170,68,0.60)"   # green
+    return "rgba(140,140,140,0.45)"     # grey
+
+
+def handoff_sankey(df_t):
+    """
+    Persona → persona Sankey from transition-matrix rows (e.g. ``top``):
+    senders on the left, receivers on the right (so A → B → A cannot loop),
+    links sized by hand-offs and coloured by average sentiment change.
+    """
+    senders = list(pd.unique(df_t["from_persona"]))
+    receivers = list(pd.unique(df_t["to_persona"]))
+    source_id = {p: i for i, p in enumerate(senders)}
+    target_id = {p: len(senders) + i for i, p in enumerate(receivers)}
+
+    sankey = go.Figure(go.Sankey(
+        arrangement="snap",
+        node=dict(label=senders + receivers, pad=18, thickness=15, color="rgba(0,0,0,0.35)"),
+        link=dict(
+            source=df_t["from_persona"].map(source_id).to_numpy(np.int32),
+            target=df_t["to_persona"].map(target_id).to_numpy(np.int32),
+            value=df_t["handoffs"].to_numpy(np.float64),
+            color=[delta_color(d) if p != OTHER else OTHER_COLOR
+                   for d, p in zip(df_t["sentiment_delta"], df_t["to_persona"])],
+            customdata=df_t[["sentiment_delta", "share"]].to_numpy(np.float32),
+            hovertemplate=(
+                "%{source.label} ➜ %{target.label}<br>"
+                "Hand-offs: %{value:,} (%{customdata[1]:.0%} of the sender's)<br>"
+                "Avg Δ sentiment: %{customdata[0]:+.2f}<extra></extra>"
+            )
+        )
+    ))
+    sankey.update_layout(
+        height=420, margin=dict(l=10, r=10, t=10, b=10),
+        plot_bgcolor="white", paper_bgcolor="white"
+    )
+    return sankey
+
+
+def sentiment_over_time(df, split=None):
+    """Weighted sentiment per period (one line per *split* value) over mention bars."""
+    fig = go.Figure()
+    if split is None:
+        fig.add_bar(x=df["period"], y=df["mentions"], name="Mentions", yaxis="y2",
+                    marker_color="rgba(59,130,246,0.25)",
+                    hovertemplate="%{x|%Y-%m-%d}<br>Mentions: %{y:,}<extra></extra>")
+        groups = [("Avg sentiment", df)]
+    else:
+        groups = [(str(name), g) for name, g in df.groupby(split, observed=True, sort=False)]
+    for name, g in groups:
+        fig.add_scatter(x=g["period"], y=g["avg_sentiment"], mode="lines+markers", name=name,
+                        customdata=g[["mentions"]],
+                        hovertemplate=f"<b>{name}</b><br>%{{x|%Y-%m-%d}}<br>Sentiment: %{{y:.2f}}"
+                                      "<br>Mentions: %{customdata[0]:,}<extra></extra>")
+    fig.add_hline(y=0, line_dash="dot", line_color="gray", opacity=0.5)
+    fig.update_layout(
+        height=380, margin=dict(l=10, r=10, t=10, b=10), hovermode="closest",
+        yaxis=dict(title="Avg Sentiment", range=[-1, 1]),
+        yaxis2=dict(title="Mentions", overlaying="y", side="right", showgrid=False),
+        legend=dict(orientation="h", yanchor="bottom", y=1.0, x=0),
+        plot_bgcolor="white", paper_bgcolor="white",
+    )
+    return fig
+
+
+def compare_bars(df, category, value, label):
+    """Grouped horizontal bars, one bar per study within each *category* value."""
+    fig = px.bar(df, x=value, y=category, color="study", barmode="group", orientation="h",
+                 labels={value: label, category: "", "study": ""})
+    fig.update_layout(height=max(360, 28 * df[category].nunique() * df["study"].nunique() ** 0.5),
+                      margin=dict(l=10, r=10, t=10, b=10),
+                      legend=dict(orientation="h", yanchor="bottom", y=1.0, x=0))
+    return fig
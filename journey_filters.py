@@ -0,0 +1,123 @@
+"""
+Journey Filters - bitmap-indexed sidebar filtering
+--------------------------------------------------
+Built once per dataset:
+
+• one packed bitmap (``np.packbits``) per value of each categorical column
+  (persona, stage, industry) and per sentiment band (the emoji scale)
+• a sorted index (argsort + sorted values) for numeric ranges (confidence,
+  timestamp — rows without a timestamp never match a date range)
+
+A filter combination is then a handful of OR / AND operations over packed
+uint8 arrays (n / 8 bytes each) and a single unpack at the end.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from journey_ingest import EMOJI_SCALE, sentiment_band
+
+CATEGORY_COLUMNS = ("persona", "stage", "industry")
+
+
+@dataclass(frozen=True)
+class FilterSpec:
+    """Hashable filter selection; ``None`` means "no constraint"."""
+    personas: tuple = None
+    stages: tuple = None
+    industries: tuple = None
+    min_confidence: float = None
+    bands: tuple = None          # (lo, hi) indexes into EMOJI_SCALE, inclusive
+    dates: tuple = None          # (start, end) datetime64[ns] timestamps, inclusive
+
+    @property
+    def is_empty(self):
+        return all(v is None for v in (self.personas, self.stages, self.industries,
+                                       self.min_confidence, self.bands, self.dates))
+
+
+class FilterIndex:
+    """Per-value bitmaps + sorted numeric indexes over one touchpoint frame."""
+
+    def __init__(self, frame):
+        self.n = len(frame)
+        self.categories = {}
+        self._bitmaps = {}
+        for col in CATEGORY_COLUMNS:
+            if col in frame.columns:
+                codes = frame[col].cat.codes.to_numpy()
+                self.categories[col] = list(frame[col].cat.categories)
+                self._bitmaps[col] = self._value_bitmaps(codes, len(self.categories[col]))
+        self._bitmaps["band"] = self._value_bitmaps(sentiment_band(frame["sentiment"].to_numpy()), len(EMOJI_SCALE))
+        confidence = frame["confidence"].to_numpy()
+        self._conf_order = np.argsort(confidence, kind="stable")
+        self._conf_sorted = confidence[self._conf_order]
+        stamps = frame["timestamp"].to_numpy() if "timestamp" in frame.columns else np.empty(0, "datetime64[ns]")
+        self._time_order = np.flatnonzero(~np.isnat(stamps))
+        self._time_order = self._time_order[np.argsort(stamps[self._time_order], kind="stable")]
+        self._time_sorted = stamps[self._time_order]
+        self._all = np.packbits(np.ones(self.n, dtype=bool))
+        self._none = np.zeros_like(self._all)
+
+    def _value_bitmaps(self, codes, n_values):
+        order = np.argsort(codes, kind="stable")
+        bounds = np.searchsorted(codes[order], np.arange(n_values + 1))
+        bitmaps = []
+        for k in range(n_values):
+            bits = np.zeros(self.n, dtype=bool)
+            bits[order[bounds[k]:bounds[k + 1]]] = True
+            bitmaps.append(np.packbits(bits))
+        return bitmaps
+
+    def any_of(self, col, values):
+        """Packed bitmap of rows whose *col* is one of *values*."""
+        lookup = {v: i for i, v in enumerate(self.categories[col])}
+        bits = self._none.copy()
+        for value in values:
+            if value in lookup:
+                bits |= self._bitmaps[col][lookup[value]]
+        return bits
+
+    def bands(self, lo, hi):
+        bits = self._none.copy()
+        for band in range(lo, hi + 1):
+            bits |= self._bitmaps["band"][band]
+        return bits
+
+    def at_least_confidence(self, threshold):
+        start = np.searchsorted(self._conf_sorted, np.asarray(threshold, dtype=self._conf_sorted.dtype))
+        bits = np.zeros(self.n, dtype=bool)
+        bits[self._conf_order[start:]] = True
+        return np.packbits(bits)
+
+    @property
+    def time_span(self):
+        """``(first, last)`` timestamp, or ``None`` when no row has one."""
+        if not len(self._time_sorted):
+            return None
+        return self._time_sorted[0], self._time_sorted[-1]
+
+    def between(self, start, end):
+        lo = np.searchsorted(self._time_sorted, np.datetime64(start, "ns"), side="left")
+        hi = np.searchsorted(self._time_sorted, np.datetime64(end, "ns"), side="right")
+        bits = np.zeros(self.n, dtype=bool)
+        bits[self._time_order[lo:hi]] = True
+        return np.packbits(bits)
+
+    def select(self, spec):
+        """Boolean row mask for a ``FilterSpec``."""
+        bits = self._all.copy()
+        if spec.personas is not None:
+            bits &= self.any_of("persona", spec.personas)
+        if spec.stages is not None:
+            bits &= self.any_of("stage", spec.stages)
+        if spec.industries is not None and "industry" in self.categories:
+            bits &= self.any_of("industry", spec.industries)
+        if spec.bands is not None:
+            bits &= self.bands(*spec.bands)
+        if spec.min_confidence is not None:
+            bits &= self.at_least_confidence(spec.min_confidence)
+        if spec.dates is not None:
+            bits &= self.between(*spec.dates)
+        return np.unpackbits(bits, count=self.n).astype(bool)
@@ -0,0 +1,246 @@
+"""
+Journey Hand-offs - per-account persona transitions
+---------------------------------------------------
+Every account's touchpoints are its own journey, ordered by stage or by
+timestamp (ties keep row order), and each consecutive pair within an
+account is a hand-off from one persona to the next.  Rows without an
+account form one shared journey, so studies without an ``account`` column
+behave as a single global sequence.
+
+• ``HandoffEdges`` holds the touchpoints as id arrays.  The stage order is
+  kept as a sorted array of ``(account, stage)`` keys: appended rows are
+  spliced in with one ``np.insert`` instead of re-sorting.  The timestamp
+  order (dated rows only) is one ``np.lexsort``, redone lazily after ``add``
+• ``transitions`` derives every hand-off with shifted-array arithmetic:
+  positions ``i`` and ``i + 1`` of the order, kept where the account matches
+• ``TransitionMatrix`` aggregates them into sparse persona → persona cells
+  (hand-offs, accounts, share of the source persona's hand-offs, mean
+  Δ sentiment, mean confidence); the Sankey, KPIs and tables read it, and
+  ``top`` prunes it to the busiest cells plus an ``OTHER`` bucket per sender
+"""
+
+import numpy as np
+import pandas as pd
+
+HANDOFF_ORDERS = {"Stage": "stage", "Timestamp": "timestamp"}
+HANDOFF_COLUMNS = ["account", "from_persona", "to_persona", "from_stage", "to_stage",
+                   "sentiment_delta", "confidence_avg"]
+TRANSITION_COLUMNS = ["from_persona", "to_persona", "handoffs", "accounts", "share",
+                      "sentiment_delta", "confidence"]
+
+OTHER = "Other"                 # receiver of the links pruned by ``TransitionMatrix.top``
+_NAT = np.iinfo(np.int64).min   # datetime64 NaT as int64
+_STAGE_BITS = 32                # stage key = (account + 1) << _STAGE_BITS | stage
+
+
+def _distinct(values):
+    """Sorted distinct values (a plain sort + neighbour compare; cheaper than ``np.unique`` here)."""
+    values = np.sort(values)
+    return values[np.concatenate([[True], values[1:] != values[:-1]])] if len(values) else values
+
+
+class TransitionMatrix:
+    """Sparse persona → persona hand-off matrix: only observed cells are stored."""
+
+    def __init__(self, personas, source, target, account, delta, confidence):
+        self.personas = list(personas)
+        n = max(len(self.personas), 1)
+        keys, inverse = np.unique(source * n + target, return_inverse=True)
+        self.source, self.target = keys // n, keys % n
+        self.handoffs = np.bincount(inverse, minlength=len(keys))
+        self.delta_sum = np.bincount(inverse, weights=delta, minlength=len(keys))
+        self.confidence_sum = np.bincount(inverse, weights=confidence, minlength=len(keys))
+        # distinct accounts per cell: distinct (cell, account) pairs, counted per cell
+        account = account + 1   # no-account rows (-1) are one journey of their own
+        stride = int(account.max()) + 1 if len(account) else 1
+        self.accounts = np.bincount(_distinct(inverse * stride + account) // stride, minlength=len(keys))
+        self.n_accounts = len(_distinct(account))
+
+    def __len__(self):
+        """Number of non-empty persona → persona cells."""
+        return len(self.handoffs)
+
+    @property
+    def total(self):
+        return int(self.handoffs.sum())
+
+    @property
+    def avg_delta(self):
+        """Mean Δ sentiment over all hand-offs."""
+        return float(self.delta_sum.sum() / self.total) if self.total else float("nan")
+
+    def frame(self):
+        """One row per observed cell (see ``TRANSITION_COLUMNS``)."""
+        names = np.asarray(self.personas, dtype=object)
+        outgoing = np.bincount(self.source, weights=self.handoffs, minlength=len(self.personas))
+        return pd.DataFrame({
+            "from_persona": names[self.source],
+            "to_persona": names[self.target],
+            "handoffs": self.handoffs,
+            "accounts": self.accounts,
+            "share": self.handoffs / outgoing[self.source] if len(self) else np.empty(0),
+            "sentiment_delta": self.delta_sum / self.handoffs,
+            "confidence": self.confidence_sum / self.handoffs,
+        }, columns=TRANSITION_COLUMNS)
+
+    def top(self, k):
+        """
+        ``frame`` of the *k* busiest cells; the rest are folded into one
+        sender → ``OTHER`` row per sender (accounts unknown, so NaN), so
+        every sender keeps its total.
+        """
+        frame = self.frame()
+        if len(frame) <= k:
+            return frame
+        keep = np.zeros(len(frame), dtype=bool)
+        keep[np.argsort(-self.handoffs, kind="stable")[:k]] = True
+        rest = frame[~keep]
+        sums = pd.DataFrame({"handoffs": rest["handoffs"], "share": rest["share"],
+                             "delta_sum": self.delta_sum[~keep], "confidence_sum": self.confidence_sum[~keep]}
+                            ).groupby(rest["from_persona"].to_numpy(), sort=False).sum()
+        other = pd.DataFrame({
+            "from_persona": sums.index.to_numpy(dtype=object),
+            "to_persona": OTHER,
+            "handoffs": sums["handoffs"].to_numpy(),
+            "accounts": np.nan,
+            "share": sums["share"].to_numpy(),
+            "sentiment_delta": (sums["delta_sum"] / sums["handoffs"]).to_numpy(),
+            "confidence": (sums["confidence_sum"] / sums["handoffs"]).to_numpy(),
+        }, columns=TRANSITION_COLUMNS)
+        return pd.concat([frame[keep], other], ignore_index=True)
+
+
+class HandoffEdges:
+    """Per-account touchpoint orders; consecutive rows of one account are hand-offs."""
+
+    def __init__(self, frame, stages):
+        self.stages, self._stage_ids = [], {}
+        self.personas, self._persona_ids = [], {}
+        self.accounts, self._account_ids = [], {}
+        self.n_rows = 0
+        self.n_dated = 0
+        self._stage_order = np.empty(0, dtype=np.int64)   # row ids sorted by (account, stage)
+        self._stage_key = np.empty(0, dtype=np.int64)     # their sort keys
+        self._orders = {}                                 # lazily built orders (timestamp)
+        self.account = np.empty(0, dtype=np.int64)        # -1 = no account
+        self.stage = np.empty(0, dtype=np.int64)
+        self.persona = np.empty(0, dtype=np.int64)
+        self.timestamp = np.empty(0, dtype=np.int64)      # ns since the epoch, ``_NAT`` if undated
+        self.sentiment = np.empty(0, dtype=np.float64)
+        self.confidence = np.empty(0, dtype=np.float64)
+        self.add(frame, stages)
+
+    def __len__(self):
+        """Number of stage-ordered hand-offs."""
+        return len(self.transitions("stage")[0])
+
+    @staticmethod
+    def _ids(column, ids, names):
+        """Ids of a (categorical) column's values in *names*; unseen values are appended, missing ones are -1."""
+        column = pd.Categorical(column)
+        for v in column.categories:
+            if v not in ids:
+                ids[v] = len(names)
+                names.append(v)
+        lookup = np.array([ids[v] for v in column.categories] + [-1], dtype=np.int64)
+        return lookup[column.codes]   # code -1 picks the trailing -1
+
+    def copy(self):
+        """Independent edges to ``add`` to (arrays are replaced on add, so they are shared)."""
+        dup = HandoffEdges.__new__(HandoffEdges)
+        dup.__dict__.update(self.__dict__)
+        dup.stages, dup._stage_ids = list(self.stages), dict(self._stage_ids)
+        dup.personas, dup._persona_ids = list(self.personas), dict(self._persona_ids)
+        dup.accounts, dup._account_ids = list(self.accounts), dict(self._account_ids)
+        dup._orders = dict(self._orders)
+        return dup
+
+    def subset(self, mask):
+        """New edges over only the rows where *mask* is True (rows renumbered, orders kept)."""
+        mask = np.asarray(mask, dtype=bool)
+        sub = self.copy()
+        keep = mask[self._stage_order]
+        sub._stage_order = (np.cumsum(mask) - 1)[self._stage_order[keep]]
+        sub._stage_key = self._stage_key[keep]
+        sub._orders = {}
+        for name in ("account", "stage", "persona", "timestamp", "sentiment", "confidence"):
+            setattr(sub, name, getattr(self, name)[mask])
+        sub.n_rows = int(mask.sum())
+        sub.n_dated = int((sub.timestamp != _NAT).sum())
+        return sub
+
+    def add(self, frame, stages=()):
+        """
+        Add touchpoints appended to the frame (rows ``n_rows..``); *stages*
+        places stages first seen in *frame* (default: after the known ones,
+        in category order).
+        """
+        for s in stages:
+            self._stage_ids.setdefault(s, len(self.stages))
+            if len(self.stages) < len(self._stage_ids):
+                self.stages.append(s)
+        if not len(frame):
+            return self
+        n = len(frame)
+        stage = self._ids(frame["stage"], self._stage_ids, self.stages)
+        account = (self._ids(frame["account"], self._account_ids, self.accounts) if "account" in frame.columns
+                   else np.full(n, -1, dtype=np.int64))
+        timestamp = (frame["timestamp"].to_numpy("datetime64[ns]").view(np.int64) if "timestamp" in frame.columns
+                     else np.full(n, _NAT, dtype=np.int64))
+
+        key = (account + 1) << _STAGE_BITS | stage
+        by_key = np.argsort(key, kind="stable")
+        at = np.searchsorted(self._stage_key, key[by_key], side="right")
+        self._stage_order = np.insert(self._stage_order, at, self.n_rows + by_key)
+        self._stage_key = np.insert(self._stage_key, at, key[by_key])
+        self._orders = {}
+
+        self.account = np.concatenate([self.account, account])
+        self.stage = np.concatenate([self.stage, stage])
+        self.persona = np.concatenate([self.persona, self._ids(frame["persona"], self._persona_ids, self.personas)])
+        self.timestamp = np.concatenate([self.timestamp, timestamp])
+        self.sentiment = np.concatenate([self.sentiment, frame["sentiment"].to_numpy(np.float64)])
+        self.confidence = np.concatenate([self.confidence, frame["confidence"].to_numpy(np.float64)])
+        self.n_rows += n
+        self.n_dated += int((timestamp != _NAT).sum())
+        return self
+
+    def order(self, by="stage"):
+        """Row ids grouped by account, then ordered by ``"stage"`` or ``"timestamp"`` (dated rows only)."""
+        if by == "stage":
+            return self._stage_order
+        if by != "timestamp":
+            raise ValueError(f"unknown hand-off order {by!r}")
+        order = self._orders.get(by)
+        if order is None:
+            dated = np.flatnonzero(self.timestamp != _NAT)
+            order = dated[np.lexsort((self.stage[dated], self.timestamp[dated], self.account[dated]))]
+            self._orders[by] = order
+        return order
+
+    def transitions(self, by="stage"):
+        """``(from_rows, to_rows)`` of every hand-off: neighbours in the order within one account."""
+        order = self.order(by)
+        a, b = order[:-1], order[1:]
+        same = self.account[a] == self.account[b]
+        return a[same], b[same]
+
+    def table(self, by="stage"):
+        """One row per hand-off, account by account in journey order (see ``HANDOFF_COLUMNS``)."""
+        a, b = self.transitions(by)
+        return pd.DataFrame({
+            "account": pd.Categorical.from_codes(self.account[a], categories=self.accounts),
+            "from_persona": pd.Categorical.from_codes(self.persona[a], categories=self.personas),
+            "to_persona": pd.Categorical.from_codes(self.persona[b], categories=self.personas),
+            "from_stage": pd.Categorical.from_codes(self.stage[a], categories=self.stages),
+            "to_stage": pd.Categorical.from_codes(self.stage[b], categories=self.stages),
+            "sentiment_delta": self.sentiment[b] - self.sentiment[a],
+            "confidence_avg": (self.confidence[a] + self.confidence[b]) / 2,
+        }, columns=HANDOFF_COLUMNS)
+
+    def matrix(self, by="stage"):
+        """Hand-offs aggregated into a sparse persona → persona ``TransitionMatrix``."""
+        a, b = self.transitions(by)
+        return TransitionMatrix(self.personas, self.persona[a], self.persona[b], self.account[a],
+                                self.sentiment[b] - self.sentiment[a],
+                                (self.confidence[a] + self.confidence[b]) / 2)
@@ -0,0 +1,384 @@
+"""
+Journey Ingest - streaming, schema-validated loader
+---------------------------------------------------
+Parses an uploaded journey export (a JSON array of touchpoints or JSON Lines)
+one record at a time into compact column buffers, then assembles a single
+columnar DataFrame at the end.
+
+• stage / persona / emoji / industry / account are stored as categoricals
+  (int codes + one lookup); ``account`` (optional) groups touchpoints into
+  per-account journeys for the hand-off analysis
+• sentiment / confidence are float32, frequency is int32
+• timestamp (optional) is ISO-8601 or epoch seconds, stored as UTC datetime64
+• quotes / themes / actions are tuples of strings (a bare string is accepted)
+• rows that fail to parse or validate are counted and sampled, never fatal;
+  a malformed array element resyncs at the next one, and a truncated
+  document keeps the records read before the cut
+"""
+
+import io
+import json
+import re
+from array import array
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+CHUNK_CHARS = 1 << 20          # characters decoded per read from the upload
+MAX_ERROR_SAMPLES = 20         # how many rejected-row messages to keep
+MAX_ELEMENT_CHARS = 1 << 22    # a malformed array element is scanned this far for its end
+
+# column -> (kind, required)
+SCHEMA = {
+    "stage":      ("category", True),
+    "persona":    ("category", True),
+    "label":      ("text", True),
+    "sentiment":  ("float32", True),
+    "frequency":  ("int32", True),
+    "confidence": ("float32", True),
+    "emoji":      ("category", False),
+    "industry":   ("category", False),
+    "account":    ("category", False),
+    "timestamp":  ("datetime", False),
+    "quotes":     ("list", False),
+    "themes":     ("list", False),
+    "actions":    ("list", False),
+}
+ALIASES = {"quote": "quotes", "theme": "themes", "action": "actions", "account_id": "account"}
+
+EMOJI_SCALE = ["😡", "😕", "😐", "🙂", "😄"]
+_EMOJI_BINS = [-0.5, -0.15, 0.15, 0.40]
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_NAT = np.iinfo(np.int64).min   # datetime64 NaT as int64
+_MAX_NS = np.iinfo(np.int64).max
+
+
+def sentiment_band(sentiment):
+    """Index into ``EMOJI_SCALE`` for a score or an array of scores."""
+    return np.searchsorted(_EMOJI_BINS, sentiment, side="right")
+
+
+def sentiment_emoji(sentiment):
+    """Emoji for a sentiment score, matching the hand-picked demo faces."""
+    return EMOJI_SCALE[int(sentiment_band(sentiment))]
+
+
+@dataclass
+class IngestResult:
+    frame: pd.DataFrame
+    n_rows: int = 0
+    n_rejected: int = 0
+    errors: list = field(default_factory=list)
+
+
+class _ColumnBuffers:
+    """Append-only typed buffers; categoricals are interned to int codes."""
+
+    def __init__(self):
+        self.codes = {c: array("i") for c, (k, _) in SCHEMA.items() if k == "category"}
+        self.lookup = {c: {} for c in self.codes}
+        self.floats = {c: array("f") for c, (k, _) in SCHEMA.items() if k == "float32"}
+        self.ints = {c: array("i") for c, (k, _) in SCHEMA.items() if k == "int32"}
+        self.times = {c: array("q") for c, (k, _) in SCHEMA.items() if k == "datetime"}
+        self.texts = {c: [] for c, (k, _) in SCHEMA.items() if k in ("text", "list")}
+
+    def append(self, row):
+        # *row* comes from validate_row, so every value fits its buffer and
+        # the columns cannot end up with different lengths
+        for col, buf in self.codes.items():
+            table = self.lookup[col]
+            buf.append(table.setdefault(row[col], len(table)) if col in row else -1)
+        for col, buf in self.floats.items():
+            buf.append(row[col])
+        for col, buf in self.ints.items():
+            buf.append(row[col])
+        for col, buf in self.times.items():
+            buf.append(row.get(col, _NAT))
+        for col, buf in self.texts.items():
+            buf.append(row[col])
+
+    def to_frame(self):
+        data = {}
+        for col in SCHEMA:
+            if col in self.codes:
+                cats = list(self.lookup[col])
+                codes = np.frombuffer(self.codes[col], dtype=np.int32)
+                data[col] = pd.Categorical.from_codes(codes, categories=cats)
+            elif col in self.floats:
+                data[col] = np.frombuffer(self.floats[col], dtype=np.float32).copy()
+            elif col in self.ints:
+                data[col] = np.frombuffer(self.ints[col], dtype=np.int32).copy()
+            elif col in self.times:
+                data[col] = np.frombuffer(self.times[col], dtype=np.int64).copy().view("datetime64[ns]")
+            else:
+                data[col] = pd.Series(self.texts[col], dtype=object)
+        return pd.DataFrame(data)
+
+
+def validate_row(obj):
+    """Return a normalized row dict, or raise ValueError describing the problem."""
+    if not isinstance(obj, dict):
+        raise ValueError(f"expected an object, got {type(obj).__name__}")
+    row = {}
+    for col, (kind, required) in SCHEMA.items():
+        value = obj.get(col)
+        if value is None:
+            value = next((obj[a] for a, c in ALIASES.items() if c == col and a in obj), None)
+        if value is None:
+            if required:
+                raise ValueError(f"missing '{col}'")
+            if kind == "list":
+                row[col] = ()
+            continue
+        if kind == "list":
+            items = [value] if isinstance(value, str) else value
+            if not isinstance(items, list) or not all(isinstance(v, str) for v in items):
+                raise ValueError(f"'{col}' must be a string or a list of strings")
+            row[col] = tuple(v.strip() for v in items if v.strip())
+        elif kind in ("category", "text"):
+            if not isinstance(value, str) or not value.strip():
+                raise ValueError(f"'{col}' must be a non-empty string")
+            row[col] = value.strip()
+        elif kind == "float32":
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise ValueError(f"'{col}' must be a number")
+            row[col] = float(value)
+        elif kind == "int32":
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or value != int(value):
+                raise ValueError(f"'{col}' must be an integer")
+            row[col] = int(value)
+        elif kind == "datetime":
+            row[col] = _epoch_ns(value, col)
+
+    if not -1.0 <= row["sentiment"] <= 1.0:
+        raise ValueError("'sentiment' must be within [-1, 1]")
+    if not 0.0 <= row["confidence"] <= 1.0:
+        raise ValueError("'confidence' must be within [0, 1]")
+    if not 0 <= row["frequency"] < 2**31:
+        raise ValueError("'frequency' must be a non-negative integer")
+    if "emoji" not in row:
+        row["emoji"] = sentiment_emoji(row["sentiment"])
+    return row
+
+
+def _epoch_ns(value, col):
+    """UTC nanoseconds since the epoch for an ISO-8601 string or epoch seconds."""
+    if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+        raise ValueError(f"'{col}' must be an ISO-8601 string or epoch seconds")
+    if isinstance(value, str):
+        try:
+            stamp = datetime.fromisoformat(value.strip())
+        except ValueError:
+            raise ValueError(f"'{col}' is not an ISO-8601 date/time: {value!r}") from None
+        if stamp.tzinfo is None:
+            stamp = stamp.replace(tzinfo=timezone.utc)
+        ns = (stamp - _EPOCH) // timedelta(microseconds=1) * 1000
+    else:
+        try:
+            ns = int(round(value * 1e6)) * 1000
+        except (OverflowError, ValueError):   # inf / nan
+            ns = _NAT
+    # datetime64[ns] spans 1677-09-21 .. 2262-04-11; _NAT itself is the missing-value marker
+    if not _NAT < ns <= _MAX_NS:
+        raise ValueError(f"'{col}' is outside 1677-2262 (epoch milliseconds?): {value!r}")
+    return ns
+
+
+def _text_stream(source):
+    """Wrap bytes / binary file objects as a text stream without copying."""
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    if isinstance(source, io.TextIOBase):
+        return source
+    return io.TextIOWrapper(source, encoding="utf-8-sig")
+
+
+# a whole string, a structural character, or an unterminated string's opening quote
+_JSON_TOKENS = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"|[\[\]{},"]', re.S)
+# start of the next array object: where an element given up on resyncs
+_NEXT_OBJECT = re.compile(r",\s*(?=\{)")
+# text that may still be part of a number cut at the end of the buffer
+_NUMBER_TAIL = re.compile(r"[0-9eE+\-.]*")
+_SPACE = re.compile(r"\s*")
+
+
+def _element_end(buf, pos, depth=0, eof=False):
+    """
+    Scan the array element from *pos* at bracket *depth*: ``(end, depth,
+    pos)``.  *end* is the index of the top-level ``,`` / ``]`` after the
+    element, or -1 if *buf* ends first; the returned *depth* / *pos* then
+    resume the scan once more text has been read.  Brackets are matched
+    loosely, so a malformed element still resyncs at the next separator; a
+    stray closing bracket followed by ``,`` does not end the array.
+    """
+    for m in _JSON_TOKENS.finditer(buf, pos):
+        token = m.group()
+        if token == '"':
+            return -1, depth, m.start()   # string runs past the end of the buffer
+        if token in "[{":
+            depth += 1
+        elif token in "]}":
+            if depth == 0:
+                after = _SPACE.match(buf, m.end()).end()
+                if after == len(buf) and not eof:
+                    return -1, 0, m.start()   # what follows is in the next chunk
+                if buf.startswith(",", after):
+                    return after, 0, m.start()
+                return m.start(), 0, m.start()
+            depth -= 1
+        elif token == "," and depth == 0:
+            return m.start(), 0, m.start()
+    return -1, depth, len(buf)
+
+
+def _iter_json_array(stream, buf, offset=0):
+    """
+    Yield items of a top-level JSON array, decoding one element at a time.
+
+    A malformed element is yielded as a ``ValueError`` (with its character
+    offset in the document) and decoding resumes at the next element.  The
+    bracket scan for its end carries over between chunks; an element whose
+    brackets never balance within ``MAX_ELEMENT_CHARS``, or with a string
+    broken across a line, resumes at the next ``,{`` instead.  A document
+    that ends inside the array raises ``ValueError``.  *offset* is the
+    document position of ``buf[0]``.
+    """
+    decoder = json.JSONDecoder()
+    pos = 1  # past the opening '['
+    eof = False
+    scan = None       # (depth, resume offset from pos) of the malformed element being scanned
+    skipping = None   # error of an element given up on, until the next ",{"
+
+    def refill():
+        nonlocal buf, pos, offset, eof
+        chunk = stream.read(CHUNK_CHARS)
+        eof = not chunk
+        offset += pos
+        buf, pos = buf[pos:] + chunk, 0
+
+    while True:
+        if skipping is not None:
+            m = _NEXT_OBJECT.search(buf, pos + 1)
+            if m:
+                yield skipping
+                skipping, pos = None, m.end()
+            elif eof:
+                if buf[pos:].rstrip().endswith("]"):   # it was the last element
+                    yield skipping
+                    return
+                raise ValueError(f"unexpected end of file: truncated JSON at character {offset + pos}")
+            else:
+                pos = max(pos, len(buf) - 64)   # a ",{" may straddle the next chunk
+                refill()
+            continue
+        # skip whitespace / separators, refilling as needed
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos < len(buf) or eof:
+                break
+            refill()
+        if pos >= len(buf):
+            raise ValueError("unexpected end of file: unterminated JSON array")
+        if buf[pos] == "]":
+            return
+        try:
+            item, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError as exc:
+            error = ValueError(f"malformed JSON at character {offset + exc.pos}: {exc.msg}")
+            if exc.msg.startswith("Invalid control character"):
+                scan, skipping = None, error   # a string broken across a line: quotes no longer pair up
+                continue
+            depth, resume = scan or (0, 0)
+            end, depth, resume = _element_end(buf, pos + resume, depth, eof)
+            if end < 0:
+                if eof or resume - pos > MAX_ELEMENT_CHARS:
+                    scan, skipping = None, error
+                else:
+                    scan = depth, resume - pos
+                    refill()   # the element continues in the next chunk
+                continue
+            scan = None
+            yield error
+            pos = max(end, pos + 1)   # a stray closing bracket is skipped on its own
+            continue
+        if not eof and _NUMBER_TAIL.fullmatch(buf, end):
+            refill()   # a bare number may continue in the next chunk
+            continue
+        scan = None
+        yield item
+        pos = end
+
+
+def iter_records(source):
+    """
+    Yield ``(line_no, obj_or_exception)`` for every record in *source*.
+
+    A document starting with ``[`` is streamed as a JSON array; anything else
+    is treated as JSON Lines.  Undecodable array elements and JSON Lines
+    entries are yielded as exceptions so the caller can count them; a JSON
+    array cut short raises ``ValueError``.
+    """
+    stream = _text_stream(source)
+    head = stream.read(CHUNK_CHARS)
+    stripped = head.lstrip()
+    if stripped.startswith("["):
+        items = _iter_json_array(stream, stripped, offset=len(head) - len(stripped))
+        for i, item in enumerate(items, start=1):
+            yield i, item
+        return
+
+    line_no = 0
+    pending = head
+    while True:
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            line_no += 1
+            if line.strip():
+                try:
+                    yield line_no, json.loads(line)
+                except json.JSONDecodeError as exc:
+                    yield line_no, ValueError(f"invalid JSON: {exc.msg}")
+        chunk = stream.read(CHUNK_CHARS)
+        if not chunk:
+            break
+        pending += chunk
+    if pending.strip():
+        line_no += 1
+        try:
+            yield line_no, json.loads(pending)
+        except json.JSONDecodeError as exc:
+            yield line_no, ValueError(f"invalid JSON: {exc.msg}")
+
+
+def load_journey(source):
+    """Stream *source* (bytes or a binary file object) into an ``IngestResult``."""
+    buffers = _ColumnBuffers()
+    n_rows = n_rejected = 0
+    errors = []
+    rec_no = 0
+    try:
+        for rec_no, obj in iter_records(source):
+            try:
+                if isinstance(obj, Exception):
+                    raise obj
+                buffers.append(validate_row(obj))
+                n_rows += 1
+            except ValueError as exc:
+                n_rejected += 1
+                if len(errors) < MAX_ERROR_SAMPLES:
+                    errors.append(f"record {rec_no}: {exc}")
+    except ValueError as exc:   # truncated JSON array: keep the records read so far
+        n_rejected += 1
+        errors.append(f"record {rec_no + 1}: {exc}")
+    return IngestResult(buffers.to_frame(), n_rows, n_rejected, errors)
+
+
+def frame_from_records(records):
+    """Build the same columnar frame from in-memory dicts (e.g. ``DEMO_DATA``)."""
+    buffers = _ColumnBuffers()
+    for obj in records:
+        buffers.append(validate_row(obj))
+    return buffers.to_frame()
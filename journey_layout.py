@@ -0,0 +1,137 @@
+"""
+Journey Layout - swim-lane positions for arbitrary datasets
+-----------------------------------------------------------
+x comes from the journey stage order, y from the persona lane.  Touchpoints
+that share a (stage, persona) cell are stacked on a small grid inside the
+cell so they never overlap.  One stable sort dominates: O(n log n).
+"""
+
+import numpy as np
+import pandas as pd
+
+from journey_aggregate import MIN_WEIGHT
+from journey_ingest import EMOJI_SCALE, sentiment_band
+
+PERSONA_ORDERINGS = ("Original", "Total frequency", "Avg sentiment")
+
+CELL_WIDTH = 0.80    # share of a stage column used for stacking
+CELL_HEIGHT = 0.70   # share of a persona lane used for stacking
+
+
+def persona_lanes(personas, persona_sums, ordering="Original"):
+    """
+    Lane order for the y axis.
+
+    *persona_sums* is a per-persona sums table (see ``WeightedSummary.rollup``);
+    personas missing from it keep their original relative order at the end.
+    """
+    if ordering == "Original":
+        return list(personas)
+    if ordering == "Total frequency":
+        score = persona_sums["mentions"]
+    elif ordering == "Avg sentiment":
+        score = persona_sums["sw_Confidence"] / persona_sums["w_Confidence"]
+    else:
+        raise ValueError(f"unknown persona ordering: {ordering!r}")
+    score = pd.Series(score.to_numpy(), index=persona_sums.index.astype(str))
+    ranked = score.sort_values(ascending=False, kind="stable").index.tolist()
+    seen = set(ranked)
+    return ranked + [p for p in personas if p not in seen]
+
+
+def stack_offsets(cell, priority=None):
+    """
+    Grid offsets that spread points sharing a *cell* id.
+
+    Within a cell, points are ranked by descending *priority* (e.g. frequency)
+    and laid out on a ceil(sqrt(k))-wide grid centred on the cell.
+    Returns ``(dx, dy)``; a singleton cell gets ``(0, 0)``.
+    """
+    n = len(cell)
+    if n == 0:
+        return np.zeros(0), np.zeros(0)
+    keys = (cell,) if priority is None else (-np.asarray(priority), cell)
+    order = np.lexsort(keys)
+    sorted_cell = cell[order]
+    starts = np.flatnonzero(np.r_[True, sorted_cell[1:] != sorted_cell[:-1]])
+    counts = np.diff(np.r_[starts, n])
+    group_start = np.repeat(starts, counts)
+    group_size = np.repeat(counts, counts)
+    rank = np.arange(n) - group_start
+
+    cols = np.ceil(np.sqrt(group_size)).astype(np.int64)
+    rows = np.ceil(group_size / cols).astype(np.int64)
+    col, row = rank % cols, rank // cols
+    dx_sorted = (col - (cols - 1) / 2) * (CELL_WIDTH / cols)
+    dy_sorted = ((rows - 1) / 2 - row) * (CELL_HEIGHT / rows)
+
+    dx = np.empty(n)
+    dy = np.empty(n)
+    dx[order] = dx_sorted
+    dy[order] = dy_sorted
+    return dx, dy
+
+
+def swimlane_positions(frame, stages, lanes):
+    """Float x/y arrays for every touchpoint in *frame* given stage and lane order."""
+    x = pd.Categorical(frame["stage"], categories=stages).codes.astype(np.int64)
+    y = pd.Categorical(frame["persona"], categories=lanes).codes.astype(np.int64)
+    dx, dy = stack_offsets(x * len(lanes) + y, frame["frequency"].to_numpy())
+    return x + dx, y + dy
+
+
+# ------------------------------
+# Server-side clustering
+# ------------------------------
+CLUSTER_LEVELS = ("Stage × persona", "Sentiment band")
+
+
+def cluster_touchpoints(frame, stages, lanes, level="Stage × persona"):
+    """
+    Collapse touchpoints into clusters, one row per (stage, persona) cell or,
+    at ``"Sentiment band"`` level, per cell and emoji band.
+
+    Each cluster carries summed frequency, confidence-weighted sentiment, the
+    touchpoint count and the label of its most-mentioned touchpoint; clusters
+    sharing a cell are stacked like single points.
+    """
+    x = pd.Categorical(frame["stage"], categories=stages).codes.astype(np.int64)
+    y = pd.Categorical(frame["persona"], categories=lanes).codes.astype(np.int64)
+    sent = frame["sentiment"].to_numpy(np.float64)
+    freq = frame["frequency"].to_numpy(np.int64)
+    conf = np.clip(frame["confidence"].to_numpy(np.float64), MIN_WEIGHT, None)
+
+    key = x * len(lanes) + y
+    if level == "Sentiment band":
+        key = key * len(EMOJI_SCALE) + sentiment_band(sent)
+    elif level != "Stage × persona":
+        raise ValueError(f"unknown cluster level: {level!r}")
+    uniq, inv = np.unique(key, return_inverse=True)
+    k = len(uniq)
+
+    weight = np.bincount(inv, weights=conf, minlength=k)
+    sentiment = np.bincount(inv, weights=sent * conf, minlength=k) / weight
+    frequency = np.bincount(inv, weights=freq, minlength=k).astype(np.int64)
+    count = np.bincount(inv, minlength=k)
+    confidence = np.bincount(inv, weights=frame["confidence"].to_numpy(np.float64), minlength=k) / count
+
+    # representative = most-mentioned touchpoint of each cluster
+    order = np.lexsort((-freq, inv))
+    first = np.flatnonzero(np.r_[True, inv[order][1:] != inv[order][:-1]])
+    rep = order[first]
+
+    cell = x[rep] * len(lanes) + y[rep]
+    dx, dy = stack_offsets(cell, frequency)
+    labels = frame["label"].to_numpy()[rep]
+    return pd.DataFrame({
+        "stage": frame["stage"].to_numpy()[rep],
+        "persona": frame["persona"].to_numpy()[rep],
+        "label": [lab if n == 1 else f"{lab} (+{n - 1:,} more)" for lab, n in zip(labels, count)],
+        "sentiment": sentiment,
+        "frequency": frequency,
+        "confidence": confidence,
+        "touchpoints": count,
+        "emoji": np.asarray(EMOJI_SCALE, dtype=object)[sentiment_band(sentiment)],
+        "x": x[rep] + dx,
+        "y": y[rep] + dy,
+    })
@@ -0,0 +1,151 @@
+"""
+Journey Live - incremental ingest from a watched drop directory
+---------------------------------------------------------------
+Researchers drop or append JSON Lines files (``*.jsonl``) into one
+directory while the app runs:
+
+• ``DropDirectory`` remembers a byte offset per file and reads only the
+  complete lines written since the last poll (a half-written last line
+  waits for the next one; a truncated or replaced file is re-read)
+• ``LiveStudy`` validates the new rows with ``journey_ingest`` and swaps in
+  ``model.extended(rows)``: stage / persona sums, theme counts and hand-off
+  edges are updated with the new rows only.  It remembers which file every
+  row came from, so a re-read file replaces its old rows (a full rebuild)
+  instead of adding them twice
+
+Every update bumps ``version`` and yields a new, immutable model snapshot,
+so sessions rendering the previous snapshot are never disturbed.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from journey_ingest import MAX_ERROR_SAMPLES, load_journey
+from journey_model import append_rows
+
+LIVE_SUFFIX = ".jsonl"
+HISTORY_SIZE = 50   # recent updates kept for the status line
+
+
+class DropDirectory:
+    """Per-file read offsets for the JSON Lines files in one directory."""
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.offsets = {}
+        self.inodes = {}
+
+    def poll_files(self):
+        """
+        ``[(file, bytes, restarted)]``: the complete lines appended to each
+        file since the last poll.  *restarted* means the file shrank or was
+        replaced, so *bytes* is its whole content again.
+        """
+        try:
+            names = sorted(n for n in os.listdir(self.path) if n.endswith(LIVE_SUFFIX))
+        except FileNotFoundError:
+            return []
+        updates = []
+        for name in names:
+            path = os.path.join(self.path, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            offset = self.offsets.get(name, 0)
+            restarted = offset > 0 and (stat.st_size < offset or stat.st_ino != self.inodes.get(name))
+            if restarted:   # truncated or replaced: read it again from the start
+                offset = 0
+                self.offsets[name] = 0
+            if stat.st_size == offset and not restarted:
+                continue
+            with open(path, "rb") as fh:
+                fh.seek(offset)
+                data = fh.read(stat.st_size - offset)
+            end = data.rfind(b"\n") + 1
+            self.inodes[name] = stat.st_ino
+            if not end and not restarted:
+                continue
+            self.offsets[name] = offset + end
+            updates.append((name, data[:end], restarted))
+        return updates
+
+    def poll(self):
+        """Bytes of the complete lines appended since the last poll, and the files they came from."""
+        updates = self.poll_files()
+        return b"".join(data for _, data, _ in updates), [name for name, _, _ in updates]
+
+
+class LiveStudy:
+    """A study that grows from a drop directory, one immutable model snapshot per update."""
+
+    def __init__(self, path, build_model, min_interval=1.0):
+        self.directory = DropDirectory(path)
+        self.build_model = build_model
+        self.min_interval = min_interval
+        self.key_prefix = "live-" + hashlib.blake2b(os.path.abspath(path).encode(), digest_size=4).hexdigest()
+        self.model = None
+        self.version = 0
+        self.n_rejected = 0
+        self.errors = deque(maxlen=MAX_ERROR_SAMPLES)
+        self.history = deque(maxlen=HISTORY_SIZE)   # (time, rows added, files, seconds)
+        self.last_poll = 0.0
+        self._file_ids = {}                              # file name -> id in row_files
+        self.row_files = np.empty(0, dtype=np.int32)     # source file id of every model row
+        self._lock = threading.Lock()
+
+    @property
+    def n_rows(self):
+        return 0 if self.model is None else len(self.model)
+
+    def poll(self):
+        """
+        Ingest rows appended since the last poll; returns True if the model
+        changed.  Polls closer together than ``min_interval`` (e.g. from many
+        sessions) are skipped, and only one runs at a time.  The rows of a
+        file that was truncated or replaced are dropped and the model rebuilt
+        from the remaining rows plus the file's new content.
+        """
+        if time.time() - self.last_poll < self.min_interval or not self._lock.acquire(blocking=False):
+            return False
+        try:
+            self.last_poll = time.time()
+            updates = self.directory.poll_files()
+            if not updates:
+                return False
+            start = time.perf_counter()
+            chunk, chunk_files = None, []
+            for name, data, _ in updates:
+                ingest = load_journey(data)
+                self.n_rejected += ingest.n_rejected
+                self.errors.extend(ingest.errors)
+                if not ingest.frame.empty:
+                    chunk = ingest.frame if chunk is None else append_rows(chunk, ingest.frame)
+                    file_id = self._file_ids.setdefault(name, len(self._file_ids))
+                    chunk_files.append(np.full(len(ingest.frame), file_id, dtype=np.int32))
+            replaced = [self._file_ids[name] for name, _, restarted in updates
+                        if restarted and name in self._file_ids]
+            keep = ~np.isin(self.row_files, replaced) if replaced else None
+            if chunk is None and (keep is None or keep.all()):
+                return False
+
+            row_files = np.concatenate([self.row_files if keep is None else self.row_files[keep], *chunk_files])
+            key = f"{self.key_prefix}-{self.version + 1}-{len(row_files)}"
+            if self.model is not None and keep is None:
+                model = self.model.extended(chunk, key=key)
+            else:
+                parts = [] if self.model is None else [self.model.frame[keep].reset_index(drop=True)]
+                parts += [] if chunk is None else [chunk]
+                frame = parts[0] if len(parts) == 1 else append_rows(*parts)
+                model = self.build_model(frame, key=key) if len(frame) else None
+            self.model, self.version, self.row_files = model, self.version + 1, row_files
+            added = 0 if chunk is None else len(chunk)
+            self.history.append((time.time(), added, [name for name, _, _ in updates], time.perf_counter() - start))
+            return True
+        finally:
+            self._lock.release()
@@ -0,0 +1,220 @@
+"""
+Journey Metrics - hot-path timing spans + exporters
+---------------------------------------------------
+A process-wide registry of named spans (see ``metrics`` in Journey.py):
+
+• ``span(name, **labels)`` times a block; the block may set ``payload`` to
+  the bytes it produced (table, figure JSON, …)
+• each (name, labels) series keeps its count, total seconds, last payload
+  and the last ``WINDOW`` durations for p50 / p95
+• ``gauge`` records point-in-time values (cache sizes, hit counters)
+
+``prometheus()`` renders everything in the Prometheus text format (for the
+node_exporter textfile collector) and ``events()`` / ``to_json()`` give a
+JSON log of recent spans.  Recording a span is a ``perf_counter`` pair and a
+deque append under a lock, so spans can wrap every section of every rerun.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+WINDOW = 512            # durations kept per series for percentiles
+EVENT_LOG_SIZE = 2048   # recent span events kept for the JSON log
+QUANTILES = (0.5, 0.95)
+PREFIX = "journey"
+
+
+def payload_bytes(*objects):
+    """Approximate in-memory size of span outputs (shallow for frames: no per-object walk)."""
+    total = 0
+    for obj in objects:
+        if isinstance(obj, pd.DataFrame):
+            total += int(obj.memory_usage(index=True, deep=False).sum())
+        elif isinstance(obj, (pd.Series, pd.Index)):
+            total += int(obj.memory_usage(index=True, deep=False))
+        elif isinstance(obj, (bytes, str)):
+            total += len(obj)
+        else:
+            total += int(getattr(obj, "nbytes", 0) or 0)
+    return total
+
+
+class Span:
+    """Handle yielded by ``Metrics.span``; set ``payload`` inside the block."""
+
+    __slots__ = ("payload", "seconds")
+
+    def __init__(self):
+        self.payload = None
+        self.seconds = 0.0
+
+    @property
+    def ms(self):
+        return self.seconds * 1000
+
+
+class _Series:
+    __slots__ = ("count", "total", "last", "payload", "samples")
+
+    def __init__(self):
+        self.count, self.total, self.last, self.payload = 0, 0.0, 0.0, None
+        self.samples = deque(maxlen=WINDOW)
+
+
+def _labels(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels, **extra):
+    pairs = list(labels) + [(k, str(v)) for k, v in extra.items()]
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}" if pairs else ""
+
+
+def _event_dicts(events):
+    return [{"ts": round(ts, 3), "span": name, **dict(labels), "ms": round(seconds * 1000, 3),
+             "payload_bytes": payload} for ts, name, labels, seconds, payload in events]
+
+
+class Metrics:
+    """Thread-safe span / gauge registry shared by every session of the server."""
+
+    def __init__(self):
+        self.started = time.time()
+        self._series = {}
+        self._gauges = {}
+        self._events = deque(maxlen=EVENT_LOG_SIZE)
+        self._unflushed = 0
+        self._lock = threading.Lock()
+
+    def observe(self, name, seconds, payload=None, **labels):
+        key = (name, _labels(labels))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _Series()
+            series.count += 1
+            series.total += seconds
+            series.last = seconds
+            series.samples.append(seconds)
+            if payload is not None:
+                series.payload = payload
+            self._events.append((time.time(), name, key[1], seconds, payload))
+            self._unflushed = min(self._unflushed + 1, EVENT_LOG_SIZE)
+
+    @contextmanager
+    def span(self, name, **labels):
+        """Time the block as series (*name*, *labels*)."""
+        handle = Span()
+        start = time.perf_counter()
+        try:
+            yield handle
+        finally:
+            handle.seconds = time.perf_counter() - start
+            self.observe(name, handle.seconds, handle.payload, **labels)
+
+    def gauge(self, name, value, **labels):
+        with self._lock:
+            self._gauges[(name, _labels(labels))] = value
+
+    # ------------------------------
+    # Reading
+    # ------------------------------
+    def series(self, name=None):
+        """``span, labels, count, last_ms, p50_ms, p95_ms, payload_bytes`` per series (optionally one span)."""
+        with self._lock:
+            items = [(key, s.count, s.last, s.payload, np.fromiter(s.samples, float, len(s.samples)))
+                     for key, s in self._series.items() if name is None or key[0] == name]
+        rows = []
+        for (span, labels), count, last, payload, samples in items:
+            p50, p95 = np.quantile(samples, QUANTILES) if len(samples) else (np.nan, np.nan)
+            rows.append({"span": span, **dict(labels), "count": count, "last_ms": last * 1000,
+                         "p50_ms": p50 * 1000, "p95_ms": p95 * 1000, "payload_bytes": payload})
+        return pd.DataFrame(rows)
+
+    def latency(self, name, **labels):
+        """``(last, p50, p95)`` in seconds for one series, or ``None`` if it was never observed."""
+        with self._lock:
+            series = self._series.get((name, _labels(labels)))
+            if series is None:
+                return None
+            samples = np.fromiter(series.samples, float, len(series.samples))
+            last = series.last
+        p50, p95 = np.quantile(samples, QUANTILES)
+        return last, float(p50), float(p95)
+
+    def events(self, limit=None):
+        """Recent span events, oldest first, as JSON-ready dicts."""
+        with self._lock:
+            events = list(self._events)
+        return _event_dicts(events if limit is None else events[-limit:] if limit else [])
+
+    # ------------------------------
+    # Exporters
+    # ------------------------------
+    def prometheus(self):
+        """All series and gauges in the Prometheus text exposition format."""
+        with self._lock:
+            series = [(key, s.count, s.total, s.payload, np.fromiter(s.samples, float, len(s.samples)))
+                      for key, s in self._series.items()]
+            gauges = list(self._gauges.items())
+        lines = [f"# HELP {PREFIX}_span_seconds Wall time of instrumented sections "
+                 f"(quantiles over the last {WINDOW} runs).",
+                 f"# TYPE {PREFIX}_span_seconds summary"]
+        for (span, labels), count, total, _, samples in sorted(series, key=lambda item: item[0]):
+            labels = (("span", span),) + labels
+            for q, value in zip(QUANTILES, np.quantile(samples, QUANTILES)):
+                lines.append(f"{PREFIX}_span_seconds{_format_labels(labels, quantile=q)} {value:.6g}")
+            lines.append(f"{PREFIX}_span_seconds_sum{_format_labels(labels)} {total:.6g}")
+            lines.append(f"{PREFIX}_span_seconds_count{_format_labels(labels)} {count}")
+        lines += [f"# HELP {PREFIX}_span_payload_bytes Payload size of the last run of each section.",
+                  f"# TYPE {PREFIX}_span_payload_bytes gauge"]
+        for (span, labels), _, _, payload, _ in sorted(series, key=lambda item: item[0]):
+            if payload is not None:
+                lines.append(f"{PREFIX}_span_payload_bytes{_format_labels((('span', span),) + labels)} {payload}")
+        for name in sorted({name for (name, _), _ in gauges}):
+            lines.append(f"# TYPE {PREFIX}_{name} gauge")
+            for (_, labels), value in sorted((g for g in gauges if g[0][0] == name), key=lambda g: g[0]):
+                lines.append(f"{PREFIX}_{name}{_format_labels(labels)} {value:.6g}")
+        lines.append(f"{PREFIX}_uptime_seconds {time.time() - self.started:.0f}")
+        return "\n".join(lines) + "\n"
+
+    def to_json(self):
+        """Series summary, gauges and recent events as one JSON document."""
+        with self._lock:
+            gauges = [{"gauge": name, **dict(labels), "value": value} for (name, labels), value in self._gauges.items()]
+        summary = self.series()
+        return json.dumps({"started": self.started, "written": time.time(),
+                           "series": json.loads(summary.to_json(orient="records")) if len(summary) else [],
+                           "gauges": gauges, "events": self.events()}, indent=2)
+
+    def write_prometheus(self, path):
+        """Atomically replace *path* with the current Prometheus text (textfile collector style)."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.part"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            fh.write(self.prometheus())
+        os.replace(tmp, path)
+
+    def append_log(self, path):
+        """Append span events recorded since the last call to a JSON Lines log."""
+        with self._lock:
+            events = list(self._events)[-self._unflushed:] if self._unflushed else []
+            self._unflushed = 0
+        if not events:
+            return 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "a", encoding="utf-8") as fh:
+            for event in _event_dicts(events):
+                fh.write(json.dumps(event, ensure_ascii=False) + "\n")
+        return len(events)
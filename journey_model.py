@@ -0,0 +1,344 @@
+"""
+Journey Model - one shared, memoized view of a dataset
+------------------------------------------------------
+Holds the base touchpoint frame for a dataset and computes derived views
+(theme counts, weighted aggregates, time rollups, hand-off transitions, the
+comparison cube) lazily, once per parameter combination.
+A filtered model derives its views from its parent's per-row arrays and the
+row mask; its full frame, with the text and list columns, is only copied
+out when a table that shows them asks for it.
+``extended`` derives the model of a grown dataset, carrying the views that
+can absorb new rows incrementally.
+
+A model is built once per dataset (see ``study_pool`` in Journey.py)
+and shared by every tab and session, so views are read-only: callers must
+copy before mutating.
+"""
+
+import dataclasses
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from journey_aggregate import WeightedSummary
+from journey_compare import SummaryCube
+from journey_filters import FilterIndex
+from journey_handoffs import HandoffEdges
+from journey_ingest import SCHEMA
+from journey_layout import cluster_touchpoints, persona_lanes, swimlane_positions
+from journey_search import SearchIndex
+from journey_themes import ThemeStageCounts
+from journey_timeline import TimeRollups, to_day
+
+
+MAX_FILTERED_VIEWS = 8   # filtered sub-models kept per dataset
+LIST_COLUMNS = tuple(col for col, (kind, _) in SCHEMA.items() if kind == "list")   # left out of narrow_frame
+
+
+def frame_hash(frame):
+    """Stable content hash of a touchpoint frame (row values, not index)."""
+    digest = hashlib.blake2b(digest_size=8)
+    digest.update(",".join(frame.columns).encode())
+    digest.update(pd.util.hash_pandas_object(frame, index=False).values.tobytes())
+    return digest.hexdigest()
+
+
+def spec_hash(spec):
+    return hashlib.blake2b(repr(spec).encode(), digest_size=4).hexdigest()
+
+
+def ordered_values(known, observed):
+    """The *observed* values: known ones in *known* order, then the rest in first-seen order."""
+    observed_set, known_set = set(observed), set(known)
+    return [v for v in known if v in observed_set] + [v for v in observed if v not in known_set]
+
+
+def append_rows(frame, chunk):
+    """*frame* followed by *chunk*; categoricals keep their codes and gain *chunk*'s new values."""
+    head, tail = {}, {}
+    for col in frame.columns:
+        old, new = frame[col], chunk[col]
+        if isinstance(old.dtype, pd.CategoricalDtype):
+            known = set(old.cat.categories)
+            cats = list(old.cat.categories) + [v for v in pd.Categorical(new).categories if v not in known]
+            old, new = old.cat.set_categories(cats), pd.Categorical(new, categories=cats)
+        head[col], tail[col] = old, new
+    return pd.concat([pd.DataFrame(head), pd.DataFrame(tail)], ignore_index=True)
+
+
+def _listed(touchpoints):
+    return ", ".join(f"{r.label} ({r.sentiment:.2f})" for r in touchpoints.itertuples())
+
+
+def executive_brief(avg_sentiment, total_mentions, coverage, wins, risks):
+    """Markdown brief from the Summary KPIs and ``JourneyModel.wins_and_risks`` (app and batch reports)."""
+    # filtered views can hold fewer than 2 wins / 3 risks
+    return (
+        f"Overall sentiment is **{avg_sentiment:.2f}** across **{total_mentions}** mentions "
+        f"with **{coverage:.0%}** coverage. "
+        f"**Wins:** {_listed(wins)}. "
+        f"**Risks:** {_listed(risks)}. "
+        f"**Next moves:** Investigate '{risks.iloc[0]['label']}' in {risks.iloc[0]['stage']}; "
+        f"accelerate adoption with {wins.iloc[0]['persona']}; "
+        f"standardize reporting in {wins.iloc[-1]['stage']}."
+    )
+
+
+class JourneyModel:
+    """Base frame plus lazily computed, memoized derived views."""
+
+    def __init__(self, frame, stage_order=(), persona_order=(), theme_map=None, parent=None, row_mask=None, key=None):
+        self._frame = frame
+        if frame is None:   # filtered: the parent's rows where row_mask is True, copied out on first use
+            self.stages, self.personas = list(parent.stages), list(parent.personas)
+            self._len = int(np.count_nonzero(row_mask))
+        else:
+            self.stages = ordered_values(stage_order, frame["stage"].cat.categories)
+            self.personas = ordered_values(persona_order, frame["persona"].cat.categories)
+            self._len = len(frame)
+        self.theme_map = theme_map or {}
+        self.parent = parent
+        self.row_mask = row_mask
+        self.key = key or frame_hash(frame)
+        self._views = {}
+        self._filtered = OrderedDict()
+        self.hits = self.misses = 0   # view / filter lookups, for the metrics panel
+        self._view_keys = {}
+        self._date_range = None   # (undated view, first day, last day) of a date-range view
+        self._lock = threading.Lock()
+
+    @property
+    def root(self):
+        """The unfiltered model this one was derived from (or itself)."""
+        return self if self.parent is None else self.parent.root
+
+    def __len__(self):
+        return self._len
+
+    @property
+    def frame(self):
+        """All columns of this model's rows; a filtered model copies them out of its parent on first use."""
+        if self._frame is None:
+            frame = self.parent.frame[self.row_mask].reset_index(drop=True)
+            with self._lock:
+                if self._frame is None:
+                    self._frame = frame
+        return self._frame
+
+    @property
+    def frame_built(self):
+        """Whether ``frame`` is held in memory (always, unless this is a filtered model nobody asked for it)."""
+        return self._frame is not None
+
+    def narrow_frame(self):
+        """
+        This model's rows without the list columns (quotes, themes, actions)
+        that only the touchpoint tables show; what the derived views read.
+        """
+        def build():
+            source = self.parent.narrow_frame()
+            return source[[c for c in source.columns if c not in LIST_COLUMNS]][self.row_mask].reset_index(drop=True)
+        if self._frame is not None:
+            return self._frame
+        return self._memo(("narrow_frame",), build)
+
+    def take(self, rows):
+        """Frame of the rows at positions *rows* (index = *rows*), without building a filtered model's frame."""
+        if self._frame is not None:
+            return self._frame.take(rows)
+        return self.parent.take(np.flatnonzero(self.row_mask)[rows]).set_axis(rows)
+
+    def view_key(self, view):
+        """Cache key for charts drawn from one view; survives ``extended`` when the new rows leave it unchanged."""
+        return self._view_keys.get(view, self.key)
+
+    def _memo(self, key, build):
+        """Return the cached view for *key*, building it on first use."""
+        view = self._views.get(key)
+        if view is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            view = build()
+            with self._lock:
+                view = self._views.setdefault(key, view)
+        return view
+
+    # ------------------------------
+    # Filtering
+    # ------------------------------
+    def filter_index(self):
+        """Per-value bitmaps + sorted numeric indexes for sidebar filters."""
+        return self._memo(("filter_index",), lambda: FilterIndex(self.narrow_frame()))
+
+    def filtered(self, spec):
+        """
+        Model over the rows matching a ``FilterSpec``; the last few filter
+        results are kept so flipping back and forth is free.
+        """
+        if spec.is_empty:
+            return self
+        with self._lock:
+            sub = self._filtered.get(spec)
+            if sub is not None:
+                self._filtered.move_to_end(spec)
+                self.hits += 1
+                return sub
+            self.misses += 1
+        mask = self.filter_index().select(spec)
+        sub = JourneyModel(None, theme_map=self.theme_map, parent=self, row_mask=mask,
+                           key=f"{self.key}:{spec_hash(spec)}")
+        if spec.dates is not None:   # whole UTC days, as picked in the sidebar
+            sub._date_range = (self.filtered(dataclasses.replace(spec, dates=None)),
+                               to_day(spec.dates[0]), to_day(spec.dates[1]))
+        with self._lock:
+            self._filtered[spec] = sub
+            while len(self._filtered) > MAX_FILTERED_VIEWS:
+                self._filtered.popitem(last=False)
+        return sub
+
+    def cache_stats(self):
+        """``(hits, misses)`` of view / filter lookups on this model and its kept filtered views."""
+        with self._lock:
+            subs = list(self._filtered.values())
+        hits, misses = self.hits, self.misses
+        for sub in subs:
+            sub_hits, sub_misses = sub.cache_stats()
+            hits, misses = hits + sub_hits, misses + sub_misses
+        return hits, misses
+
+    def cached_views(self):
+        """``(views, filtered sub-models)`` currently memoized on this model, for memory accounting."""
+        with self._lock:
+            return list(self._views.values()), list(self._filtered.values())
+
+    # ------------------------------
+    # Derived views
+    # ------------------------------
+    def lanes(self, ordering="Original"):
+        """Persona lane order for the swim-lane y axis."""
+        return self._memo(("lanes", ordering),
+                          lambda: persona_lanes(self.personas, self.summary().rollup("persona"), ordering))
+
+    def positioned(self, ordering="Original"):
+        """Frame with x/y swim-lane positions for every touchpoint."""
+        def build():
+            df = self.frame.copy()
+            df["x"], df["y"] = swimlane_positions(df, self.stages, self.lanes(ordering))
+            return df
+        return self._memo(("positioned", ordering), build)
+
+    def clusters(self, ordering="Original", level="Stage × persona"):
+        """Server-side aggregated touchpoints, positioned on the same lanes."""
+        return self._memo(("clusters", ordering, level),
+                          lambda: cluster_touchpoints(self.narrow_frame(), self.stages, self.lanes(ordering), level))
+
+    def theme_counts(self):
+        """Sparse theme × stage mention counts (see ``ThemeStageCounts``)."""
+        def build():
+            if self.parent is not None:
+                return self.parent.theme_counts().subset(self.row_mask)
+            return ThemeStageCounts(self.stages, self.theme_map).add(self.frame)
+        return self._memo(("theme_counts",), build)
+
+    def summary(self):
+        """
+        Weighted aggregates for every weighting mode, from one grouped pass;
+        a date-range view sums its range from the day / week / month rollups
+        of the same filters without the range instead.
+        """
+        def build():
+            if self._date_range is not None:
+                undated, first_day, last_day = self._date_range
+                return WeightedSummary.from_cells(undated.timeline().cells(first_day, last_day),
+                                                  self.narrow_frame()["confidence"].to_numpy(),
+                                                  len(self.stages), len(self.personas))
+            return WeightedSummary(self.narrow_frame(), len(self.stages), len(self.personas))
+        return self._memo(("summary",), build)
+
+    def timeline(self):
+        """Daily / weekly / monthly stage × persona rollups of timestamped touchpoints."""
+        return self._memo(("timeline",), lambda: TimeRollups(self.narrow_frame(), self.stages, self.personas))
+
+    def search_index(self):
+        """Inverted index over labels, quotes, themes and actions (built on the first Evidence query)."""
+        return self._memo(("search_index",), lambda: SearchIndex(self.frame))
+
+    def rankings(self):
+        """
+        ``(by_impact, by_risk)`` row orders: sentiment × frequency descending,
+        and sentiment ascending then frequency descending (both stable).  A
+        filtered model keeps its rows' share of the parent's orders.
+        """
+        def build():
+            if self.parent is not None:
+                renumber = np.cumsum(self.row_mask) - 1
+                return tuple(renumber[order[self.row_mask[order]]] for order in self.parent.rankings())
+            sentiment = self.frame["sentiment"].to_numpy(np.float64)
+            frequency = self.frame["frequency"].to_numpy(np.int64)
+            return np.argsort(-(sentiment * frequency), kind="stable"), np.lexsort((-frequency, sentiment))
+        return self._memo(("rankings",), build)
+
+    def wins_and_risks(self):
+        """Top-2 positive-impact touchpoints and the 3 most negative ones."""
+        def build():
+            by_impact, by_risk = self.rankings()
+            return self.take(by_impact[:2]), self.take(by_risk[:3])
+        return self._memo(("wins_and_risks",), build)
+
+    def handoff_edges(self):
+        """Per-account touchpoint orders behind the hand-offs (see ``HandoffEdges``)."""
+        def build():
+            if self.parent is not None:
+                return self.parent.handoff_edges().subset(self.row_mask)
+            return HandoffEdges(self.frame, self.stages)
+        return self._memo(("handoff_edges",), build)
+
+    def handoffs(self, order="stage"):
+        """One row per persona hand-off within an account, ordered by ``"stage"`` or ``"timestamp"``."""
+        return self._memo(("handoffs", order), lambda: self.handoff_edges().table(order))
+
+    def transitions(self, order="stage"):
+        """Sparse persona → persona ``TransitionMatrix`` of the hand-offs."""
+        return self._memo(("transitions", order), lambda: self.handoff_edges().matrix(order))
+
+    def cube(self):
+        """Pre-aggregated summary cube used by the Compare tab."""
+        return self._memo(("cube",), lambda: SummaryCube(self.narrow_frame(), self.theme_counts(), self.transitions(),
+                                                         len(self.stages), len(self.personas), key=self.key))
+
+    # ------------------------------
+    # Growing datasets
+    # ------------------------------
+    def extended(self, chunk, key):
+        """
+        Model over this model's rows followed by *chunk*.  Stage / persona
+        sums, theme counts and hand-off edges already built here are copied
+        and updated with the new rows only; other views rebuild lazily.
+        """
+        if self.parent is not None:
+            raise ValueError("only an unfiltered model can be extended")
+        frame = append_rows(self.frame, chunk)
+        model = JourneyModel(frame, self.stages, self.personas, self.theme_map, key=key)
+        tail = frame.iloc[len(self.frame):]
+        with self._lock:
+            views = dict(self._views)
+
+        summary = views.get(("summary",))
+        if summary is not None:
+            model._views[("summary",)] = summary.copy().add(tail, len(model.stages), len(model.personas))
+        counts = views.get(("theme_counts",))
+        if counts is not None:
+            grown = counts.copy().add(tail)
+            model._views[("theme_counts",)] = grown
+            if len(grown.pair_key) == len(counts.pair_key) and len(grown.stages) == len(counts.stages):
+                model._view_keys["theme_counts"] = self.view_key("theme_counts")
+        edges = views.get(("handoff_edges",))
+        if edges is not None:
+            model._views[("handoff_edges",)] = edges.copy().add(tail, model.stages)
+        if "timestamp" not in tail.columns or tail["timestamp"].isna().all():
+            model._view_keys["timeline"] = self.view_key("timeline")
+        return model
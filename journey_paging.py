@@ -0,0 +1,83 @@
+"""
+Journey Paging - server-side sorted pages of large tables
+---------------------------------------------------------
+Drill-down tables send one page to the browser instead of the whole frame:
+
+• ``sort_order`` is a stable row order for one column (missing values last
+  in either direction)
+• ``OrderCache`` keeps the orders of recently viewed (table, column,
+  direction) combinations, so paging through a table is a slice; the least
+  recently used orders are dropped past ``max_orders``
+• ``page_bounds`` clamps a 1-based page number to the table
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+TABLE_PAGE_SIZE = 50
+MAX_ORDERS = 32   # sort orders kept per process
+
+
+def sort_order(column, ascending=True):
+    """Row positions ordering *column*; ties keep row order and missing values go last."""
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        values = column.astype(object).to_numpy()   # by label, not by category code
+    else:
+        values = column.to_numpy()
+    missing = pd.isna(values)
+    present = np.flatnonzero(~missing)
+    _, rank = np.unique(values[present], return_inverse=True)
+    order = present[np.lexsort((present, rank if ascending else -rank))]
+    return np.concatenate([order, np.flatnonzero(missing)])
+
+
+def page_bounds(n_rows, page, page_size=TABLE_PAGE_SIZE):
+    """``(start, stop, page, n_pages)`` for a 1-based *page*, clamped to ``1..n_pages``."""
+    n_pages = max(1, -(-n_rows // page_size))
+    page = min(max(int(page), 1), n_pages)
+    start = (page - 1) * page_size
+    return start, min(start + page_size, n_rows), page, n_pages
+
+
+class OrderCache:
+    """Thread-safe LRU of sort orders keyed by (table key, column, ascending)."""
+
+    def __init__(self, max_orders=MAX_ORDERS):
+        self.max_orders = max_orders
+        self.hits = self.misses = 0
+        self._orders = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._orders)
+
+    @property
+    def nbytes(self):
+        with self._lock:
+            return sum(order.nbytes for order in self._orders.values())
+
+    def order(self, table_key, frame, column, ascending=True):
+        """Sorted row positions of *frame* by *column*, computed once per key."""
+        key = (table_key, column, ascending)
+        with self._lock:
+            order = self._orders.get(key)
+            if order is not None:
+                self._orders.move_to_end(key)
+                self.hits += 1
+                return order
+            self.misses += 1
+        order = sort_order(frame[column], ascending)
+        with self._lock:
+            self._orders[key] = order
+            while len(self._orders) > self.max_orders:
+                self._orders.popitem(last=False)
+        return order
+
+    def page(self, table_key, frame, column, ascending=True, page=1, page_size=TABLE_PAGE_SIZE):
+        """``(rows of one page, page, n_pages)`` of *frame* sorted by *column*."""
+        order = self.order(table_key, frame, column, ascending)
+        start, stop, page, n_pages = page_bounds(len(frame), page, page_size)
+        return frame.iloc[order[start:stop]], page, n_pages
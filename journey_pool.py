@@ -0,0 +1,270 @@
+"""
+Journey Pool - shared read-only studies + per-session memory accounting
+-----------------------------------------------------------------------
+One ``StudyPool`` per server process (see ``study_pool`` in Journey.py):
+
+• every opened study / upload / enrichment is loaded once and shared by all
+  sessions as a read-only ``JourneyModel``; sessions keep only their widget
+  state and point at (shared) filtered views
+• studies untouched for ``idle_seconds`` are evicted, and the least recently
+  used ones go first once the pool exceeds ``max_studies`` or ``max_bytes``
+• each session reports itself on every full rerun (study, current view,
+  session-state size), so the admin view can show who holds what
+
+Sizes are estimates: numeric column buffers exactly, object columns and
+index structures from a sample of their elements.  Read-only numeric
+buffers (memory-mapped from the study store) are reported as *mapped*:
+they live in the OS page cache and are shared between server processes.
+"""
+
+import sys
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+SAMPLE_ITEMS = 1_000   # elements sampled per object column / container when estimating sizes
+
+
+# ------------------------------
+# Size estimates
+# ------------------------------
+def _object_nbytes(values):
+    """Pointer array + sampled ``sys.getsizeof`` of its objects (one level into tuples / lists)."""
+    n = len(values)
+    if not n:
+        return 0
+    picks = values if n <= SAMPLE_ITEMS else values[np.linspace(0, n - 1, SAMPLE_ITEMS).astype(np.int64)]
+    seen, sampled = set(), 0
+    for v in picks:
+        for item in (v, *v) if isinstance(v, (tuple, list)) else (v,):
+            if id(item) not in seen:   # objects shared between rows are counted once
+                seen.add(id(item))
+                sampled += sys.getsizeof(item)
+    return int(sampled * n / len(picks)) + values.nbytes
+
+
+def frame_nbytes(frame, deep=True):
+    """
+    ``(owned, mapped)`` bytes of a frame; *mapped* = read-only (memory-mapped)
+    numeric buffers.  ``deep=False`` counts object columns as their pointer
+    arrays only — right for frames derived from another one (filtered views,
+    sorted copies), whose strings / tuples are the base frame's objects.
+    """
+    owned = int(frame.index.memory_usage())
+    mapped = 0
+    for col in frame.columns:
+        series = frame[col]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            owned += series.cat.codes.nbytes
+            if deep:
+                owned += _object_nbytes(series.cat.categories.to_numpy(dtype=object))
+            continue
+        values = series.to_numpy()
+        if values.dtype == object:
+            owned += _object_nbytes(values) if deep else values.nbytes
+        elif values.flags.writeable:
+            owned += values.nbytes
+        else:
+            mapped += values.nbytes
+    return owned, mapped
+
+
+def approx_nbytes(obj, depth=3, seen=None):
+    """Rough size of a derived view (frames, arrays, containers, plain objects); frames count shallow."""
+    seen = set() if seen is None else seen
+    if obj is None or id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    if isinstance(obj, pd.DataFrame):
+        return sum(frame_nbytes(obj, deep=False))
+    if isinstance(obj, pd.Series):
+        return sum(frame_nbytes(obj.to_frame(), deep=False))
+    if isinstance(obj, pd.Index):
+        return sum(frame_nbytes(obj.to_frame(index=False), deep=False))
+    if isinstance(obj, np.ndarray):
+        return _object_nbytes(obj.ravel()) if obj.dtype == object else obj.nbytes
+    if isinstance(obj, (str, bytes, int, float)) or depth <= 0:
+        return sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        items = list(obj.items())
+        picks = items[:SAMPLE_ITEMS]
+        sampled = sum(approx_nbytes(k, depth - 1, seen) + approx_nbytes(v, depth - 1, seen) for k, v in picks)
+        return sys.getsizeof(obj) + (sampled * len(items) // len(picks) if picks else 0)
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        items = list(obj)
+        picks = items[:SAMPLE_ITEMS]
+        sampled = sum(approx_nbytes(v, depth - 1, seen) for v in picks)
+        return sys.getsizeof(obj) + (sampled * len(items) // len(picks) if picks else 0)
+    attrs = getattr(obj, "__dict__", None)
+    if attrs is None:
+        attrs = {name: getattr(obj, name, None) for name in getattr(type(obj), "__slots__", ())}
+    return sys.getsizeof(obj) + sum(approx_nbytes(v, depth - 1, seen) for v in attrs.values()
+                                    if not callable(v) or isinstance(v, np.ndarray))
+
+
+def model_nbytes(model):
+    """``{"frame", "mapped", "views", "filtered"}`` bytes held by a model and its kept filtered views."""
+    # a filtered model only holds its frame once a touchpoint table asked for it
+    owned, mapped = frame_nbytes(model.frame, deep=model.parent is None) if model.frame_built else (0, 0)
+    seen = {id(model.frame)} if model.frame_built else set()
+    views, subs = model.cached_views()
+    filtered = 0
+    for sub in subs:
+        sub_sizes = model_nbytes(sub)
+        filtered += sub_sizes["frame"] + sub_sizes["views"] + sub_sizes["filtered"]
+    return {"frame": owned, "mapped": mapped,
+            "views": sum(approx_nbytes(v, seen=seen) for v in views), "filtered": filtered}
+
+
+# ------------------------------
+# Pool
+# ------------------------------
+class _Resident:
+    __slots__ = ("value", "model", "name", "kind", "loaded", "last_used", "nbytes")
+
+    def __init__(self, value, model, name, kind):
+        self.value, self.model, self.name, self.kind = value, model, name, kind
+        self.loaded = self.last_used = time.time()
+        self.nbytes = sum(frame_nbytes(model.frame)) if model is not None else 0   # for the byte budget
+
+
+class _Session:
+    __slots__ = ("study", "name", "view", "view_rows", "state_bytes", "last_seen")
+
+
+class StudyPool:
+    """Process-wide LRU of loaded studies, plus a registry of the sessions using them."""
+
+    def __init__(self, max_studies=4, max_bytes=None, idle_seconds=1800):
+        self.max_studies = max_studies
+        self.max_bytes = max_bytes
+        self.idle_seconds = idle_seconds
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._loading = {}
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    @property
+    def nbytes(self):
+        """Estimated frame bytes of all resident studies (what ``max_bytes`` limits)."""
+        with self._lock:
+            return sum(e.nbytes for e in self._entries.values())
+
+    def get(self, key, load, name="", kind="study"):
+        """
+        Shared value for *key*, loading it once per process; *load* returns
+        ``(value, model)`` where *model* is the ``JourneyModel`` to account for
+        (or ``None``).
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                key_lock = self._loading.setdefault(key, threading.Lock())
+        if entry is None:
+            with key_lock:   # concurrent sessions opening the same study wait for one load
+                with self._lock:
+                    entry = self._entries.get(key)
+                if entry is None:
+                    value, model = load()
+                    entry = _Resident(value, model, name, kind)
+                    with self._lock:
+                        self._entries[key] = entry
+                        self._loading.pop(key, None)
+        with self._lock:
+            entry.last_used = time.time()
+            self._entries[key] = entry   # re-admit if another session evicted it meanwhile
+            self._entries.move_to_end(key)
+            self._evict(keep=key)
+        return entry.value
+
+    def peek(self, key):
+        """The resident value for *key* or ``None``; never loads, does not refresh its LRU position."""
+        entry = self._entries.get(key)
+        return None if entry is None else entry.value
+
+    def evict(self, key):
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self.evictions += 1
+                return True
+        return False
+
+    def evict_idle(self, idle_seconds=None):
+        """Drop studies idle for *idle_seconds* (default: the pool's limit); returns how many."""
+        with self._lock:
+            return self._evict(idle_seconds=idle_seconds)
+
+    def _evict(self, keep=None, idle_seconds=None):
+        now, limit = time.time(), self.idle_seconds if idle_seconds is None else idle_seconds
+        victims = [k for k, e in self._entries.items() if k != keep and now - e.last_used > limit]
+        for k in victims:
+            del self._entries[k]
+        total = sum(e.nbytes for e in self._entries.values())
+        for k in list(self._entries):   # oldest first
+            over_count = len(self._entries) > self.max_studies
+            over_bytes = self.max_bytes is not None and total > self.max_bytes
+            if not (over_count or over_bytes) or k == keep:
+                continue
+            total -= self._entries.pop(k).nbytes
+            victims.append(k)
+        self.evictions += len(victims)
+        return len(victims)
+
+    # ------------------------------
+    # Sessions
+    # ------------------------------
+    def touch_session(self, session_id, study, name, view, state_bytes):
+        """Record a session's full rerun: its study key + name, current (possibly filtered) view and state size."""
+        record = _Session()
+        record.study, record.name, record.view = study, name, weakref.ref(view)
+        record.view_rows, record.state_bytes, record.last_seen = len(view), state_bytes, time.time()
+        with self._lock:
+            self._sessions[session_id] = record
+            cutoff = record.last_seen - self.idle_seconds
+            for sid in [s for s, r in self._sessions.items() if r.last_seen < cutoff]:
+                del self._sessions[sid]
+
+    def sessions(self):
+        """One row per live session: study, view, view memory (shared with same-filter sessions), state size."""
+        now = time.time()
+        with self._lock:
+            records = list(self._sessions.items())
+        rows = []
+        for sid, r in records:
+            view = r.view()
+            filtered = view is not None and view.parent is not None
+            rows.append({"session": sid[:8], "study": r.name, "view": view.key if filtered else "(unfiltered)",
+                         "view_rows": r.view_rows,
+                         "view_mb": sum(frame_nbytes(view.narrow_frame(), deep=False)) / 2**20 if filtered else 0.0,
+                         "state_kb": r.state_bytes / 1024, "idle_s": now - r.last_seen})
+        return pd.DataFrame(rows, columns=["session", "study", "view", "view_rows", "view_mb", "state_kb", "idle_s"])
+
+    def studies(self):
+        """One row per resident study with its memory breakdown and number of sessions using it."""
+        now = time.time()
+        with self._lock:
+            entries = list(self._entries.items())
+            users = {}
+            for r in self._sessions.values():
+                users[r.study] = users.get(r.study, 0) + 1
+        rows = []
+        for key, e in entries:
+            sizes = model_nbytes(e.model) if e.model is not None else dict.fromkeys(("frame", "mapped", "views",
+                                                                                     "filtered"), 0)
+            rows.append({"key": key, "name": e.name, "kind": e.kind,
+                         "rows": len(e.model) if e.model is not None else 0,
+                         **{f"{k}_mb": v / 2**20 for k, v in sizes.items()},
+                         "sessions": users.get(key, 0), "idle_s": now - e.last_used})
+        return pd.DataFrame(rows, columns=["key", "name", "kind", "rows", "frame_mb", "mapped_mb", "views_mb",
+                                           "filtered_mb", "sessions", "idle_s"])
@@ -0,0 +1,233 @@
+"""
+Journey Report - offline study packs, rendered in parallel
+----------------------------------------------------------
+Renders one self-contained HTML report plus a CSV bundle per study, from the
+same model views and figure builders as the app's tabs:
+
+    python journey_report.py studies/ --out packs/
+    python journey_report.py .journey_cache/studies --workers 8 --weighting Frequency
+
+*studies/* holds journey files (``*.json`` / ``*.jsonl``, as uploaded to the
+app) and/or is a study store directory (``catalog.json`` + ``*.arrow``).
+Each study gets ``<out>/<study id>/``:
+
+• ``report.html`` — Summary KPIs, Executive Brief, stage / persona bars,
+  theme heatmap, hand-off Sankey and hand-off table (Plotly inlined, works
+  offline)
+• ``kpis.csv``, ``stages.csv``, ``personas.csv``, ``themes.csv``,
+  ``handoffs.csv`` — the tables behind them
+
+Studies are spread over a process pool; a line is printed as each one
+finishes and a timing summary at the end.  Models come from the app's
+``build_model`` (journey_demo.py), so a report matches the app's tabs for
+the same study.
+"""
+
+import argparse
+import html
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from journey_aggregate import WEIGHT_MODES
+from journey_demo import build_model
+from journey_export import iter_csv
+from journey_figures import handoff_sankey, persona_engagement_bar, stage_health_bar, theme_heatmap
+from journey_handoffs import HANDOFF_ORDERS
+from journey_ingest import load_journey
+from journey_model import executive_brief
+from journey_store import CATALOG_FILE, StudyStore, study_id_for
+
+STUDY_SUFFIXES = (".json", ".jsonl")
+TOP_THEMES = 12
+SANKEY_TOP_K = 25
+LOW_CONF_THRESHOLD = 0.75
+
+
+# ------------------------------
+# One study (runs in a worker process)
+# ------------------------------
+def find_studies(root):
+    """``[(study id, name, source)]``: journey files in *root*, plus saved studies if it is a study store."""
+    studies = []
+    for name in sorted(os.listdir(root)):
+        if name.endswith(STUDY_SUFFIXES) and name != CATALOG_FILE:
+            studies.append((study_id_for(os.path.splitext(name)[0]), name, os.path.join(root, name)))
+    if os.path.exists(os.path.join(root, CATALOG_FILE)):
+        for sid, entry in StudyStore(root).catalog().items():
+            studies.append((sid, entry["name"], ("store", root, sid)))
+    seen = {}
+    for i, (sid, name, source) in enumerate(studies):   # a file and a saved study may share an id
+        seen[sid] = seen.get(sid, 0) + 1
+        if seen[sid] > 1:
+            studies[i] = (f"{sid}-{seen[sid]}", name, source)
+    return studies
+
+
+def _load(source):
+    """``(model, rejected rows)``, built like the app builds the same study."""
+    if isinstance(source, tuple):
+        _, root, sid = source
+        store = StudyStore(root)
+        return build_model(store.open(sid), key=store.catalog()[sid]["key"]), 0
+    with open(source, "rb") as fh:
+        ingest = load_journey(fh)
+    return (build_model(ingest.frame) if not ingest.frame.empty else None), ingest.n_rejected
+
+
+def _write_csv(frame, path):
+    tmp = f"{path}.{os.getpid()}.part"
+    with open(tmp, "wb") as fh:
+        for block in iter_csv(frame):
+            fh.write(block)
+    os.replace(tmp, path)
+    return os.path.getsize(path)
+
+
+def _markdown_html(text):
+    return re.sub(r"\*\*(.+?)\*\*", r"<b>\1</b>", html.escape(text))
+
+
+def _report_html(name, kpis, brief, figures, handoffs):
+    parts = [f"<!DOCTYPE html><html><head><meta charset='utf-8'><title>{html.escape(name)} — Journey report</title>",
+             "<style>body{font-family:system-ui,sans-serif;margin:2rem auto;max-width:1200px;color:#111}"
+             ".kpis{display:flex;gap:2rem}.kpi b{display:block;font-size:1.8rem}"
+             "table{border-collapse:collapse;font-size:.85rem}td,th{padding:.25rem .6rem;border-bottom:1px solid #ddd}"
+             "th{text-align:left}</style></head><body>",
+             f"<h1>🗺️ {html.escape(name)}</h1>",
+             f"<p>Generated {time.strftime('%Y-%m-%d %H:%M')}</p>",
+             "<h2>Summary</h2><div class='kpis'>"]
+    parts += [f"<div class='kpi'>{html.escape(label)}<b>{html.escape(value)}</b></div>" for label, value in kpis]
+    parts += ["</div>", "<h2>Executive Brief</h2>", f"<p>{_markdown_html(brief)}</p>"]
+    include_js = True   # Plotly inlined once, so the file works offline
+    for title, fig in figures:
+        parts.append(f"<h2>{html.escape(title)}</h2>")
+        if fig is None:
+            parts.append("<p><i>Not available for this study.</i></p>")
+            continue
+        parts.append(fig.to_html(full_html=False, include_plotlyjs=include_js))
+        include_js = False
+    parts += ["<h2>Hand-off Details</h2>",
+              handoffs.to_html(index=False, float_format=lambda v: f"{v:.2f}", border=0, na_rep="—"),
+              "</body></html>"]
+    return "\n".join(parts)
+
+
+def render_study(study_id, name, source, out_dir, weight_mode="Confidence", order="stage",
+                 top_themes=TOP_THEMES, top_k=SANKEY_TOP_K, low_conf=LOW_CONF_THRESHOLD):
+    """Write one study's report bundle; returns a result dict (also on failure)."""
+    start = time.perf_counter()
+    result = {"study": study_id, "name": name, "rows": 0, "rejected": 0, "files": 0, "bytes": 0, "error": None}
+    try:
+        model, result["rejected"] = _load(source)
+        if model is None or not len(model):
+            raise ValueError("no valid touchpoints")
+        result["rows"] = len(model)
+
+        # Summary tab
+        summary = model.summary()
+        avg_sentiment = summary.avg_sentiment(weight_mode)
+        total_mentions = summary.total_mentions
+        coverage = summary.coverage
+        low_conf_share = summary.low_conf_share(low_conf)
+        stage_stats = summary.stage_stats(weight_mode)
+        persona_agg = summary.persona_agg(weight_mode)
+        wins, risks = model.wins_and_risks()
+        brief = executive_brief(avg_sentiment, total_mentions, coverage, wins, risks)
+        kpis = [("Avg Sentiment", f"{avg_sentiment:.2f}"), ("Total Mentions", f"{total_mentions:,}"),
+                ("Coverage", f"{coverage:.0%}"), ("Low-confidence Share", f"{low_conf_share:.0%}")]
+
+        # Themes + Hand-offs tabs
+        counts = model.theme_counts()
+        themes = counts.top(top_themes) if len(counts) else pd.DataFrame()
+        if order == "timestamp" and not model.handoff_edges().n_dated:
+            order = "stage"
+        matrix = model.transitions(order)
+        handoffs = matrix.frame().sort_values("sentiment_delta", kind="stable").reset_index(drop=True)
+
+        figures = [("Stage Health", stage_health_bar(stage_stats)),
+                   ("Persona Engagement", persona_engagement_bar(persona_agg)),
+                   ("Themes × Stages", theme_heatmap(themes) if len(themes) else None),
+                   ("Hand-offs", handoff_sankey(matrix.top(top_k)) if len(matrix) else None)]
+
+        study_dir = os.path.join(out_dir, study_id)
+        os.makedirs(study_dir, exist_ok=True)
+        kpi_values = {"avg_sentiment": avg_sentiment, "total_mentions": total_mentions, "coverage": coverage,
+                      "low_conf_share": low_conf_share, "handoffs": matrix.total, "accounts": matrix.n_accounts}
+        tables = {"kpis.csv": pd.DataFrame({"kpi": list(kpi_values),
+                                            "value": pd.Series(list(kpi_values.values()), dtype=object)}),
+                  "stages.csv": stage_stats, "personas.csv": persona_agg,
+                  "themes.csv": themes.rename_axis("theme").reset_index(), "handoffs.csv": handoffs}
+        sizes = [_write_csv(table, os.path.join(study_dir, file_name)) for file_name, table in tables.items()]
+        report = os.path.join(study_dir, "report.html")
+        tmp = f"{report}.{os.getpid()}.part"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            fh.write(_report_html(name, kpis, brief, figures, handoffs))
+        os.replace(tmp, report)
+        result["files"], result["bytes"] = len(sizes) + 1, sum(sizes) + os.path.getsize(report)
+    except Exception as exc:   # one broken study must not stop the batch
+        result["error"] = f"{type(exc).__name__}: {exc}"
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+# ------------------------------
+# Batch
+# ------------------------------
+def run(root, out_dir, workers=None, **options):
+    """Render every study under *root* across *workers* processes; returns the per-study results."""
+    studies = find_studies(root)
+    if not studies:
+        print(f"no studies in {root}", file=sys.stderr)
+        return []
+    workers = min(workers or os.cpu_count() or 1, len(studies))
+    print(f"Rendering {len(studies)} studies with {workers} worker{'s' if workers > 1 else ''} → {out_dir}",
+          flush=True)
+    start = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(render_study, sid, name, source, out_dir, **options) for sid, name, source in studies]
+        for done, future in enumerate(as_completed(futures), start=1):
+            r = future.result()
+            results.append(r)
+            status = f"✗ {r['error']}" if r["error"] else f"{r['rows']:,} rows · {r['bytes'] / 1024:,.0f} KB"
+            print(f"[{done}/{len(studies)}] {r['name']} · {r['seconds']:.1f} s · {status}", flush=True)
+    wall = time.perf_counter() - start
+
+    table = pd.DataFrame(results).sort_values("seconds", ascending=False)
+    print()
+    print(table[["study", "rows", "rejected", "files", "bytes", "seconds"]]
+          .to_string(index=False, formatters={"seconds": "{:.2f}".format, "rows": "{:,}".format,
+                                              "bytes": "{:,}".format}))
+    busy = table["seconds"].sum()
+    failed = int(table["error"].notna().sum())
+    print(f"\n{len(results) - failed} of {len(results)} studies rendered in {wall:.1f} s wall "
+          f"({busy:.1f} s of study time, {busy / wall if wall else 0:.1f}× parallel) · "
+          f"{table['rows'].sum():,} touchpoints · {table['bytes'].sum() / 2**20:,.1f} MB written")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("studies", help="directory of .json / .jsonl study files, or a study store")
+    parser.add_argument("--out", default="journey_reports")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--weighting", choices=WEIGHT_MODES, default=WEIGHT_MODES[0])
+    parser.add_argument("--order", choices=list(HANDOFF_ORDERS.values()), default="stage",
+                        help="order each account's hand-offs by stage or timestamp")
+    parser.add_argument("--top-themes", type=int, default=TOP_THEMES)
+    parser.add_argument("--sankey-top-k", type=int, default=SANKEY_TOP_K)
+    parser.add_argument("--low-confidence", type=float, default=LOW_CONF_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    results = run(args.studies, args.out, args.workers, weight_mode=args.weighting, order=args.order,
+                  top_themes=args.top_themes, top_k=args.sankey_top_k, low_conf=args.low_confidence)
+    return 1 if not results or any(r["error"] for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+"""
+Journey Search - inverted index over touchpoint evidence
+--------------------------------------------------------
+Built once per dataset: every label, quote, theme and action is tokenized and
+folded into CSR postings (term -> touchpoint ids + field-weighted term
+frequency).  Queries intersect postings with NumPy, score with tf-idf, apply
+persona / stage masks and return one sorted page.
+
+The last query word also matches as a prefix, so results update while typing.
+An empty query is answered by ``browse`` without the index, so the index is
+only built once a query is entered.  Each distinct text is tokenized once.
+"""
+
+import re
+from bisect import bisect_left
+
+import numpy as np
+import pandas as pd
+
+FIELD_WEIGHTS = {"label": 3.0, "themes": 2.0, "quotes": 1.0, "actions": 1.0}
+PAGE_SIZE = 20
+MAX_PREFIX_TERMS = 200   # cap on vocabulary terms a trailing prefix may expand to
+
+_TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text):
+    return _TOKEN.findall(text.lower())
+
+
+def _field_tokens(column):
+    """
+    ``(row positions, distinct tokens, token picks)`` for one evidence column
+    (strings or sequences of strings); each distinct text is tokenized once and
+    ``distinct tokens[token picks]`` lists every token occurrence.
+    """
+    texts = pd.Series(column.to_numpy(object)).explode().dropna()
+    codes, distinct = pd.factorize(texts.astype(str))
+    split = pd.Series(distinct, dtype=object).str.lower().str.findall(_TOKEN.pattern)
+    lengths = split.str.len().to_numpy(np.int64)
+    starts = np.cumsum(lengths) - lengths
+    per_text = lengths[codes]
+    rows = np.repeat(texts.index.to_numpy(np.int64), per_text)
+    within = np.arange(per_text.sum()) - np.repeat(np.cumsum(per_text) - per_text, per_text)
+    return rows, split.explode().dropna().to_numpy(object), np.repeat(starts[codes], per_text) + within
+
+
+class SearchIndex:
+    """CSR inverted index over the evidence fields of a touchpoint frame."""
+
+    def __init__(self, frame):
+        self.n_docs = len(frame)
+        docs, tokens, picks, weights = [], [], [], []
+        for field, weight in FIELD_WEIGHTS.items():
+            if field not in frame.columns:
+                continue
+            rows, distinct, pick = _field_tokens(frame[field])
+            docs.append(rows)
+            picks.append(pick + sum(len(t) for t in tokens))
+            tokens.append(distinct)
+            weights.append(np.full(len(rows), weight))
+        ids, uniques = pd.factorize(np.concatenate(tokens) if tokens else np.empty(0, dtype=object))
+        vocab = dict(zip(uniques, range(len(uniques))))
+        terms = ids.astype(np.int64)[np.concatenate(picks)] if picks else np.empty(0, dtype=np.int64)
+        docs = np.concatenate(docs) if docs else np.empty(0, dtype=np.int64)
+
+        # merge repeated (term, doc) pairs, summing their field weights
+        pair, inverse = np.unique(terms * max(self.n_docs, 1) + docs, return_inverse=True)
+        tf = np.bincount(inverse, weights=np.concatenate(weights) if weights else None,
+                         minlength=len(pair)).astype(np.float32)
+        pair_terms = pair // max(self.n_docs, 1)
+
+        self.vocab = vocab
+        self.sorted_terms = sorted(vocab)
+        self.postings = (pair % max(self.n_docs, 1)).astype(np.int32)
+        self.tf = tf
+        self.indptr = np.searchsorted(pair_terms, np.arange(len(vocab) + 1))
+        doc_freq = np.diff(self.indptr)
+        self.idf = np.log1p(self.n_docs / np.maximum(doc_freq, 1)).astype(np.float32)
+
+    def _term_scores(self, term_id):
+        lo, hi = self.indptr[term_id], self.indptr[term_id + 1]
+        return self.postings[lo:hi], self.tf[lo:hi] * self.idf[term_id]
+
+    def _prefix_terms(self, prefix):
+        start = bisect_left(self.sorted_terms, prefix)
+        out = []
+        for term in self.sorted_terms[start:start + MAX_PREFIX_TERMS]:
+            if not term.startswith(prefix):
+                break
+            out.append(self.vocab[term])
+        return out
+
+    def scores(self, query):
+        """Dense score per touchpoint (NaN = no match); ``None`` for an empty query."""
+        tokens = tokenize(query)
+        if not tokens:
+            return None
+        total = np.zeros(self.n_docs, dtype=np.float32)
+        matched = np.ones(self.n_docs, dtype=bool)
+        for i, token in enumerate(tokens):
+            last = i == len(tokens) - 1
+            term_ids = self._prefix_terms(token) if last else [self.vocab[token]] if token in self.vocab else []
+            hit = np.zeros(self.n_docs, dtype=bool)
+            for term_id in term_ids:
+                docs, score = self._term_scores(term_id)
+                total[docs] += score   # docs are unique within one posting list
+                hit[docs] = True
+            matched &= hit
+        return np.where(matched, total, np.nan)
+
+    def search(self, query, mask=None, order_by=None, page=0, page_size=PAGE_SIZE):
+        """
+        One page of ``(positions, scores, n_matches)`` for *query*.
+
+        *mask* is an optional boolean filter over touchpoints.  With an empty
+        query this is ``browse`` (all masked touchpoints, ranked by *order_by*).
+        """
+        scores = self.scores(query)
+        if scores is None:
+            return browse(self.n_docs, mask, order_by, page, page_size)
+        hits = ~np.isnan(scores)
+        if mask is not None:
+            hits &= mask
+        return _rank_page(scores, hits, page, page_size)
+
+
+def browse(n_docs, mask=None, order_by=None, page=0, page_size=PAGE_SIZE):
+    """
+    The page an empty query shows: masked touchpoints ranked by *order_by*
+    (e.g. frequency), highest first.  Needs no index, so the Evidence tab
+    only builds one once something is typed.
+    """
+    scores = np.zeros(n_docs, dtype=np.float32) if order_by is None else np.asarray(order_by, dtype=np.float32)
+    hits = np.ones(n_docs, dtype=bool) if mask is None else np.asarray(mask, dtype=bool).copy()
+    return _rank_page(scores, hits, page, page_size)
+
+
+def _rank_page(scores, hits, page, page_size):
+    candidates = np.flatnonzero(hits)
+    n_matches = len(candidates)
+    stop = min((page + 1) * page_size, n_matches)
+    start = min(page * page_size, stop)
+    if not n_matches:
+        return candidates, scores[candidates], 0
+    cand_scores = scores[candidates]
+    if stop < n_matches:
+        # k-th best score, then ties broken by position so pages never overlap
+        kth = np.partition(cand_scores, n_matches - stop)[n_matches - stop]
+        above = np.flatnonzero(cand_scores > kth)
+        ties = np.flatnonzero(cand_scores == kth)[:stop - len(above)]
+        top = np.concatenate([above, ties])
+    else:
+        top = np.arange(n_matches)
+    top = top[np.lexsort((top, -cand_scores[top]))][start:stop]
+    return candidates[top], cand_scores[top], n_matches
+
+
+def category_mask(column, selected):
+    """Boolean mask for rows of a categorical *column* whose value is in *selected*."""
+    codes = column.cat.codes.to_numpy()
+    wanted = np.zeros(len(column.cat.categories) + 1, dtype=bool)
+    wanted[column.cat.categories.get_indexer(pd.Index(list(selected)))] = True
+    wanted[-1] = False  # unknown selections / missing codes (-1) never match
+    return wanted[codes]
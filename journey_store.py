@@ -0,0 +1,153 @@
+"""
+Journey Store - memory-mapped columnar study store
+-------------------------------------------------
+Saved studies live in one directory:
+
+• ``<study_id>.<version>.arrow`` — the touchpoint frame as an uncompressed
+  Arrow IPC file (categoricals as dictionary columns); every save writes a
+  new file, so one that another process has memory-mapped is never rewritten
+• ``catalog.json`` — study id → name, schema version, row count, file size,
+  dataset key and save time
+
+Opening a study memory-maps its file: numeric columns become zero-copy,
+read-only views over the OS page cache, so every server process that opens
+the same study shares those pages instead of holding its own copy.  Only
+text and list columns are materialized as Python objects.  Studies saved
+with an older schema version are upgraded on open (``_MIGRATIONS``).
+"""
+
+import json
+import os
+import re
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+STORE_SCHEMA_VERSION = 3    # 2: optional touchpoint timestamp, 3: optional account
+CATALOG_FILE = "catalog.json"
+LIST_COLUMNS = ("quotes", "themes", "actions")
+
+
+def study_id_for(name):
+    """Filesystem-safe id derived from a study name."""
+    return re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-") or "study"
+
+
+def _tuples(column):
+    """List column → tuples of strings (the in-memory form ``journey_ingest`` produces)."""
+    column = column.combine_chunks()
+    values = column.values.to_numpy(zero_copy_only=False).tolist()
+    offsets = column.offsets.to_numpy().tolist()
+    return [tuple(values[a:b]) for a, b in zip(offsets[:-1], offsets[1:])]
+
+
+def _add_timestamp(frame):
+    return frame.assign(timestamp=np.full(len(frame), np.datetime64("NaT"), dtype="datetime64[ns]"))
+
+
+def _add_account(frame):
+    frame.insert(frame.columns.get_loc("industry") + 1, "account",
+                 pd.Categorical.from_codes(np.full(len(frame), -1), categories=[]))
+    return frame
+
+
+# schema version → upgrade of a frame saved with that version (applied in order on open)
+_MIGRATIONS = {1: _add_timestamp, 2: _add_account}
+
+
+class StudyStore:
+    """Directory of Arrow study files plus a JSON catalog."""
+
+    def __init__(self, root):
+        self.root = str(root)
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, name):
+        return os.path.join(self.root, name)
+
+    def catalog(self):
+        """``{study_id: entry}`` for every saved study (entries are plain dicts)."""
+        try:
+            with open(self._path(CATALOG_FILE), encoding="utf-8") as fh:
+                return json.load(fh)["studies"]
+        except FileNotFoundError:
+            return {}
+
+    def _write_catalog(self, studies):
+        tmp = self._path(f"{CATALOG_FILE}.{os.getpid()}.part")
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump({"schema_version": STORE_SCHEMA_VERSION, "studies": studies}, fh, indent=2, ensure_ascii=False)
+        os.replace(tmp, self._path(CATALOG_FILE))
+
+    def __contains__(self, study_id):
+        return study_id in self.catalog()
+
+    def save(self, name, frame, key, study_id=None, replace=False):
+        """
+        Write *frame* as a new study and record it in the catalog; returns
+        ``(study_id, entry)``.  The id defaults to one derived from *name*,
+        suffixed ``-2``, ``-3``… if taken.  An explicit *study_id* that is
+        taken raises ``ValueError`` unless *replace*: then the catalog entry
+        is swapped to the new file and the old file removed.
+        """
+        studies = self.catalog()
+        if study_id is None:
+            base, n = study_id_for(name), 1
+            study_id = base
+            while study_id in studies:
+                n += 1
+                study_id = f"{base}-{n}"
+        elif study_id in studies and not replace:
+            raise ValueError(f"study '{study_id}' already exists")
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}),
+                                               b"journey_schema_version": str(STORE_SCHEMA_VERSION).encode()})
+        file_name = f"{study_id}.{time.time_ns():x}.arrow"
+        tmp = self._path(f"{file_name}.{os.getpid()}.part")
+        with pa.OSFile(tmp, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        os.replace(tmp, self._path(file_name))
+
+        entry = {"name": name, "file": file_name, "schema_version": STORE_SCHEMA_VERSION,
+                 "rows": len(frame), "nbytes": os.path.getsize(self._path(file_name)),
+                 "key": key, "saved": time.strftime("%Y-%m-%dT%H:%M:%S")}
+        studies = self.catalog()
+        old = studies.get(study_id)
+        studies[study_id] = entry
+        self._write_catalog(studies)
+        if old is not None and old["file"] != file_name:
+            self._remove(old["file"])
+        return study_id, entry
+
+    def open(self, study_id):
+        """Memory-mapped frame for a saved study."""
+        entry = self.catalog()[study_id]
+        if entry["schema_version"] > STORE_SCHEMA_VERSION:
+            raise ValueError(f"study '{study_id}' has schema version {entry['schema_version']}, "
+                             f"newer than this app's {STORE_SCHEMA_VERSION}")
+        source = pa.memory_map(self._path(entry["file"]), "r")
+        table = pa.ipc.open_file(source).read_all()
+        frame = table.drop_columns([c for c in LIST_COLUMNS if c in table.column_names]) \
+                     .to_pandas(split_blocks=True)
+        for loc, col in enumerate(table.column_names):
+            if col in LIST_COLUMNS:
+                frame.insert(loc, col, pd.Series(_tuples(table[col]), dtype=object))
+        for version in range(entry["schema_version"], STORE_SCHEMA_VERSION):
+            frame = _MIGRATIONS[version](frame)
+        return frame
+
+    def delete(self, study_id):
+        studies = self.catalog()
+        entry = studies.pop(study_id, None)
+        if entry is not None:
+            self._write_catalog(studies)
+            self._remove(entry["file"])
+
+    def _remove(self, file_name):
+        """Delete a study file no longer in the catalog; where it is still mapped (Windows) it is left behind."""
+        try:
+            os.remove(self._path(file_name))
+        except OSError:
+            pass
@@ -0,0 +1,141 @@
+"""
+Journey Themes - sparse, incremental theme × stage counts
+---------------------------------------------------------
+Touchpoints are expanded once into (row, theme, stage, mentions) pairs and
+folded into sparse counts keyed by ``theme_id * STAGE_SLOTS + stage_id``.
+New touchpoints are merged in with ``add``; filtered views re-sum only the
+pairs of the selected rows.  ``top`` densifies just the N most-mentioned
+themes for the heatmap.
+
+A touchpoint's themes come from its own ``themes`` column (as uploaded or
+as written by enrichment); the label → themes map only fills in rows that
+have none.  Theme names are lower-cased so "SOC2 evidence" and
+"soc2 evidence" are one theme.
+"""
+
+import numpy as np
+import pandas as pd
+
+STAGE_SLOTS = 1 << 20   # key stride; stages can be appended without re-keying
+
+
+def normalize_theme(theme):
+    return " ".join(theme.lower().split())
+
+
+class ThemeStageCounts:
+    """Sparse theme × stage mention counts over a growing touchpoint frame."""
+
+    def __init__(self, stages, theme_map=None):
+        self.stages = list(stages)
+        self._stage_ids = {s: i for i, s in enumerate(self.stages)}
+        self.theme_map = {label: tuple(dict.fromkeys(normalize_theme(t) for t in themes))
+                          for label, themes in (theme_map or {}).items()}
+        self.themes = []
+        self._theme_ids = {}
+        self.n_rows = 0
+        self.pair_row = np.empty(0, dtype=np.int64)
+        self.pair_key = np.empty(0, dtype=np.int64)
+        self.pair_mentions = np.empty(0, dtype=np.float64)
+        self.keys = np.empty(0, dtype=np.int64)
+        self.values = np.empty(0, dtype=np.float64)
+
+    def __len__(self):
+        """Number of non-zero (theme, stage) cells."""
+        return len(self.keys)
+
+    def _theme_id(self, theme):
+        tid = self._theme_ids.get(theme)
+        if tid is None:
+            tid = self._theme_ids[theme] = len(self.themes)
+            self.themes.append(theme)
+        return tid
+
+    def _stage_id(self, stage):
+        sid = self._stage_ids.get(stage)
+        if sid is None:
+            sid = self._stage_ids[stage] = len(self.stages)
+            self.stages.append(stage)
+        return sid
+
+    def add(self, frame):
+        """Fold touchpoints appended to the frame (rows ``n_rows..``) into the counts."""
+        labels = frame["label"].to_numpy()
+        row_themes = frame["themes"].to_numpy() if "themes" in frame.columns else [()] * len(frame)
+        stage_ids = np.array([self._stage_id(s) for s in frame["stage"].astype(str)], dtype=np.int64)
+        mentions = frame["frequency"].to_numpy(np.float64)
+
+        rows, theme_ids = [], []
+        for i, (label, own) in enumerate(zip(labels, row_themes)):
+            themes = dict.fromkeys(normalize_theme(t) for t in own) or self.theme_map.get(label, ())
+            for theme in themes:
+                rows.append(i)
+                theme_ids.append(self._theme_id(theme))
+        rows = np.asarray(rows, dtype=np.int64)
+        keys = np.asarray(theme_ids, dtype=np.int64) * STAGE_SLOTS + stage_ids[rows]
+
+        self.pair_row = np.concatenate([self.pair_row, rows + self.n_rows])
+        self.pair_key = np.concatenate([self.pair_key, keys])
+        self.pair_mentions = np.concatenate([self.pair_mentions, mentions[rows]])
+        self.n_rows += len(frame)
+        self.keys, self.values = _sum_by_key(np.concatenate([self.keys, keys]),
+                                             np.concatenate([self.values, mentions[rows]]))
+        return self
+
+    def copy(self):
+        """Independent counts to ``add`` to (arrays are replaced on add, so they are shared)."""
+        dup = ThemeStageCounts.__new__(ThemeStageCounts)
+        dup.__dict__.update(self.__dict__)
+        dup.stages, dup._stage_ids = list(self.stages), dict(self._stage_ids)
+        dup.themes, dup._theme_ids = list(self.themes), dict(self._theme_ids)
+        return dup
+
+    def subset(self, mask):
+        """New counts over only the rows where *mask* is True (rows renumbered)."""
+        mask = np.asarray(mask, dtype=bool)
+        keep = mask[self.pair_row]
+        sub = ThemeStageCounts.__new__(ThemeStageCounts)
+        sub.stages, sub._stage_ids = list(self.stages), dict(self._stage_ids)
+        sub.theme_map, sub.themes, sub._theme_ids = self.theme_map, list(self.themes), dict(self._theme_ids)
+        sub.n_rows = int(mask.sum())
+        sub.pair_row = (np.cumsum(mask) - 1)[self.pair_row[keep]]
+        sub.pair_key = self.pair_key[keep]
+        sub.pair_mentions = self.pair_mentions[keep]
+        sub.keys, sub.values = _sum_by_key(sub.pair_key, sub.pair_mentions)
+        return sub
+
+    def cells(self, mask=None):
+        """``(keys, values)`` for all rows, or only rows where *mask* is True."""
+        if mask is None:
+            return self.keys, self.values
+        keep = np.asarray(mask)[self.pair_row]
+        return _sum_by_key(self.pair_key[keep], self.pair_mentions[keep])
+
+    def theme_totals(self, mask=None):
+        keys, values = self.cells(mask)
+        return np.bincount(keys // STAGE_SLOTS, weights=values, minlength=len(self.themes))
+
+    def top(self, n, mask=None):
+        """Dense (top-*n* themes × stages) frame, themes ordered by total mentions."""
+        keys, values = self.cells(mask)
+        totals = np.bincount(keys // STAGE_SLOTS, weights=values, minlength=len(self.themes))
+        present = np.flatnonzero(totals)
+        if len(present) > n:
+            present = present[np.argpartition(-totals[present], n - 1)[:n]]
+        top_ids = present[np.lexsort((present, -totals[present]))]
+
+        slot = np.full(len(self.themes), -1, dtype=np.int64)
+        slot[top_ids] = np.arange(len(top_ids))
+        theme_slot = slot[keys // STAGE_SLOTS]
+        sel = theme_slot >= 0
+        dense = np.zeros((len(top_ids), len(self.stages)), dtype=np.int64)
+        dense[theme_slot[sel], keys[sel] % STAGE_SLOTS] = values[sel]
+        return pd.DataFrame(dense, index=[self.themes[i] for i in top_ids], columns=self.stages)
+
+
+def _sum_by_key(keys, values):
+    """Sorted unique keys with summed values (zero cells dropped)."""
+    uniq, inverse = np.unique(keys, return_inverse=True)
+    sums = np.bincount(inverse, weights=values, minlength=len(uniq))
+    nonzero = sums != 0
+    return uniq[nonzero], sums[nonzero]
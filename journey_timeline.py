@@ -0,0 +1,156 @@
+"""
+Journey Timeline - daily / weekly / monthly rollups
+---------------------------------------------------
+Built once per dataset from the timestamped touchpoints:
+
+• a daily table of stage × persona × day sums for every weight column
+  (``journey_aggregate.weight_columns``), sorted by day
+• weekly and monthly tables rolled up from the daily one
+
+A date-range query takes whole buckets from the coarse table and only the
+partial buckets at the range edges from the daily table, so a range on a
+multi-year study reads a few thousand rollup rows, never the touchpoints.
+``cells`` answers the Summary KPIs and bars of a date-range view this way
+(see ``JourneyModel.summary``).
+
+Days are UTC calendar days (ints, days since 1970-01-01); weeks start on
+Monday.
+"""
+
+import numpy as np
+import pandas as pd
+
+from journey_aggregate import weight_columns
+
+GRANULARITIES = ("Day", "Week", "Month")
+
+
+def to_day(value):
+    """Days since the epoch for a date / datetime / datetime64."""
+    return int(np.datetime64(value, "D").astype(np.int64))
+
+
+def bucket_start(days, granularity):
+    """First day of the bucket holding each day."""
+    days = np.asarray(days, dtype=np.int64)
+    if granularity == "Day":
+        return days
+    if granularity == "Week":
+        return days - (days + 3) % 7   # 1970-01-01 was a Thursday
+    return days.astype("datetime64[D]").astype("datetime64[M]").astype("datetime64[D]").astype(np.int64)
+
+
+def bucket_end(starts, granularity):
+    """First day after each bucket (exclusive end)."""
+    starts = np.asarray(starts, dtype=np.int64)
+    if granularity == "Day":
+        return starts + 1
+    if granularity == "Week":
+        return starts + 7
+    return (starts.astype("datetime64[D]").astype("datetime64[M]") + 1).astype("datetime64[D]").astype(np.int64)
+
+
+class _Rollup:
+    """One granularity: bucket start day, stage / persona codes and a sums matrix, sorted by start."""
+
+    __slots__ = ("start", "stage", "persona", "sums")
+
+    def __init__(self, start, stage, persona, sums, n_personas, n_cells):
+        key = (start - (start.min() if len(start) else 0)) * n_cells + stage * n_personas + persona
+        uniq, first, inverse = np.unique(key, return_index=True, return_inverse=True)
+        self.start, self.stage, self.persona = start[first], stage[first], persona[first]
+        self.sums = np.column_stack([np.bincount(inverse, weights=sums[:, j], minlength=len(uniq))
+                                     for j in range(sums.shape[1])]) if len(uniq) else sums[:0]
+
+    def rows(self, first_day, end_day):
+        """Row slice of buckets starting in ``[first_day, end_day)``."""
+        return slice(*np.searchsorted(self.start, [first_day, end_day], side="left"))
+
+
+class TimeRollups:
+    """Stage × persona sums per day, week and month."""
+
+    def __init__(self, frame, stages, personas):
+        stamps = frame["timestamp"].to_numpy() if "timestamp" in frame.columns else np.empty(0, "datetime64[ns]")
+        valid = ~np.isnat(stamps)
+        self.n_rows = int(valid.sum())
+        self.stages, self.personas = list(stages), list(personas)
+        timed = frame[valid]
+        cols = weight_columns(timed)
+        self.columns = list(cols)
+        days = stamps[valid].astype("datetime64[D]").astype(np.int64)
+        stage = pd.Categorical(timed["stage"], categories=self.stages).codes.astype(np.int64)
+        persona = pd.Categorical(timed["persona"], categories=self.personas).codes.astype(np.int64)
+        sums = np.column_stack([cols[c].astype(np.float64) for c in self.columns])
+
+        n_p, n_cells = len(self.personas), len(self.stages) * len(self.personas)
+        daily = _Rollup(days, stage, persona, sums, n_p, n_cells)
+        self.levels = {"Day": daily}
+        for g in GRANULARITIES[1:]:
+            self.levels[g] = _Rollup(bucket_start(daily.start, g), daily.stage, daily.persona, daily.sums,
+                                     n_p, n_cells)
+        self._daily_bucket = {g: bucket_start(daily.start, g) for g in GRANULARITIES}
+        self.first_day = int(days.min()) if len(days) else None
+        self.last_day = int(days.max()) if len(days) else None
+
+    def __len__(self):
+        return sum(len(level.start) for level in self.levels.values())
+
+    def _cover(self, granularity, first_day, last_day):
+        """``[(level, bucket per row, row slice), …]`` covering days ``first_day..last_day``."""
+        end_day = last_day + 1
+        first_full = first_day if bucket_start(first_day, granularity) == first_day \
+            else int(bucket_end(bucket_start(first_day, granularity), granularity))
+        last_full_end = int(bucket_start(end_day, granularity))
+        daily, by_bucket = self.levels["Day"], self._daily_bucket[granularity]
+        if granularity == "Day" or first_full >= last_full_end:
+            return [(daily, by_bucket, daily.rows(first_day, end_day))]
+        level = self.levels[granularity]
+        return [(daily, by_bucket, daily.rows(first_day, first_full)),
+                (level, level.start, level.rows(first_full, last_full_end)),
+                (daily, by_bucket, daily.rows(last_full_end, end_day))]
+
+    def totals(self, first_day, last_day):
+        """Summed weight columns over a day range (monthly buckets + daily edges)."""
+        parts = self._cover("Month", first_day, last_day)
+        total = sum(level.sums[rows].sum(axis=0) for level, _, rows in parts)
+        return pd.Series(total, index=self.columns)
+
+    def cells(self, first_day, last_day):
+        """Stage × persona sums over a day range, shaped like ``WeightedSummary.cells`` (only non-empty cells)."""
+        parts = self._cover("Month", first_day, last_day)
+        n_p = len(self.personas)
+        key = np.concatenate([level.stage[rows] * n_p + level.persona[rows] for level, _, rows in parts])
+        sums = np.concatenate([level.sums[rows] for level, _, rows in parts])
+        uniq, inverse = np.unique(key, return_inverse=True)
+        table = pd.DataFrame({c: np.bincount(inverse, weights=sums[:, j], minlength=len(uniq))
+                              for j, c in enumerate(self.columns)},
+                             index=pd.MultiIndex.from_arrays(
+                                 [pd.Categorical.from_codes(uniq // n_p, categories=self.stages),
+                                  pd.Categorical.from_codes(uniq % n_p, categories=self.personas)],
+                                 names=["stage", "persona"]))
+        return table.astype({"mentions": np.int64, "n": np.int64})
+
+    def series(self, granularity, first_day, last_day, mode, split=None):
+        """
+        ``period, [split], mentions, avg_sentiment`` per bucket in the day range;
+        *split* is ``None``, ``"stage"`` or ``"persona"``.
+        """
+        parts = self._cover(granularity, first_day, last_day)
+        bucket = np.concatenate([b[rows] for _, b, rows in parts])
+        names = {"stage": self.stages, "persona": self.personas}.get(split)
+        group = np.concatenate([getattr(level, split)[rows] for level, _, rows in parts]) if split \
+            else np.zeros(len(bucket), dtype=np.int64)
+        picks = [self.columns.index(c) for c in ("mentions", f"w_{mode}", f"sw_{mode}")]
+        sums = np.concatenate([level.sums[rows][:, picks] for level, _, rows in parts])
+
+        n_groups = len(names) if split else 1
+        key = (bucket - (bucket.min() if len(bucket) else 0)) * n_groups + group
+        uniq, first, inverse = np.unique(key, return_index=True, return_inverse=True)
+        mentions, w, sw = (np.bincount(inverse, weights=sums[:, j], minlength=len(uniq)) for j in range(3))
+        out = pd.DataFrame({"period": bucket[first].astype("datetime64[D]"),
+                            "mentions": mentions.astype(np.int64),
+                            "avg_sentiment": sw / np.where(w > 0, w, np.nan)})
+        if split:
+            out.insert(1, split, pd.Categorical.from_codes(group[first], categories=names))
+        return out
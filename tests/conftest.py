@@ -0,0 +1,23 @@
+"""Puts the repository's flat ``journey_*`` modules on ``sys.path``; shared fixtures."""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from journey_bench import synthetic_frame  # noqa: E402
+
+
+@pytest.fixture
+def touchpoints():
+    """2,000 synthetic touchpoints; some without account, timestamp or themes, one with upper-case themes."""
+    frame = synthetic_frame(2_000, seed=7)
+    frame.loc[frame.index % 17 == 0, "account"] = np.nan
+    frame.loc[frame.index % 13 == 0, "timestamp"] = pd.NaT
+    frame.loc[frame.index % 11 == 0, "themes"] = pd.Series([()] * len(frame), dtype=object)
+    frame.at[5, "themes"] = tuple(t.upper() for t in frame.at[5, "themes"])
+    return frame
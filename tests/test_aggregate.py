@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from journey_aggregate import MIN_WEIGHT, WEIGHT_MODES, WeightedSummary
+from journey_demo import build_model
+from journey_filters import FilterSpec
+
+
+def weights(frame, mode):
+    if mode == "Confidence":
+        return frame["confidence"].astype(np.float64).clip(lower=MIN_WEIGHT)
+    if mode == "Frequency":
+        return frame["frequency"].astype(np.float64).clip(lower=MIN_WEIGHT)
+    return pd.Series(1.0, index=frame.index)
+
+
+def reference_means(frame, by, mode):
+    """Weighted mean sentiment per *by* group, one ``np.average`` per group."""
+    columns = ["sentiment", "confidence", "frequency"]
+    return frame.groupby(by, observed=True)[columns].apply(
+        lambda g: np.average(g["sentiment"].astype(np.float64), weights=weights(g, mode)))
+
+
+def assert_matches_rows(summary, frame, n_stages, n_personas):
+    for mode in WEIGHT_MODES:
+        overall = np.average(frame["sentiment"].astype(np.float64), weights=weights(frame, mode))
+        assert summary.avg_sentiment(mode) == pytest.approx(overall)
+        for by, table in (("stage", summary.stage_stats(mode)), ("persona", summary.persona_agg(mode))):
+            got = table.set_index(by)["avg_sentiment"]
+            want = reference_means(frame, by, mode)
+            assert sorted(got.index) == sorted(want.index.astype(str))
+            np.testing.assert_allclose(got.loc[want.index.astype(str)], want)
+    assert summary.total_mentions == int(frame["frequency"].sum())
+    assert summary.coverage == len(frame.groupby(["stage", "persona"], observed=True)) / (n_stages * n_personas)
+    assert summary.low_conf_share(0.75) == pytest.approx((frame["confidence"] < np.float32(0.75)).mean())
+    mentions = summary.persona_agg("Equal").set_index("persona")["total_mentions"]
+    want = frame.groupby("persona", observed=True)["frequency"].sum()
+    assert mentions.loc[want.index.astype(str)].tolist() == want.tolist()
+
+
+def test_summary_matches_groupby_weighted_means(touchpoints):
+    assert_matches_rows(WeightedSummary(touchpoints, 10, 8), touchpoints, 10, 8)
+
+
+def test_added_rows_match_one_pass(touchpoints):
+    head, tail = touchpoints.iloc[:1_500], touchpoints.iloc[1_500:]
+    grown = WeightedSummary(head, 10, 8).copy().add(tail, 10, 8)
+    assert_matches_rows(grown, touchpoints, 10, 8)
+
+
+def test_persona_agg_orders_by_mentions(touchpoints):
+    mentions = WeightedSummary(touchpoints, 10, 8).persona_agg("Confidence")["total_mentions"]
+    assert mentions.is_monotonic_increasing
+
+
+def test_date_range_view_matches_its_rows(touchpoints):
+    model = build_model(touchpoints)
+    first, last = np.datetime64("2023-03-17", "ns"), np.datetime64("2024-02-04", "ns") - 1
+    for spec in (FilterSpec(dates=(first, last)),
+                 FilterSpec(personas=("Persona A", "Persona C"), dates=(first, last))):
+        view = model.filtered(spec)
+        assert_matches_rows(view.summary(), view.frame, len(view.stages), len(view.personas))
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from journey_compare import UNDATED, compare_handoffs, compare_kpis, compare_themes, month_periods
+from journey_demo import build_model
+
+
+def test_periods_are_calendar_months_plus_undated(touchpoints):
+    periods = month_periods(touchpoints)
+    assert periods.categories[-1] == UNDATED and list(periods.categories[:-1]) == sorted(periods.categories[:-1])
+    months = touchpoints["timestamp"].dt.strftime("%Y-%m").fillna(UNDATED)
+    assert list(periods.astype(str)) == months.tolist()
+    assert UNDATED not in month_periods(touchpoints.dropna(subset=["timestamp"])).categories
+
+
+def test_cube_totals_match_rows_per_period(touchpoints):
+    model = build_model(touchpoints)
+    cube = model.cube()
+    months = touchpoints["timestamp"].dt.strftime("%Y-%m").fillna(UNDATED)
+    for period in (None, "2023-06", UNDATED):
+        rows = touchpoints if period is None else touchpoints[months == period]
+        totals = cube.totals(period)
+        assert (totals["n"], totals["mentions"]) == (len(rows), rows["frequency"].sum())
+        weights = rows["frequency"].astype(np.float64)
+        assert cube.avg_sentiment("Frequency", period) == pytest.approx(
+            np.average(rows["sentiment"].astype(np.float64), weights=weights))
+        cells = rows.groupby(["stage", "persona"], observed=True).ngroups
+        assert cube.coverage(period) == cells / (len(model.stages) * len(model.personas))
+
+
+def test_theme_mentions_match_the_heatmap_counts(touchpoints):
+    model = build_model(touchpoints)
+    mentions = model.cube().theme_mentions()
+    counts = model.theme_counts()
+    totals = pd.Series(counts.theme_totals(), index=counts.themes)
+    assert mentions.to_dict() == totals[totals > 0].to_dict()
+
+
+def test_comparisons_are_against_the_first_study(touchpoints):
+    cubes = {"Base": build_model(touchpoints).cube(),
+             "Later": build_model(touchpoints[touchpoints["sentiment"] > 0].reset_index(drop=True)).cube()}
+    kpis = compare_kpis(cubes, "Equal")
+    assert kpis.loc["Base", "Δ sentiment"] == 0
+    assert kpis.loc["Later", "Δ mentions"] == kpis.loc["Later", "mentions"] - kpis.loc["Base", "mentions"]
+    shares = compare_themes(cubes, top_n=5)
+    assert len(shares) == 5 and (shares.sum() <= 1 + 1e-9).all()
+    handoffs = compare_handoffs(cubes)
+    assert handoffs["Base hand-offs"].sum() == cubes["Base"].handoffs["n"].sum()
+    np.testing.assert_allclose(handoffs["shift"], handoffs["Later Δ"] - handoffs["Base Δ"])
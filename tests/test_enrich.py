@@ -0,0 +1,96 @@
+import asyncio
+
+import pandas as pd
+
+from journey_enrich import EnrichmentCache, StubEnrichmentClient, enrich_frame, enrich_texts
+from journey_ingest import frame_from_records
+from journey_themes import ThemeStageCounts
+
+TEXTS = [
+    "Real-time alerts replace manual checks",
+    "Legacy questionnaires slow onboarding",
+    "Scorecards drive vendor consolidation",
+    "Board pressure to modernize",
+    "Savings from faster onboarding",
+]
+FAST = {"requests_per_minute": 0, "backoff": 0.0}
+
+
+def run(texts, client, cache, **options):
+    return asyncio.run(enrich_texts(texts, client, cache, **{**FAST, **options}))
+
+
+def test_batches_then_serves_rerun_from_cache(tmp_path):
+    cache = EnrichmentCache(tmp_path / "enrich.sqlite")
+    client = StubEnrichmentClient()
+    results, stats = run(TEXTS, client, cache, batch_size=2)
+    assert set(results) == set(TEXTS)
+    assert (stats.requests, client.calls, stats.cache_hits) == (3, 3, 0)
+    assert all(-1 <= r["sentiment"] <= 1 and r["emoji"] for r in results.values())
+
+    rerun, stats = run(TEXTS + ["A brand new touchpoint"], client, cache, batch_size=2)
+    assert (stats.cache_hits, stats.requests, client.calls) == (len(TEXTS), 1, 4)
+    assert all(rerun[t]["sentiment"] == results[t]["sentiment"] for t in TEXTS)
+    assert all(tuple(rerun[t]["themes"]) == results[t]["themes"] for t in TEXTS)
+
+
+def test_transient_failures_are_retried(tmp_path):
+    client = StubEnrichmentClient(fail_every=2)
+    results, stats = run(TEXTS, client, EnrichmentCache(tmp_path / "enrich.sqlite"),
+                         batch_size=1, concurrency=1, max_retries=2)
+    assert len(results) == len(TEXTS)
+    assert stats.retries > 0 and stats.failed_items == 0
+    assert stats.requests == len(TEXTS) + stats.retries
+
+
+def test_failed_batches_keep_original_values(tmp_path):
+    frame = frame_from_records([
+        {"stage": "Trigger", "persona": "CRO", "label": text, "sentiment": 0.5, "frequency": 3,
+         "confidence": 0.9, "themes": ["original"]} for text in TEXTS])
+    cache = EnrichmentCache(tmp_path / "enrich.sqlite")
+    out, stats = enrich_frame(frame, StubEnrichmentClient(fail_every=1), cache, batch_size=2, max_retries=1, **FAST)
+    assert stats.failed_items == len(TEXTS) and stats.retries == 3
+    pd.testing.assert_frame_equal(out, frame)
+    assert cache.get_many([]) == {}
+
+    out, stats = enrich_frame(frame, StubEnrichmentClient(), cache, batch_size=2, **FAST)
+    assert stats.failed_items == 0
+    assert all(isinstance(t, tuple) and t != ("original",) for t in out["themes"])
+    cached, stats = enrich_frame(frame, StubEnrichmentClient(), cache, batch_size=2, **FAST)
+    assert stats.cache_hits == len(TEXTS) and stats.requests == 0
+    pd.testing.assert_frame_equal(cached, out)
+
+
+def test_enriched_themes_win_over_the_label_map(tmp_path):
+    frame = frame_from_records([{"stage": "Trigger", "persona": "CRO", "label": TEXTS[0], "sentiment": 0.1,
+                                 "frequency": 2, "confidence": 0.9}])
+    theme_map = {TEXTS[0]: ["mapped theme"]}
+    assert ThemeStageCounts(["Trigger"], theme_map).add(frame).themes == ["mapped theme"]
+
+    enriched, _ = enrich_frame(frame, StubEnrichmentClient(), EnrichmentCache(tmp_path / "enrich.sqlite"), **FAST)
+    counts = ThemeStageCounts(["Trigger"], theme_map).add(enriched)
+    assert counts.themes == list(enriched["themes"].iloc[0]) and "mapped theme" not in counts.themes
+
+
+class MalformedClient(StubEnrichmentClient):
+    """Answers the first *bad_calls* requests with a null / non-numeric sentiment."""
+
+    def __init__(self, bad_calls):
+        super().__init__()
+        self.bad_calls = bad_calls
+
+    async def complete(self, items):
+        answers = await super().complete(items)
+        if self.calls <= self.bad_calls:
+            answers[0]["sentiment"] = None if self.calls % 2 else "very positive"
+        return answers
+
+
+def test_malformed_answers_are_retried_then_counted(tmp_path):
+    cache = EnrichmentCache(tmp_path / "enrich.sqlite")
+    results, stats = run(TEXTS, MalformedClient(bad_calls=2), cache, batch_size=5, max_retries=2)
+    assert len(results) == len(TEXTS) and (stats.retries, stats.failed_items) == (2, 0)
+
+    results, stats = run(TEXTS, MalformedClient(bad_calls=99), EnrichmentCache(tmp_path / "other.sqlite"),
+                         batch_size=5, max_retries=1)
+    assert results == {} and (stats.retries, stats.failed_items) == (1, len(TEXTS))
@@ -0,0 +1,57 @@
+import json
+import os
+import time
+
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+from journey_export import LIST_SEPARATOR, prune_spool, write_export
+
+
+@pytest.mark.parametrize("fmt", ["CSV", "JSON", "JSON Lines", "Parquet"])
+def test_chunked_exports_read_back_whole(touchpoints, tmp_path, fmt):
+    path = tmp_path / f"touchpoints.{fmt}"
+    size = write_export(touchpoints, fmt, str(path), chunk_rows=300)
+    assert size == path.stat().st_size and not list(tmp_path.glob("*.part"))
+    if fmt == "CSV":
+        back = pd.read_csv(path)
+        assert back["themes"].fillna("").tolist() == [LIST_SEPARATOR.join(t) for t in touchpoints["themes"]]
+    elif fmt == "JSON":
+        back = pd.DataFrame(json.loads(path.read_text()))
+    elif fmt == "JSON Lines":
+        back = pd.read_json(path, lines=True)
+    else:
+        back = pq.read_table(path).to_pandas()
+        assert pq.ParquetFile(path).num_row_groups == -(-len(touchpoints) // 300)
+    assert back["label"].tolist() == touchpoints["label"].tolist()
+    assert back["frequency"].tolist() == touchpoints["frequency"].tolist()
+
+
+@pytest.mark.parametrize("fmt", ["CSV", "JSON", "JSON Lines", "Parquet"])
+def test_empty_table_exports(touchpoints, tmp_path, fmt):
+    path = tmp_path / "empty"
+    write_export(touchpoints.iloc[:0], fmt, str(path))
+    assert path.exists()
+    if fmt == "JSON":
+        assert json.loads(path.read_text()) == []
+
+
+def test_existing_export_is_reused(touchpoints, tmp_path):
+    path = str(tmp_path / "t.csv")
+    write_export(touchpoints, "CSV", path)
+    before = os.stat(path).st_ino
+    write_export(touchpoints.iloc[:10], "CSV", path)   # same name: served from the spool as is
+    assert os.stat(path).st_ino == before
+
+
+def test_spool_prunes_least_recently_used_files(tmp_path):
+    for i, name in enumerate(["old", "mid", "new", "kept"]):
+        (tmp_path / name).write_bytes(b"x" * 100)
+        os.utime(tmp_path / name, (time.time() - 100 + i, time.time() - 100 + i))
+    (tmp_path / "fresh.part").write_bytes(b"x" * 500)   # a write in progress
+    os.utime(tmp_path / "kept", (0, 0))                  # oldest, but the file being served
+
+    freed = prune_spool(str(tmp_path), 250, keep=str(tmp_path / "kept"))
+    assert freed == 200
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["fresh.part", "kept", "new"]
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from journey_filters import FilterIndex, FilterSpec
+from journey_ingest import sentiment_band
+
+START, END = np.datetime64("2023-04-01", "ns"), np.datetime64("2023-10-01", "ns") - 1
+SPECS = [
+    FilterSpec(),
+    FilterSpec(personas=("Persona A", "Persona D")),
+    FilterSpec(personas=("Persona A", "Nobody")),
+    FilterSpec(personas=()),
+    FilterSpec(stages=("Stage 03",), industries=("Banking", "Retail")),
+    FilterSpec(min_confidence=0.7),
+    FilterSpec(min_confidence=0.7, bands=(2, 4)),
+    FilterSpec(dates=(START, END)),
+    FilterSpec(personas=("Persona B",), stages=("Stage 01", "Stage 10"), min_confidence=0.5, bands=(0, 2),
+               dates=(START, END)),
+]
+
+
+def reference_mask(frame, spec):
+    """The same selection as plain boolean column comparisons."""
+    mask = np.ones(len(frame), dtype=bool)
+    for col, values in (("persona", spec.personas), ("stage", spec.stages), ("industry", spec.industries)):
+        if values is not None:
+            mask &= frame[col].isin(values).to_numpy()
+    if spec.bands is not None:
+        band = sentiment_band(frame["sentiment"].to_numpy())
+        mask &= (band >= spec.bands[0]) & (band <= spec.bands[1])
+    if spec.min_confidence is not None:
+        mask &= frame["confidence"].to_numpy() >= np.float32(spec.min_confidence)
+    if spec.dates is not None:
+        stamps = frame["timestamp"].to_numpy()
+        mask &= (stamps >= spec.dates[0]) & (stamps <= spec.dates[1])   # NaT compares False
+    return mask
+
+
+@pytest.mark.parametrize("spec", SPECS)
+def test_select_matches_boolean_mask(touchpoints, spec):
+    np.testing.assert_array_equal(FilterIndex(touchpoints).select(spec), reference_mask(touchpoints, spec))
+
+
+def test_time_span_skips_undated_rows(touchpoints):
+    first, last = FilterIndex(touchpoints).time_span
+    assert (first, last) == (touchpoints["timestamp"].min(), touchpoints["timestamp"].max())
+    assert FilterIndex(touchpoints.assign(timestamp=np.datetime64("NaT", "ns"))).time_span is None
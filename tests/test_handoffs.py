@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from journey_bench import SYNTH_STAGES
+from journey_handoffs import HANDOFF_COLUMNS, HandoffEdges
+
+STAGE_RANK = {s: i for i, s in enumerate(SYNTH_STAGES)}
+
+
+def walk(frame, by):
+    """Hand-offs the slow way: each account's rows sorted by stage (or timestamp, then stage), pairs in a loop."""
+    rows = []
+    no_account = frame[frame["account"].isna()]
+    groups = [(np.nan, no_account)] + [(a, g) for a, g in frame.groupby("account", observed=True)]
+    for account, group in groups:
+        group = group.assign(rank=group["stage"].map(STAGE_RANK).astype(int))
+        if by == "stage":
+            group = group.sort_values("rank", kind="stable")
+        else:
+            group = group[group["timestamp"].notna()].sort_values(["timestamp", "rank"], kind="stable")
+        records = list(group.itertuples())
+        for a, b in zip(records, records[1:]):
+            rows.append({"account": account, "from_persona": a.persona, "to_persona": b.persona,
+                         "from_stage": a.stage, "to_stage": b.stage,
+                         "sentiment_delta": float(b.sentiment) - float(a.sentiment),
+                         "confidence_avg": (float(a.confidence) + float(b.confidence)) / 2})
+    return pd.DataFrame(rows, columns=HANDOFF_COLUMNS)
+
+
+def plain(table):
+    return table.astype({c: object for c in ("account", "from_persona", "to_persona", "from_stage", "to_stage")})
+
+
+def by_content(table):
+    """Rows sorted by every column, for comparing hand-off sets whose account order differs."""
+    table = plain(table).fillna({"account": ""})
+    return table.sort_values(HANDOFF_COLUMNS, kind="stable").reset_index(drop=True)
+
+
+@pytest.mark.parametrize("by", ["stage", "timestamp"])
+def test_table_matches_per_account_walk(touchpoints, by):
+    got = HandoffEdges(touchpoints, SYNTH_STAGES).table(by)
+    want = walk(touchpoints, by)
+    pd.testing.assert_frame_equal(plain(got), plain(want), check_dtype=False)
+
+
+@pytest.mark.parametrize("by", ["stage", "timestamp"])
+def test_matrix_matches_walk_aggregates(touchpoints, by):
+    matrix = HandoffEdges(touchpoints, SYNTH_STAGES).matrix(by)
+    want = walk(touchpoints, by).fillna({"account": ""}).groupby(["from_persona", "to_persona"]).agg(
+        handoffs=("account", "size"), accounts=("account", "nunique"),
+        sentiment_delta=("sentiment_delta", "mean"), confidence=("confidence_avg", "mean"))
+    want["share"] = want["handoffs"] / want.groupby(level="from_persona")["handoffs"].transform("sum")
+    got = matrix.frame().set_index(["from_persona", "to_persona"]).loc[want.index]
+    assert len(matrix) == len(want) and matrix.total == want["handoffs"].sum()
+    assert got["handoffs"].tolist() == want["handoffs"].tolist()
+    assert got["accounts"].tolist() == want["accounts"].tolist()
+    for col in ("share", "sentiment_delta", "confidence"):
+        np.testing.assert_allclose(got[col], want[col])
+
+
+@pytest.mark.parametrize("by", ["stage", "timestamp"])
+def test_added_rows_match_one_pass(touchpoints, by):
+    head, tail = touchpoints.iloc[:1_200], touchpoints.iloc[1_200:]
+    grown = HandoffEdges(head, SYNTH_STAGES)
+    grown.table(by)   # builds the timestamp order, which ``add`` must invalidate
+    grown = grown.copy().add(tail)
+    pd.testing.assert_frame_equal(by_content(grown.table(by)), by_content(walk(touchpoints, by)),
+                                  check_dtype=False)
@@ -0,0 +1,120 @@
+import json
+import time
+
+import numpy as np
+import pytest
+
+import journey_ingest
+from journey_demo import DEMO_DATA
+from journey_ingest import frame_from_records, iter_records, load_journey
+
+
+def array_doc(rows, indent=None):
+    return json.dumps(rows, indent=indent, ensure_ascii=False).encode()
+
+
+def jsonl_doc(rows):
+    return "".join(json.dumps(row, ensure_ascii=False) + "\n" for row in rows).encode()
+
+
+def rows(n):
+    return [{**DEMO_DATA[i % len(DEMO_DATA)], "label": f"Touchpoint {i} \"quoted\" \\ {{x}}"} for i in range(n)]
+
+
+def splice(doc, i, bad):
+    """The array *doc* with element *i* replaced by the raw text *bad*."""
+    parts = [json.dumps(r, ensure_ascii=False) for r in json.loads(doc)]
+    parts[i] = bad
+    return ("[" + ",\n".join(parts) + "]").encode()
+
+
+@pytest.mark.parametrize("chunk", [1, 7, 64, 1 << 20])
+@pytest.mark.parametrize("encode", [array_doc, lambda r: array_doc(r, indent=2), jsonl_doc])
+def test_any_chunk_size_reads_the_same_rows(monkeypatch, chunk, encode):
+    monkeypatch.setattr(journey_ingest, "CHUNK_CHARS", chunk)
+    data = rows(25)
+    result = load_journey(encode(data))
+    assert (result.n_rows, result.n_rejected) == (25, 0)
+    assert result.frame["label"].tolist() == [r["label"] for r in data]
+    assert result.frame.equals(frame_from_records(data))
+
+
+@pytest.mark.parametrize("chunk", [1, 3, 5])
+def test_bare_numbers_cut_at_a_chunk_boundary_are_whole(monkeypatch, chunk):
+    monkeypatch.setattr(journey_ingest, "CHUNK_CHARS", chunk)
+    assert [obj for _, obj in iter_records(b"[12345, -0.125e3, 1e10]")] == [12345, -125.0, 1e10]
+
+
+@pytest.mark.parametrize("bad", ['{"x": [1,2}', '{"label": "open', "{oops}", "}", "[[[", '{"a": 1]]'])
+@pytest.mark.parametrize("chunk", [1, 16, 1 << 20])
+def test_malformed_element_costs_one_row(monkeypatch, bad, chunk):
+    monkeypatch.setattr(journey_ingest, "CHUNK_CHARS", chunk)
+    monkeypatch.setattr(journey_ingest, "MAX_ELEMENT_CHARS", 400)
+    doc = splice(array_doc(rows(12)), 4, bad)
+    result = load_journey(doc)
+    assert (result.n_rows, result.n_rejected) == (11, 1)
+    assert result.errors[0].startswith("record 5: malformed JSON at character")
+
+
+def test_malformed_last_element(monkeypatch):
+    monkeypatch.setattr(journey_ingest, "MAX_ELEMENT_CHARS", 400)
+    result = load_journey(splice(array_doc(rows(5)), 4, '{"x": [1,2}'))
+    assert (result.n_rows, result.n_rejected) == (4, 1)
+
+
+def test_error_offsets_point_into_the_document():
+    doc = b"  \n" + splice(array_doc(rows(3)), 1, '{"label": }')
+    result = load_journey(doc)
+    offset = int(result.errors[0].split("character ")[1].split(":")[0])
+    assert doc.decode()[offset] == "}"
+
+
+def test_unbalanced_element_in_a_large_file_is_linear(monkeypatch):
+    monkeypatch.setattr(journey_ingest, "CHUNK_CHARS", 1 << 14)
+    monkeypatch.setattr(journey_ingest, "MAX_ELEMENT_CHARS", 1 << 15)
+    clean = array_doc(rows(20_000))
+    start = time.perf_counter()
+    load_journey(clean)
+    clean_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = load_journey(splice(clean, 10, '{"x": [1,2}'))
+    assert (result.n_rows, result.n_rejected) == (19_999, 1)
+    assert time.perf_counter() - start < 3 * clean_seconds + 0.5
+
+
+@pytest.mark.parametrize("cut", [0.3, 0.77])
+def test_truncated_array_keeps_the_rows_before_the_cut(cut):
+    doc = array_doc(rows(40))
+    result = load_journey(doc[:int(len(doc) * cut)])
+    complete = sum(1 for i in range(40) if len(array_doc(rows(40)[:i + 1])) - 1 <= int(len(doc) * cut))
+    assert result.n_rows == complete and result.n_rejected == 1
+    assert "unexpected end of file" in result.errors[-1]
+
+
+def test_json_lines_reject_bad_lines_only():
+    data = rows(6)
+    doc = jsonl_doc(data[:3]) + b"\n{not json}\n" + b'{"stage": "S"}\n' + jsonl_doc(data[3:]).rstrip(b"\n")
+    result = load_journey(doc)
+    assert (result.n_rows, result.n_rejected) == (6, 2)
+    assert result.errors == ["record 5: invalid JSON: Expecting property name enclosed in double quotes",
+                             "record 6: missing 'persona'"]
+
+
+def test_rows_are_validated_and_normalized():
+    frame = frame_from_records([{**DEMO_DATA[0], "quote": " one ", "themes": "Solo", "timestamp": 0.5}])
+    assert frame.loc[0, "quotes"] == ("one",) and frame.loc[0, "themes"] == ("Solo",)
+    assert frame.loc[0, "timestamp"] == np.datetime64(500_000_000, "ns")
+    for bad in ({"sentiment": 2}, {"frequency": 1.5}, {"confidence": "high"}, {"label": " "}):
+        with pytest.raises(ValueError):
+            frame_from_records([{**DEMO_DATA[0], **bad}])
+
+
+@pytest.mark.parametrize("stamp", [1.7e12, "2300-01-01", "1600-01-01", float("inf")])
+def test_out_of_range_timestamps_reject_one_row(stamp):
+    data = rows(3)
+    data[1]["timestamp"] = stamp
+    result = load_journey(jsonl_doc(data))
+    assert (result.n_rows, result.n_rejected) == (2, 1)
+    assert "'timestamp' is outside 1677-2262" in result.errors[0]
+    assert len(result.frame) == 2 and result.frame["label"].tolist() == [data[0]["label"], data[2]["label"]]
@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from journey_aggregate import grouped_sums
+from journey_bench import SYNTH_PERSONAS, SYNTH_STAGES
+from journey_layout import cluster_touchpoints, persona_lanes, stack_offsets, swimlane_positions
+
+
+def test_stacked_points_never_overlap_and_stay_in_their_cell(touchpoints):
+    x, y = swimlane_positions(touchpoints, SYNTH_STAGES, SYNTH_PERSONAS)
+    assert len(set(zip(x.round(9), y.round(9)))) == len(touchpoints)
+    stage = pd.Categorical(touchpoints["stage"], categories=SYNTH_STAGES).codes
+    persona = pd.Categorical(touchpoints["persona"], categories=SYNTH_PERSONAS).codes
+    assert np.all(np.abs(x - stage) < 0.5) and np.all(np.abs(y - persona) < 0.5)
+
+
+def test_singletons_sit_on_the_cell_centre():
+    dx, dy = stack_offsets(np.array([0, 1, 1, 2]))
+    assert (dx[0], dy[0], dx[3], dy[3]) == (0, 0, 0, 0)
+    assert dx[1] != dx[2]
+
+
+def test_lanes_rank_personas_and_keep_missing_ones_last(touchpoints):
+    sums = grouped_sums(touchpoints[touchpoints["persona"] != "Persona H"], ("persona",))
+    lanes = persona_lanes(SYNTH_PERSONAS, sums, "Total frequency")
+    mentions = touchpoints.groupby("persona", observed=True)["frequency"].sum().drop("Persona H")
+    assert lanes == mentions.sort_values(ascending=False, kind="stable").index.tolist() + ["Persona H"]
+    assert persona_lanes(SYNTH_PERSONAS, sums) == SYNTH_PERSONAS
+    with pytest.raises(ValueError):
+        persona_lanes(SYNTH_PERSONAS, sums, "Alphabetical")
+
+
+@pytest.mark.parametrize("level", ["Stage × persona", "Sentiment band"])
+def test_clusters_keep_every_touchpoint(touchpoints, level):
+    clusters = cluster_touchpoints(touchpoints, SYNTH_STAGES, SYNTH_PERSONAS, level)
+    assert clusters["touchpoints"].sum() == len(touchpoints)
+    assert clusters["frequency"].sum() == touchpoints["frequency"].sum()
+
+
+def test_cell_clusters_match_groupby(touchpoints):
+    clusters = cluster_touchpoints(touchpoints, SYNTH_STAGES, SYNTH_PERSONAS).set_index(["stage", "persona"])
+    want = touchpoints.groupby(["stage", "persona"], observed=True)["frequency"].sum()
+    assert clusters["frequency"].loc[want.index].tolist() == want.tolist()
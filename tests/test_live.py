@@ -0,0 +1,79 @@
+import json
+
+from journey_demo import DEMO_DATA, build_model
+from journey_live import DropDirectory, LiveStudy
+
+
+def lines(rows):
+    return "".join(json.dumps(row) + "\n" for row in rows).encode()
+
+
+def test_polls_read_only_complete_new_lines(tmp_path):
+    drop = DropDirectory(tmp_path)
+    (tmp_path / "a.jsonl").write_bytes(lines(DEMO_DATA[:2]) + b'{"stage": "half')
+    (tmp_path / "notes.txt").write_bytes(b"ignored\n")
+    data, files = drop.poll()
+    assert (data, files) == (lines(DEMO_DATA[:2]), ["a.jsonl"])
+    assert drop.poll() == (b"", [])
+
+    with open(tmp_path / "a.jsonl", "ab") as fh:
+        fh.write(b'-written"}\n')
+    data, _ = drop.poll()
+    assert data == b'{"stage": "half-written"}\n'
+
+
+def test_live_study_grows_like_a_full_load(tmp_path):
+    live = LiveStudy(tmp_path, build_model, min_interval=0)
+    assert not live.poll() and live.model is None
+    (tmp_path / "a.jsonl").write_bytes(lines(DEMO_DATA[:4]))
+    assert live.poll() and (live.version, live.n_rows) == (1, 4)
+    live.model.summary(), live.model.theme_counts()
+
+    with open(tmp_path / "a.jsonl", "ab") as fh:
+        fh.write(lines(DEMO_DATA[4:7]) + b'{"stage": 1}\n')
+    (tmp_path / "b.jsonl").write_bytes(lines(DEMO_DATA[7:]))
+    snapshot = live.model
+    assert live.poll() and (live.version, live.n_rows, live.n_rejected) == (2, 10, 1)
+    assert len(snapshot) == 4   # sessions on the previous snapshot are untouched
+    assert live.history[-1][1:3] == (6, ["a.jsonl", "b.jsonl"])
+
+    full = build_model(live.model.frame)
+    assert live.model.summary().total_mentions == full.summary().total_mentions
+    assert live.model.theme_counts().top(10).equals(full.theme_counts().top(10))
+
+
+def test_polls_closer_than_min_interval_are_skipped(tmp_path):
+    live = LiveStudy(tmp_path, build_model, min_interval=3600)
+    (tmp_path / "a.jsonl").write_bytes(lines(DEMO_DATA[:2]))
+    assert live.poll()
+    (tmp_path / "b.jsonl").write_bytes(lines(DEMO_DATA[2:]))
+    assert not live.poll() and live.n_rows == 2
+
+
+def test_epoch_millisecond_rows_are_rejected_without_losing_the_block(tmp_path):
+    live = LiveStudy(tmp_path, build_model, min_interval=0)
+    (tmp_path / "a.jsonl").write_bytes(lines(DEMO_DATA[:2] + [{**DEMO_DATA[2], "timestamp": 1.7e12}]))
+    assert live.poll() and (live.n_rows, live.n_rejected) == (2, 1)
+
+
+def test_truncated_or_replaced_files_replace_their_rows(tmp_path):
+    live = LiveStudy(tmp_path, build_model, min_interval=0)
+    (tmp_path / "a.jsonl").write_bytes(lines(DEMO_DATA[:4]))
+    (tmp_path / "b.jsonl").write_bytes(lines(DEMO_DATA[4:6]))
+    assert live.poll() and live.n_rows == 6
+
+    (tmp_path / "a.jsonl").write_bytes(lines(DEMO_DATA[6:8]))      # rotated: shorter than what was read
+    assert live.poll() and live.n_rows == 4
+    labels = [row["label"] for row in DEMO_DATA[4:8]]
+    assert live.model.frame["label"].tolist() == labels
+    assert live.model.summary().total_mentions == build_model(live.model.frame).summary().total_mentions
+
+    replacement = tmp_path / "new.tmp"
+    replacement.write_bytes(lines(DEMO_DATA[:7]))
+    replacement.replace(tmp_path / "b.jsonl")                        # swapped in atomically, and longer
+    assert live.poll() and live.n_rows == 9
+    assert sorted(live.model.frame["label"]) == sorted(row["label"] for row in DEMO_DATA[6:8] + DEMO_DATA[:7])
+
+    (tmp_path / "a.jsonl").write_bytes(b"")
+    (tmp_path / "b.jsonl").write_bytes(b"")
+    assert live.poll() and live.model is None and live.n_rows == 0
@@ -0,0 +1,61 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from journey_metrics import Metrics, payload_bytes
+
+
+def test_spans_record_counts_percentiles_and_payload():
+    metrics = Metrics()
+    for ms in (1, 2, 3, 4, 100):
+        metrics.observe("aggregate", ms / 1000, payload=ms, tab="Summary")
+    with metrics.span("aggregate", tab="Themes") as sp:
+        sp.payload = 7
+    assert sp.seconds > 0
+
+    last, p50, p95 = metrics.latency("aggregate", tab="Summary")
+    assert (last, p50) == (pytest.approx(0.1), pytest.approx(0.003))
+    assert p95 == pytest.approx(np.quantile([0.001, 0.002, 0.003, 0.004, 0.1], 0.95))
+    assert metrics.latency("aggregate", tab="Nowhere") is None
+
+    table = metrics.series("aggregate").set_index("tab")
+    assert table.loc["Summary", "count"] == 5 and table.loc["Themes", "payload_bytes"] == 7
+
+
+def test_span_is_recorded_when_the_block_raises():
+    metrics = Metrics()
+    with pytest.raises(RuntimeError):
+        with metrics.span("render", tab="Summary"):
+            raise RuntimeError("boom")
+    assert metrics.series()["count"].tolist() == [1]
+
+
+def test_prometheus_text_escapes_labels():
+    metrics = Metrics()
+    metrics.observe("render", 0.5, payload=10, tab='Say "hi"\n')
+    metrics.gauge("figure_cache_bytes", 2048)
+    text = metrics.prometheus()
+    assert 'journey_span_seconds_count{span="render",tab="Say \\"hi\\"\\n"} 1' in text
+    assert 'journey_span_payload_bytes{span="render",tab="Say \\"hi\\"\\n"} 10' in text
+    assert "journey_figure_cache_bytes 2048" in text
+
+
+def test_log_appends_only_new_events(tmp_path):
+    metrics, log = Metrics(), tmp_path / "spans.jsonl"
+    metrics.observe("a", 0.1)
+    metrics.observe("b", 0.2, tab="X")
+    assert metrics.append_log(str(log)) == 2
+    assert metrics.append_log(str(log)) == 0
+    metrics.observe("c", 0.3)
+    assert metrics.append_log(str(log)) == 1
+    events = [json.loads(line) for line in log.read_text().splitlines()]
+    assert [e["span"] for e in events] == ["a", "b", "c"] and events[1]["tab"] == "X"
+    assert json.loads(metrics.to_json())["events"][-1]["span"] == "c"
+
+
+def test_payload_bytes_is_shallow_for_frames():
+    frame = pd.DataFrame({"x": np.zeros(100), "s": ["a long string value"] * 100})
+    assert payload_bytes(frame) == frame.memory_usage(index=True, deep=False).sum()
+    assert payload_bytes(b"abc", "de", np.zeros(4), None) == 3 + 2 + 32
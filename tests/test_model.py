@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from journey_aggregate import WEIGHT_MODES
+from journey_demo import build_model
+from journey_filters import FilterSpec
+from journey_model import ordered_values
+
+
+def test_ordered_values_keeps_observed_known_then_extras():
+    assert ordered_values(["a", "b", "c"], ["x", "c", "a"]) == ["a", "c", "x"]
+    assert ordered_values([], ["x", "y"]) == ["x", "y"]
+
+
+@pytest.mark.parametrize("order", ["stage", "timestamp"])
+def test_extended_matches_full_rebuild(touchpoints, order):
+    head, tail = touchpoints.iloc[:1_500].reset_index(drop=True), touchpoints.iloc[1_500:].reset_index(drop=True)
+    model = build_model(head)
+    model.summary(), model.theme_counts(), model.transitions(order)   # views that extended() carries over
+    grown = model.extended(tail, key="grown")
+    full = build_model(touchpoints)
+
+    assert (grown.stages, grown.personas) == (full.stages, full.personas)
+    for mode in WEIGHT_MODES:
+        assert grown.summary().avg_sentiment(mode) == pytest.approx(full.summary().avg_sentiment(mode))
+        pd.testing.assert_frame_equal(grown.summary().stage_stats(mode).set_index("stage").sort_index(),
+                                      full.summary().stage_stats(mode).set_index("stage").sort_index())
+    assert grown.summary().total_mentions == full.summary().total_mentions
+    assert grown.summary().low_conf_share(0.75) == full.summary().low_conf_share(0.75)
+
+    pd.testing.assert_frame_equal(grown.theme_counts().top(20), full.theme_counts().top(20))
+
+    key = ["from_persona", "to_persona"]
+    got = grown.transitions(order).frame().sort_values(key).reset_index(drop=True)
+    want = full.transitions(order).frame().sort_values(key).reset_index(drop=True)
+    pd.testing.assert_frame_equal(got, want)
+
+
+def test_extended_rejects_filtered_models(touchpoints):
+    view = build_model(touchpoints).filtered(FilterSpec(personas=("Persona A",)))
+    with pytest.raises(ValueError):
+        view.extended(touchpoints.iloc[:10], key="x")
+
+
+def test_extended_keeps_chart_keys_of_unchanged_views(touchpoints):
+    undated = touchpoints.iloc[1_500:].assign(timestamp=np.datetime64("NaT", "ns"))
+    model = build_model(touchpoints.iloc[:1_500].reset_index(drop=True))
+    grown = model.extended(undated.reset_index(drop=True), key="grown")
+    assert grown.view_key("timeline") == model.view_key("timeline")
+    assert grown.view_key("summary") == "grown"
+
+
+@pytest.mark.parametrize("spec", [FilterSpec(personas=("Persona A", "Persona C"), min_confidence=0.4),
+                                  FilterSpec(stages=("Stage 02",), bands=(2, 4))])
+def test_filtered_views_match_a_model_of_the_filtered_rows(touchpoints, spec):
+    root = build_model(touchpoints)
+    view = root.filtered(spec)
+    rows = touchpoints[root.filter_index().select(spec)].reset_index(drop=True)
+    rebuilt = build_model(rows)
+
+    assert len(view) == len(rows)
+    for mode in WEIGHT_MODES:
+        pd.testing.assert_frame_equal(view.summary().stage_stats(mode), rebuilt.summary().stage_stats(mode))
+    for got, want in zip(view.wins_and_risks(), rebuilt.wins_and_risks()):
+        pd.testing.assert_frame_equal(got, want)
+    for order in ("stage", "timestamp"):
+        pd.testing.assert_frame_equal(view.handoffs(order), rebuilt.handoffs(order))
+    pd.testing.assert_frame_equal(view.clusters(), rebuilt.clusters())
+    pd.testing.assert_series_equal(view.cube().totals(), rebuilt.cube().totals())
+    assert view.timeline().cells(view.timeline().first_day, view.timeline().last_day).equals(
+        rebuilt.timeline().cells(rebuilt.timeline().first_day, rebuilt.timeline().last_day))
+    assert not view.frame_built                # no view above needed the text / list columns
+    pd.testing.assert_frame_equal(view.frame, rows)
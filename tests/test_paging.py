@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from journey_paging import OrderCache, page_bounds, sort_order
+
+
+@pytest.mark.parametrize("ascending", [True, False])
+def test_sort_order_is_stable_with_missing_last(ascending):
+    column = pd.Series([3.0, np.nan, 1.0, 3.0, np.nan, 2.0, 1.0])
+    want = [2, 6, 5, 0, 3] if ascending else [0, 3, 5, 2, 6]
+    assert sort_order(column, ascending).tolist() == want + [1, 4]
+
+
+def test_sort_order_sorts_categoricals_by_label():
+    column = pd.Series(pd.Categorical(["b", "a", None, "c", "a"], categories=["c", "b", "a"]))
+    assert sort_order(column).tolist() == [1, 4, 0, 3, 2]
+    assert sort_order(column, ascending=False).tolist() == [3, 0, 1, 4, 2]
+
+
+def test_sort_order_of_empty_and_all_missing_columns():
+    assert sort_order(pd.Series([], dtype=float)).tolist() == []
+    assert sort_order(pd.Series([None, None], dtype=object)).tolist() == [0, 1]
+
+
+@pytest.mark.parametrize("n_rows, page, want", [
+    (0, 1, (0, 0, 1, 1)),
+    (0, 5, (0, 0, 1, 1)),
+    (50, 1, (0, 50, 1, 1)),
+    (51, 2, (50, 51, 2, 2)),
+    (120, 0, (0, 50, 1, 3)),
+    (120, -4, (0, 50, 1, 3)),
+    (120, 9, (100, 120, 3, 3)),
+    (120, 2.0, (50, 100, 2, 3)),
+])
+def test_page_bounds_clamps_to_the_table(n_rows, page, want):
+    assert page_bounds(n_rows, page, page_size=50) == want
+
+
+def test_order_cache_drops_least_recently_used():
+    frame = pd.DataFrame({"a": [2, 1, 3], "b": [1.0, 3.0, 2.0]})
+    cache = OrderCache(max_orders=2)
+    cache.order("t", frame, "a"), cache.order("t", frame, "b"), cache.order("t", frame, "a")
+    cache.order("t", frame, "a", ascending=False)   # evicts ("t", "b", True)
+    cache.order("t", frame, "b")
+    assert (cache.hits, cache.misses, len(cache)) == (1, 4, 2)
+    rows, page, n_pages = cache.page("t", frame, "b", page=7, page_size=2)
+    assert (rows.index.tolist(), page, n_pages) == ([1], 2, 2)
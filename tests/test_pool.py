@@ -0,0 +1,63 @@
+import threading
+import time
+
+from journey_demo import build_model
+from journey_pool import StudyPool, frame_nbytes
+from journey_store import StudyStore
+
+
+def loader(frame, calls):
+    def load():
+        calls.append(1)
+        time.sleep(0.01)
+        model = build_model(frame)
+        return model, model
+    return load
+
+
+def test_concurrent_sessions_share_one_load(touchpoints):
+    pool, calls, got = StudyPool(), [], []
+    threads = [threading.Thread(target=lambda: got.append(pool.get("a", loader(touchpoints, calls))))
+               for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1 and len({id(m) for m in got}) == 1
+
+
+def test_least_recently_used_studies_go_first(touchpoints):
+    pool, calls = StudyPool(max_studies=2), []
+    for key in ("a", "b"):
+        pool.get(key, loader(touchpoints.iloc[:100], calls))
+    pool.get("a", loader(touchpoints, calls))          # refreshes "a"
+    pool.get("c", loader(touchpoints.iloc[:100], calls))
+    assert ("a" in pool, "b" in pool, "c" in pool) == (True, False, True)
+    assert pool.evictions == 1 and len(calls) == 3
+
+    small = StudyPool(max_bytes=1)                     # every study is over budget
+    small.get("x", loader(touchpoints, calls))
+    small.get("y", loader(touchpoints, calls))
+    assert list(small._entries) == ["y"]               # the study being opened is always kept
+
+
+def test_idle_studies_and_sessions_expire(touchpoints):
+    pool = StudyPool(idle_seconds=60)
+    model = pool.get("a", loader(touchpoints, []))
+    pool.touch_session("session-1", "a", "Study A", model, 1024)
+    assert pool.studies()["sessions"].tolist() == [1]
+    pool._entries["a"].last_used -= 120
+    assert pool.evict_idle() == 1 and "a" not in pool
+    assert pool.sessions()["study"].tolist() == ["Study A"]   # named even after eviction
+
+    pool._sessions["session-1"].last_seen -= 120
+    pool.touch_session("session-2", "b", "Study B", model, 0)
+    assert pool.sessions()["study"].tolist() == ["Study B"]
+
+
+def test_mapped_columns_are_counted_apart(touchpoints, tmp_path):
+    store = StudyStore(tmp_path)
+    study_id, _ = store.save("S", touchpoints, "k")
+    owned, mapped = frame_nbytes(store.open(study_id))
+    assert mapped >= touchpoints["sentiment"].nbytes + touchpoints["confidence"].nbytes
+    assert owned > 0 and frame_nbytes(touchpoints)[1] == 0
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+
+from journey_search import PAGE_SIZE, SearchIndex, browse, category_mask, tokenize
+
+
+def documents(frame):
+    """Every token of each touchpoint's label, themes, quotes and actions."""
+    docs = []
+    for row in frame.itertuples():
+        texts = [row.label, *row.themes, *row.quotes, *row.actions]
+        docs.append({token for text in texts for token in tokenize(text)})
+    return docs
+
+
+def test_matches_are_rows_holding_every_word(touchpoints):
+    index, docs = SearchIndex(touchpoints), documents(touchpoints)
+    words = sorted(index.vocab)
+    for query in (words[0], f"{words[3]} {words[7]}", words[5][:3], "no-such-word"):
+        *whole, last = tokenize(query)
+        want = [i for i, d in enumerate(docs)
+                if all(w in d for w in whole) and any(t.startswith(last) for t in d)]
+        assert np.flatnonzero(~np.isnan(index.scores(query))).tolist() == want
+
+
+def test_pages_are_ranked_and_never_overlap(touchpoints):
+    index = SearchIndex(touchpoints)
+    query = sorted(index.vocab, key=lambda t: -np.diff(index.indptr)[index.vocab[t]])[0]
+    scores = index.scores(query)
+    seen, last = [], np.inf
+    for page in range(3):
+        positions, page_scores, n_matches = index.search(query, page=page)
+        assert n_matches == np.count_nonzero(~np.isnan(scores))
+        assert np.all(np.diff(page_scores) <= 0) and page_scores[0] <= last
+        seen += positions.tolist()
+        last = page_scores[-1]
+    assert len(seen) == len(set(seen)) == 3 * PAGE_SIZE
+
+
+def test_empty_query_browses_by_mentions_without_an_index(touchpoints):
+    mask = category_mask(touchpoints["persona"], ["Persona C", "Unknown"])
+    frequency = touchpoints["frequency"].to_numpy()
+    positions, _, n_matches = browse(len(touchpoints), mask, frequency)
+    assert n_matches == (touchpoints["persona"] == "Persona C").sum()
+    want = pd.Series(frequency[mask], index=np.flatnonzero(mask)).sort_values(ascending=False, kind="stable")
+    assert positions.tolist() == want.index[:PAGE_SIZE].tolist()
+    assert SearchIndex(touchpoints).search("  ", mask=mask, order_by=frequency)[0].tolist() == positions.tolist()
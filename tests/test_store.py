@@ -0,0 +1,59 @@
+import json
+
+import pandas as pd
+import pytest
+
+from journey_store import CATALOG_FILE, STORE_SCHEMA_VERSION, StudyStore, study_id_for
+
+
+def test_saved_study_opens_memory_mapped_and_equal(touchpoints, tmp_path):
+    store = StudyStore(tmp_path)
+    study_id, entry = store.save("Q3 Interviews", touchpoints, "k1")
+    assert study_id == "q3-interviews" and study_id in store
+    assert (entry["rows"], entry["key"], entry["schema_version"]) == (len(touchpoints), "k1", STORE_SCHEMA_VERSION)
+
+    frame = store.open(study_id)
+    pd.testing.assert_frame_equal(frame, touchpoints, check_categorical=False)
+    assert isinstance(frame["themes"].iloc[1], tuple)
+    assert not frame["sentiment"].to_numpy().flags.writeable   # a view over the mapped file
+
+
+def test_older_schema_versions_are_upgraded_on_open(touchpoints, tmp_path):
+    store = StudyStore(tmp_path)
+    old = touchpoints.drop(columns=["timestamp", "account"])
+    study_id, _ = store.save("Old", old, "k")
+    catalog = json.loads((tmp_path / CATALOG_FILE).read_text())
+    catalog["studies"][study_id]["schema_version"] = 1
+    (tmp_path / CATALOG_FILE).write_text(json.dumps(catalog))
+
+    frame = store.open(study_id)
+    assert frame["timestamp"].isna().all() and frame["account"].isna().all()
+    assert list(frame.columns).index("account") == list(frame.columns).index("industry") + 1
+
+
+def test_delete_removes_file_and_entry(touchpoints, tmp_path):
+    store = StudyStore(tmp_path)
+    study_id, entry = store.save("Gone", touchpoints.iloc[:10], "k")
+    store.delete(study_id)
+    assert study_id not in store and not (tmp_path / entry["file"]).exists()
+    store.delete(study_id)   # already gone: no error
+
+
+def test_study_ids_are_filesystem_safe():
+    assert study_id_for("ACME / Vendor Risk — 2024!") == "acme-vendor-risk-2024"
+    assert study_id_for("???") == "study"
+
+
+def test_saving_never_overwrites_a_study(touchpoints, tmp_path):
+    store = StudyStore(tmp_path)
+    first, entry = store.save("Q3", touchpoints.iloc[:10], "k1")
+    second, _ = store.save("Q3", touchpoints.iloc[:20], "k2")
+    assert (first, second) == ("q3", "q3-2") and len(store.open(first)) == 10
+    with pytest.raises(ValueError):
+        store.save("Q3", touchpoints.iloc[:30], "k3", study_id="q3")
+
+    mapped = store.open(first)
+    replaced, new_entry = store.save("Q3", touchpoints.iloc[:30], "k3", study_id="q3", replace=True)
+    assert replaced == "q3" and new_entry["file"] != entry["file"]
+    assert len(store.open("q3")) == 30 and len(mapped) == 10 and mapped["label"].iloc[0] == touchpoints["label"].iloc[0]
+    assert sorted(p.name for p in tmp_path.glob("*.arrow")) == sorted([new_entry["file"], store.catalog()["q3-2"]["file"]])
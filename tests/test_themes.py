@@ -0,0 +1,52 @@
+from collections import Counter
+
+import numpy as np
+
+from journey_bench import SYNTH_STAGES
+from journey_themes import STAGE_SLOTS, ThemeStageCounts, normalize_theme
+
+
+def label_map(frame):
+    """Map the first label to two themes, so rows without their own themes have something to fall back on."""
+    return {frame["label"].iloc[0]: ["Fallback Theme", "fallback  theme", "Other Theme"]}
+
+
+def reference(frame, theme_map):
+    """``{(theme, stage): mentions}`` from a row loop: own themes, else the label's mapped themes."""
+    counts = Counter()
+    for row in frame.itertuples():
+        own = [normalize_theme(t) for t in row.themes]
+        themes = dict.fromkeys(own or [normalize_theme(t) for t in theme_map.get(row.label, ())])
+        for theme in themes:
+            counts[theme, row.stage] += row.frequency
+    return dict(counts)
+
+
+def as_dict(counts):
+    return {(counts.themes[k // STAGE_SLOTS], counts.stages[k % STAGE_SLOTS]): v
+            for k, v in zip(counts.keys.tolist(), counts.values.tolist())}
+
+
+def test_add_in_chunks_matches_row_loop(touchpoints):
+    theme_map = label_map(touchpoints)
+    counts = ThemeStageCounts(SYNTH_STAGES, theme_map)
+    for start in range(0, len(touchpoints), 700):
+        counts = counts.copy().add(touchpoints.iloc[start:start + 700])
+    assert counts.n_rows == len(touchpoints)
+    assert as_dict(counts) == reference(touchpoints, theme_map)
+
+
+def test_upper_case_themes_fold_into_one(touchpoints):
+    counts = ThemeStageCounts(SYNTH_STAGES).add(touchpoints)
+    assert all(t == normalize_theme(t) for t in counts.themes)
+
+
+def test_subset_matches_rows_counted_alone(touchpoints):
+    theme_map = label_map(touchpoints)
+    counts = ThemeStageCounts(SYNTH_STAGES, theme_map).add(touchpoints)
+    mask = (touchpoints["persona"].isin(["Persona B", "Persona E"]) & (touchpoints["sentiment"] > 0)).to_numpy()
+    sub = counts.subset(mask)
+    assert sub.n_rows == mask.sum()
+    assert as_dict(sub) == reference(touchpoints[mask], theme_map)
+    assert sub.pair_row.max() < sub.n_rows
+    np.testing.assert_array_equal(sub.theme_totals(), counts.theme_totals(mask))
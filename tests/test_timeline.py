@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from journey_bench import SYNTH_PERSONAS, SYNTH_STAGES
+from journey_timeline import GRANULARITIES, TimeRollups, bucket_start, to_day
+
+RANGES = [("2023-01-01", "2024-12-31"), ("2023-03-17", "2024-02-03"), ("2023-05-02", "2023-05-02"),
+          ("2023-02-27", "2023-03-06"), ("2022-06-01", "2022-06-30")]
+
+
+def rows_in(frame, first, last):
+    days = frame["timestamp"].to_numpy().astype("datetime64[D]")
+    return frame[(days >= np.datetime64(first)) & (days <= np.datetime64(last))]
+
+
+@pytest.mark.parametrize("first, last", RANGES)
+def test_range_totals_match_rows(touchpoints, first, last):
+    rollups = TimeRollups(touchpoints, SYNTH_STAGES, SYNTH_PERSONAS)
+    picked = rows_in(touchpoints, first, last)
+    totals = rollups.totals(to_day(first), to_day(last))
+    assert totals["n"] == len(picked)
+    assert totals["mentions"] == picked["frequency"].sum()
+    assert totals["w_Confidence"] == pytest.approx(picked["confidence"].astype(np.float64).sum())
+    assert totals["sw_Equal"] == pytest.approx(picked["sentiment"].astype(np.float64).sum(), abs=1e-9)
+
+    cells = rollups.cells(to_day(first), to_day(last))
+    want = picked.groupby(["stage", "persona"], observed=True)["frequency"].sum()
+    assert cells["mentions"].to_dict() == want.to_dict()
+
+
+@pytest.mark.parametrize("granularity", GRANULARITIES)
+def test_series_matches_rows_per_bucket(touchpoints, granularity):
+    first, last = RANGES[1]
+    rollups = TimeRollups(touchpoints, SYNTH_STAGES, SYNTH_PERSONAS)
+    series = rollups.series(granularity, to_day(first), to_day(last), "Frequency", split="stage")
+    picked = rows_in(touchpoints, first, last)
+    days = picked["timestamp"].to_numpy().astype("datetime64[D]").astype(np.int64)
+    picked = picked.assign(period=bucket_start(days, granularity).astype("datetime64[D]"),
+                           sw=picked["sentiment"].astype(np.float64) * picked["frequency"])
+    want = picked.groupby(["period", "stage"], observed=True).agg(mentions=("frequency", "sum"),
+                                                                  sw=("sw", "sum"))
+    got = series.set_index(["period", "stage"]).sort_index()
+    want = want.sort_index()
+    assert got["mentions"].tolist() == want["mentions"].tolist()
+    np.testing.assert_allclose(got["avg_sentiment"], want["sw"] / want["mentions"])
+
+
+def test_undated_rows_are_left_out(touchpoints):
+    rollups = TimeRollups(touchpoints, SYNTH_STAGES, SYNTH_PERSONAS)
+    assert rollups.n_rows == touchpoints["timestamp"].notna().sum()
+    undated = TimeRollups(touchpoints.assign(timestamp=pd.NaT), SYNTH_STAGES, SYNTH_PERSONAS)
+    assert (undated.n_rows, undated.first_day) == (0, None)